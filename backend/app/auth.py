@@ -1,91 +1,117 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
-import json
-import os
-import secrets
+from app.user_store import create_user_store
+from app.session_tokens import token_store, guest_limiter, guest_user_id, clean_guest_name
+from app.connection_manager import manager
+from app.credentials import credentials, CredentialsBusy
 
 router = APIRouter()
-USERS_FILE = "users.json"
+# Indexed in memory, written through to SQLite (imports users.json on first run)
+user_store = create_user_store()
 
 # Models
 class UserRegister(BaseModel):
     username: str
-    password: str # In production, hash this!
+    password: str
 
 class UserLogin(BaseModel):
     username: str
     password: str
 
-# Helpers
-def load_users():
-    if not os.path.exists(USERS_FILE):
-        return {"admin": {"password": "admin", "role": "admin", "approved": True}}
-    with open(USERS_FILE, "r") as f:
-        return json.load(f)
+class GuestSession(BaseModel):
+    name: str
 
-def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+class TokenBody(BaseModel):
+    token: str
 
 # Endpoints
 @router.post("/register")
 async def register(user: UserRegister):
-    users = load_users()
-    if user.username in users:
+    if user.username in user_store:
         raise HTTPException(status_code=400, detail="User already exists")
-    
+    try:
+        password_hash = await credentials.hash(user.password)
+    except CredentialsBusy:
+        raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
     # Defaults: Role=employee, Approved=False (Must be approved by admin)
-    users[user.username] = {
-        "password": user.password, 
+    created = user_store.create(user.username, {
+        "password": password_hash,
         "role": "employee", 
         "approved": False
-    }
-    save_users(users)
+    })
+    if not created:
+        raise HTTPException(status_code=400, detail="User already exists")
     return {"message": "Registration successful. Please wait for Admin approval."}
 
 @router.post("/login")
 async def login(user: UserLogin):
-    users = load_users()
-    u = users.get(user.username)
-    
-    if not u or u["password"] != user.password:
+    u = user_store.get(user.username)
+
+    # KDF runs off the event loop; repeat logins within CRED_CACHE_TTL skip it.
+    # Unknown users pay the same KDF, so timing doesn't reveal valid usernames.
+    try:
+        if not u:
+            await credentials.verify_unknown(user.password)
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        ok, new_hash = await credentials.verify(user.username, user.password, u["password"])
+    except CredentialsBusy:
+        raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Plaintext (pre-hashing) or outdated parameters: upgrade in place
+        user_store.update(user.username, password=new_hash)
     
     if not u.get("approved"):
         raise HTTPException(status_code=403, detail="Account pending approval by Admin")
         
+    session = token_store.issue(user.username, u["role"])
     return {
         "username": user.username,
         "role": u["role"],
-        "token": secrets.token_hex(16) # Dummy token
+        "token": session["token"],
+        "expires_at": session["expires_at"]
     }
 
+@router.post("/guest")
+async def guest(body: GuestSession, request: Request):
+    # Customers don't have accounts: a signed customer-only token for a fresh id.
+    # The id is chosen here, so a guest can't claim (and take over) someone else's.
+    if not guest_limiter.allow(request.client.host if request.client else "unknown"):
+        raise HTTPException(status_code=429, detail="Too many sessions, try again later", headers={"Retry-After": "5"})
+    name = clean_guest_name(body.name)
+    if not name:
+        raise HTTPException(status_code=400, detail="name required")
+    user_id = guest_user_id(name)
+    session = token_store.issue(user_id, "customer")
+    return {"user_id": user_id, "name": name, "role": "customer", **session}
+
+@router.post("/logout")
+async def logout(body: TokenBody):
+    token_store.revoke(body.token)
+    return {"message": "Logged out"}
+
 @router.get("/users")
 async def get_users():
-    users = load_users()
     # Return list of {username, role, approved} for UI
     return [
         {"username": k, "role": v["role"], "approved": v.get("approved", False)}
-        for k, v in users.items()
+        for k, v in user_store.items()
         if v["role"] != "admin"
     ]
 
 @router.post("/approve/{username}")
 async def approve_user(username: str):
-    users = load_users()
-    if username not in users:
+    if not user_store.update(username, approved=True):
         raise HTTPException(status_code=404, detail="User not found")
-    
-    users[username]["approved"] = True
-    save_users(users)
     return {"message": f"User {username} approved"}
 
 @router.post("/block/{username}")
 async def block_user(username: str):
-    users = load_users()
-    if username not in users:
+    if not user_store.update(username, approved=False):
         raise HTTPException(status_code=404, detail="User not found")
-    
-    users[username]["approved"] = False
-    save_users(users)
+    # Kick existing sessions too, not just future logins: revoke their tokens
+    # and close a live socket on whichever worker holds it
+    token_store.revoke_user(username)
+    await manager.kick(username)
     return {"message": f"User {username} blocked"}
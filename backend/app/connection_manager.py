@@ -1,137 +1,263 @@
+import logging
 from fastapi import WebSocket
-from typing import List, Dict, Tuple
+from typing import Dict
+
+from app.session_backend import create_session_backend, pack_envelope, unpack_envelope, WORKER_ID
+from app.outbound_writer import OutboundWriter, PRIORITY_CONTROL
+
+logger = logging.getLogger(__name__)
+
+CLOSE_POLICY_VIOLATION = 1008
 
 class ConnectionManager:
-    def __init__(self):
-        # Store tuples: { user_id: {"ws": WebSocket, "lang": "en"} }
-        self.active_connections: Dict[str, dict] = {} 
+    """
+    Sockets live on the worker that accepted them; who is paired with whom,
+    languages and the employee / customer queues live in the session backend
+    (in-process by default, Redis for multiple workers or nodes).
+    Messages for a user on another worker are routed through the backend.
+    Every local socket is written only by its OutboundWriter, so delivering
+    to a slow client never blocks the sender's handler.
+    """
+    def __init__(self, backend=None, worker_id: str = None):
+        self.backend = backend or create_session_backend()
+        self.worker_id = worker_id or WORKER_ID
+        # Local sockets only: { user_id: {"ws": WebSocket, "writer": OutboundWriter, "lang": "en", "role": "customer"} }
+        self.active_connections: Dict[str, dict] = {}
+        # Partner of each LOCAL user (kept in sync by pair / unpair events)
         self.active_pairs: Dict[str, str] = {}
-        self.available_employees: List[str] = []
-        # Queue stores: (user_id, websocket, lang)
-        self.waiting_queue: List[Tuple[str, WebSocket, str]] = [] 
+        # Partners on other workers: { user_id: {"worker": ..., "lang": ...} }
+        self.remote_users: Dict[str, dict] = {}
+
+    async def start(self):
+        await self.backend.start(self.worker_id, self._on_envelope)
 
-    async def connect_user(self, role: str, user_id: str, websocket: WebSocket, lang: str):
+    async def close(self):
+        await self.backend.close()
+
+    async def connect_user(self, role: str, user_id: str, websocket: WebSocket, lang: str, languages: list = None):
+        """`languages`: what an employee can serve (defaults to their UI language)."""
         await websocket.accept()
+        writer = OutboundWriter(user_id, websocket, on_evict=self._on_evicted).start()
         # Store User's Language
-        self.active_connections[user_id] = {"ws": websocket, "lang": lang}
-        
+        self.active_connections[user_id] = {"ws": websocket, "writer": writer, "lang": lang, "role": role}
+        languages = [l for l in (languages or [lang]) if l and l != "auto"]
+        await self.backend.add_user(user_id, role, lang, self.worker_id, languages)
+
         if role == "employee":
-            print(f"👨‍💼 Employee {user_id} connected ({lang}).")
-            self.available_employees.append(user_id)
-            
-            # Check if customers are waiting
-            # Loop until we find a live customer or queue is empty
-            while self.waiting_queue:
-                cust_id, cust_ws, _ = self.waiting_queue.pop(0)
-                
-                # Check if this waiting socket is still open before matching
-                # (Simple check: is it in active_connections? Or just try matching)
-                await self.match_users(cust_id, user_id)
-                
-                # If match failed (customer dead), the employee is put back 
-                # in available pool by disconnect(), so we break or continue?
-                # Actually match_users handles the cleanup. 
-                # We just stop processing queue for this employee.
-                break
+            logger.info("Employee %s connected (%s)", user_id, ", ".join(languages) or lang, extra={"session": user_id})
+            await self._agent_available(user_id, languages)
 
         else:
-            print(f"👤 Customer {user_id} connected ({lang}).")
-            if self.available_employees:
-                emp_id = self.available_employees.pop(0)
+            logger.info("Customer %s connected (%s)", user_id, lang, extra={"session": user_id, "lang": lang})
+            # Prefer an idle agent who speaks the customer's language (no translation hop)
+            emp_id = await self.backend.claim_agent(lang)
+            if emp_id:
                 await self.match_users(user_id, emp_id)
             else:
-                self.waiting_queue.append((user_id, websocket, lang))
-                try:
-                    await websocket.send_json({"system": "All agents busy. You are in queue."})
-                except Exception:
+                position = await self.backend.enqueue_customer(user_id, lang)
+                status = await self.backend.queue_position(user_id)
+                eta = status[1] if status else None
+                notice = f"All agents busy. You are in queue (position {position + 1}"
+                notice += f", about {int(eta)}s)." if eta is not None else ")."
+                if not writer.send_json({"system": notice, "queue": {"position": position, "eta_seconds": eta}}):
                     # If sending fails, they are already gone
                     await self.disconnect(user_id)
 
+    def writer(self, user_id: str):
+        """The local user's OutboundWriter (None if not connected here)."""
+        user_data = self.active_connections.get(user_id)
+        return user_data["writer"] if user_data else None
+
+    def writer_stats(self) -> dict:
+        writers = [user_data["writer"] for user_data in self.active_connections.values()]
+        return {
+            "connections": len(writers),
+            "queued_items": sum(w.depth() for w in writers),
+            "queued_bytes": sum(w.queued_bytes() for w in writers),
+            "max_depth": max((w.depth() for w in writers), default=0),
+            "previews_coalesced": sum(w.coalesced for w in writers),
+        }
+
+    async def _agent_available(self, agent_id: str, languages):
+        """Free agent: take the longest-waiting customer they can serve, else join the idle pool."""
+        # Disconnected customers are removed from the queues, so a claimed one is live.
+        cust_id = await self.backend.claim_customer(languages)
+        if cust_id:
+            await self.match_users(cust_id, agent_id)
+        else:
+            await self.backend.add_agent(agent_id, languages)
+
+    async def queue_status(self, user_id: str):
+        """{"position", "eta_seconds"} for a waiting customer, else None."""
+        status = await self.backend.queue_position(user_id)
+        if status is None:
+            return None
+        return {"position": status[0], "eta_seconds": status[1]}
+
     async def match_users(self, customer_id: str, employee_id: str):
         # Create the link
-        self.active_pairs[customer_id] = employee_id
-        self.active_pairs[employee_id] = customer_id
-        
-        cust_data = self.active_connections.get(customer_id)
-        emp_data = self.active_connections.get(employee_id)
-        
+        await self.backend.pair(customer_id, employee_id)
+        cust_info = await self.backend.get_user(customer_id) or {}
+        emp_info = await self.backend.get_user(employee_id) or {}
+
+        # Both sides (wherever they live) learn their partner before any message arrives
+        await self._route(customer_id, "event", {
+            "event": "paired", "user": customer_id, "partner": employee_id,
+            "worker": emp_info.get("worker"), "lang": emp_info.get("lang", "en"),
+        })
+        await self._route(employee_id, "event", {
+            "event": "paired", "user": employee_id, "partner": customer_id,
+            "worker": cust_info.get("worker"), "lang": cust_info.get("lang", "en"),
+        })
+
         # 1. Notify Customer (CRASH PROOF)
-        if cust_data:
-            try:
-                await cust_data["ws"].send_json({"system": f"Connected to Agent {employee_id}"})
-            except Exception as e:
-                print(f"⚠️ Waiting Customer {customer_id} is dead. Cleaning up.")
-                await self.disconnect(customer_id)
-                return # Stop here, don't notify employee yet
+        if not await self._route(customer_id, "json", {"system": f"Connected to Agent {employee_id}"}):
+            logger.warning("Waiting customer %s is dead, cleaning up", customer_id, extra={"session": customer_id})
+            await self.disconnect(customer_id)
+            return # Stop here, don't notify employee yet
 
         # 2. Notify Employee (CRASH PROOF)
-        if emp_data:
-            try:
-                await emp_data["ws"].send_json({"system": f"Connected to Customer {customer_id}"})
-            except Exception as e:
-                print(f"⚠️ Employee {employee_id} disconnected during match.")
-                await self.disconnect(employee_id)
+        if not await self._route(employee_id, "json", {"system": f"Connected to Customer {customer_id}"}):
+            logger.warning("Employee %s disconnected during match", employee_id, extra={"session": employee_id})
+            await self.disconnect(employee_id)
 
     async def get_user_lang(self, user_id: str):
         if user_id in self.active_connections:
             return self.active_connections[user_id]["lang"]
-        return "en" 
+        if user_id in self.remote_users:
+            return self.remote_users[user_id]["lang"]
+        info = await self.backend.get_user(user_id)
+        return info["lang"] if info else "en"
 
     async def update_user_lang(self, user_id: str, new_lang: str):
         if user_id in self.active_connections:
             self.active_connections[user_id]["lang"] = new_lang
-            print(f"🔄 User {user_id} switched language to {new_lang}") 
+            await self.backend.set_lang(user_id, new_lang)
+            logger.info("User %s switched language to %s", user_id, new_lang, extra={"session": user_id, "lang": new_lang})
+            # A partner on another worker caches our language
+            partner_id = self.active_pairs.get(user_id)
+            if partner_id and partner_id not in self.active_connections:
+                await self._route(partner_id, "event", {
+                    "event": "lang", "user": partner_id, "partner": user_id, "lang": new_lang,
+                })
 
     async def send_to_partner(self, sender_id: str, data: dict):
-        if sender_id in self.active_pairs:
-            receiver_id = self.active_pairs[sender_id]
-            user_data = self.active_connections.get(receiver_id)
-            if user_data:
-                try:
-                    await user_data["ws"].send_json(data)
-                except Exception:
-                    print(f"⚠️ Failed to send to {receiver_id}. Disconnecting them.")
-                    await self.disconnect(receiver_id)
+        receiver_id = self.active_pairs.get(sender_id)
+        if receiver_id:
+            if not await self._route(receiver_id, "json", data) and receiver_id in self.active_connections:
+                logger.warning("Failed to send to %s, disconnecting them", receiver_id, extra={"session": receiver_id})
+                await self.disconnect(receiver_id)
+
+    async def send_bytes_to_partner(self, sender_id: str, data: bytes) -> bool:
+        """Binary frame to the partner (streamed TTS audio). Returns False if nobody received it."""
+        receiver_id = self.active_pairs.get(sender_id)
+        if receiver_id:
+            if await self._route(receiver_id, "bytes", data):
+                return True
+            if receiver_id in self.active_connections:
+                logger.warning("Failed to send audio to %s, disconnecting them", receiver_id, extra={"session": receiver_id})
+                await self.disconnect(receiver_id)
+        return False
 
     async def disconnect(self, user_id: str):
-        # 1. Remove from active connections
+        # 1. Remove from active connections (drops anything still queued for them)
+        user_data = self.active_connections.pop(user_id, None)
+        self.active_pairs.pop(user_id, None)
+        if user_data:
+            await user_data["writer"].close()
+
+        # 2. Remove from idle agents / waiting queue (Clean up ghosts)
+        await self.backend.remove_agent(user_id)
+        await self.backend.remove_customer(user_id)
+        await self.backend.remove_user(user_id)
+
+        # 3. Handle Active Pairs (Notify Partner)
+        partner_id = await self.backend.unpair(user_id)
+        if partner_id:
+            self.remote_users.pop(partner_id, None)
+            await self._route(partner_id, "event", {"event": "unpaired", "user": partner_id, "partner": user_id})
+            await self._route(partner_id, "json", {"system": "Partner disconnected."})
+
+            # If the partner was an Employee (and is still connected), make them available again!
+            partner_info = await self.backend.get_user(partner_id)
+            if partner_info and partner_info.get("role") == "employee":
+                logger.info("Employee %s is available again", partner_id, extra={"session": partner_id})
+                languages = [l for l in partner_info.get("languages", "").split(",") if l]
+                await self._agent_available(partner_id, languages)
+
+    async def kick(self, user_id: str) -> bool:
+        """
+        Closes the user's socket on whichever worker holds it (account blocked).
+        Returns False if they are not connected anywhere.
+        """
+        return await self._route(user_id, "kick", None)
+
+    # --- ROUTING ---
+    async def _route(self, user_id: str, kind: str, payload) -> bool:
+        """
+        Local user: deliver directly. Remote user: publish to the owning worker.
+        Returns False if a local send failed or the user is gone.
+        """
         if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        
-        # 2. Remove from available employees
-        if user_id in self.available_employees:
-            self.available_employees.remove(user_id)
-            
-        # 3. Remove from waiting queue (Clean up ghosts)
-        self.waiting_queue = [x for x in self.waiting_queue if x[0] != user_id]
-
-        # 4. Handle Active Pairs (Notify Partner)
-        if user_id in self.active_pairs:
-            partner_id = self.active_pairs.pop(user_id)
-            if partner_id in self.active_pairs: 
-                del self.active_pairs[partner_id]
-            
-            partner_data = self.active_connections.get(partner_id)
-            if partner_data:
-                try:
-                    await partner_data["ws"].send_json({"system": "Partner disconnected."})
-                except Exception:
-                    pass 
-                
-                # If the partner was an Employee, make them available again!
-                # Check based on ID or if they are NOT in waiting queue
-                # Simplest heuristic: If they are not in waiting queue, they might be an emp.
-                # Better: We trust the role logic. 
-                # If partner_id contains "emp" or "agent" (simple hack) OR just check if they were in the original emp list.
-                # For this prototype, let's assume if they are still connected, we add them back to available.
-                # Note: We rely on the user having "emp" in the logic or just re-add everyone who isn't a customer.
-                # SAFEST: If the partner is NOT in the active_connections anymore, do nothing.
-                
-                # Re-add to available list if it looks like an employee
-                # (You can improve this by storing role in active_connections if needed)
-                if "emp" in partner_id.lower() or "agent" in partner_id.lower():
-                     if partner_id not in self.available_employees:
-                         self.available_employees.append(partner_id)
-                         print(f"♻️ Employee {partner_id} is available again.")
-
-manager = ConnectionManager()
\ No newline at end of file
+            return await self._deliver(user_id, kind, payload)
+        remote = self.remote_users.get(user_id)
+        worker = remote["worker"] if remote else None
+        if worker is None:
+            info = await self.backend.get_user(user_id)
+            if not info:
+                return False
+            worker = info["worker"]
+        if worker == self.worker_id:
+            return False  # Our own user, but no longer connected
+        await self.backend.publish(worker, pack_envelope(user_id, kind, payload))
+        return True
+
+    async def _deliver(self, user_id: str, kind: str, payload) -> bool:
+        if kind == "event":
+            self._apply_event(payload)
+            return True
+        user_data = self.active_connections.get(user_id)
+        if not user_data:
+            return False
+        if kind == "kick":
+            await self.disconnect(user_id)
+            try:
+                # The session's receive loop sees the close and finishes its own cleanup
+                await user_data["ws"].close(code=CLOSE_POLICY_VIOLATION)
+            except Exception:
+                pass  # Already gone
+            return True
+        # Enqueue only: the user's writer task does the actual send
+        if kind == "bytes":
+            return user_data["writer"].send_bytes(payload)
+        return user_data["writer"].send_json(payload, PRIORITY_CONTROL)
+
+    async def _on_evicted(self, writer):
+        """Slow consumer closed by its writer: same cleanup as a disconnect."""
+        user_data = self.active_connections.get(writer.user_id)
+        if user_data and user_data["writer"] is writer:
+            await self.disconnect(writer.user_id)
+
+    def _apply_event(self, event: dict):
+        user_id, partner_id = event["user"], event["partner"]
+        if event["event"] == "paired":
+            self.active_pairs[user_id] = partner_id
+            if partner_id not in self.active_connections and event.get("worker"):
+                self.remote_users[partner_id] = {"worker": event["worker"], "lang": event["lang"]}
+        elif event["event"] == "unpaired":
+            if self.active_pairs.get(user_id) == partner_id:
+                del self.active_pairs[user_id]
+            self.remote_users.pop(partner_id, None)
+        elif event["event"] == "lang" and partner_id in self.remote_users:
+            self.remote_users[partner_id]["lang"] = event["lang"]
+
+    async def _on_envelope(self, data: bytes):
+        """Message published to this worker by another one."""
+        user_id, kind, payload = unpack_envelope(data)
+        if user_id not in self.active_connections:
+            return
+        if not await self._deliver(user_id, kind, payload):
+            logger.warning("Failed to deliver to %s, disconnecting them", user_id, extra={"session": user_id})
+            await self.disconnect(user_id)
+
+manager = ConnectionManager()
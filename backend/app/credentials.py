@@ -0,0 +1,180 @@
+#Password hashing: scrypt in a bounded thread pool (never on the event loop) + short-lived verified-credential cache.
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEME = "scrypt"
+
+
+class CredentialsBusy(Exception):
+    """Too many KDF jobs already waiting; the caller should retry later."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(SCHEME + "$")
+
+
+def hash_password(password: str, n: int = 2 ** 14, r: int = 8, p: int = 1) -> str:
+    """`scrypt$n$r$p$salt$hash` (base64). Blocking: call through CredentialService."""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+    return f"{SCHEME}${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Blocking check against a hash from hash_password() (or a legacy plaintext value)."""
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        _, n, r, p, salt, expected = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        expected = base64.b64decode(expected)
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=base64.b64decode(salt), n=n, r=r, p=p,
+                                maxmem=256 * n * r * p, dklen=len(expected))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+class CredentialService:
+    """
+    Async front end for the KDF.
+
+    - scrypt runs on a small dedicated pool (hashlib releases the GIL while
+      it works), so a login storm costs CPU but doesn't stall WebSockets.
+    - At most `max_pending` jobs may wait for the pool; beyond that
+      CredentialsBusy is raised instead of queueing unbounded work.
+    - Successful verifications are remembered for `cache_ttl` seconds, keyed by
+      an HMAC (random per-process key) of user + password + stored hash, so a
+      reconnect skips the KDF and a password change invalidates the entry.
+    - Plaintext or outdated-parameter hashes verify normally and come back
+      with a fresh hash for the caller to store (transparent upgrade).
+    - Unknown usernames go through verify_unknown(): the same KDF against a
+      dummy hash, so response time doesn't reveal which accounts exist.
+    """
+    def __init__(self, workers: int = None, max_pending: int = None, cache_ttl: float = None,
+                 cache_size: int = None, n: int = None, clock=time.monotonic):
+        self.workers = workers or int(os.getenv("CRED_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_pending = max_pending or int(os.getenv("CRED_MAX_PENDING", "256"))
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("CRED_CACHE_TTL", "300"))
+        self.cache_size = cache_size or int(os.getenv("CRED_CACHE_SIZE", "10000"))
+        self.n = n or int(os.getenv("CRED_SCRYPT_N", str(2 ** 14)))
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+        self._pending = 0
+        self._cache_key = secrets.token_bytes(32)
+        self._cache = OrderedDict()  # digest -> expires_at (insertion order == expiry order)
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+
+        # Stats
+        self.kdf_runs = 0
+        self.cache_hits = 0
+        self.rehashed = 0
+        self.rejected_busy = 0
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self.rejected_busy += 1
+            raise CredentialsBusy()
+        self._pending += 1
+        try:
+            self.kdf_runs += 1
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.n)
+
+    def needs_rehash(self, stored: str) -> bool:
+        if not is_hashed(stored):
+            return True
+        return stored.split("$")[1] != str(self.n)
+
+    async def verify(self, username: str, password: str, stored: str):
+        """
+        (ok, new_hash). new_hash is set when the stored value should be
+        replaced (plaintext or old parameters), otherwise None.
+        """
+        key = hmac.new(self._cache_key, "\0".join((username, password, stored)).encode("utf-8"),
+                       hashlib.sha256).digest()
+        if self._cached(key):
+            self.cache_hits += 1
+            return True, None
+
+        if is_hashed(stored):
+            ok = await self._run(verify_password, password, stored)
+        else:
+            # Legacy plaintext: the compare is cheap, the upgrade below is not
+            ok = verify_password(password, stored)
+        if not ok:
+            return False, None
+
+        new_hash = None
+        if self.needs_rehash(stored):
+            new_hash = await self.hash(password)
+            self.rehashed += 1
+            key = hmac.new(self._cache_key, "\0".join((username, password, new_hash)).encode("utf-8"),
+                           hashlib.sha256).digest()
+        self._remember(key)
+        return True, new_hash
+
+    async def verify_unknown(self, password: str) -> bool:
+        """Login for a user that doesn't exist: costs one KDF run like a wrong password, always False."""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_hex(16))
+        await self._run(verify_password, password, self._dummy_hash)
+        return False
+
+    # --- VERIFIED CACHE ---
+    def _cached(self, key: bytes) -> bool:
+        with self._lock:
+            expires = self._cache.get(key)
+            return expires is not None and expires > self.clock()
+
+    def _remember(self, key: bytes):
+        if self.cache_ttl <= 0:
+            return
+        now = self.clock()
+        with self._lock:
+            while self._cache:
+                oldest, expires = next(iter(self._cache.items()))
+                if expires > now and len(self._cache) < self.cache_size:
+                    break
+                del self._cache[oldest]
+            self._cache.pop(key, None)
+            self._cache[key] = now + self.cache_ttl
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "kdf_runs": self.kdf_runs,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._cache),
+            "rehashed": self.rehashed,
+            "rejected_busy": self.rejected_busy,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+# Global Instance
+credentials = CredentialService()
@@ -0,0 +1,143 @@
+#Non-blocking logging: callers only enqueue records; a listener thread does the disk/stdout I/O.
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+# Structured fields picked up from `extra=` and emitted as JSON keys
+CONTEXT_FIELDS = ("session", "lang", "adapter", "stage")
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg + any context fields."""
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: if the listener falls behind, records are dropped and counted."""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SessionRateLimitFilter(logging.Filter):
+    """
+    Token bucket per session for DEBUG records that carry `session` in extra.
+    A chatty session (one preview every 0.5 s, one frame every 32 ms) can't
+    flood the log; INFO and above always pass.
+    """
+    def __init__(self, rate: float = None, burst: int = None, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate if rate is not None else float(os.getenv("LOG_SESSION_RATE", "5"))
+        self.burst = burst if burst is not None else int(os.getenv("LOG_SESSION_BURST", "20"))
+        self.clock = clock
+        self.suppressed = 0
+        self._buckets = {}  # session -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        session = getattr(record, "session", None)
+        if session is None:
+            return True
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(session)
+            if bucket is None:
+                bucket = self._buckets[session] = [float(self.burst), now]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                self.suppressed += 1
+                return False
+            bucket[0] -= 1.0
+            return True
+
+    def forget(self, session):
+        with self._lock:
+            self._buckets.pop(session, None)
+
+
+# Global Instances
+session_limiter = SessionRateLimitFilter()
+_listener = None
+_queue_handler = None
+
+
+def setup_logging(level: str = None, log_file: str = None, json_format: bool = None, queue_size: int = None,
+                  console: bool = None):
+    """
+    Routes the root logger through a bounded queue (LOG_QUEUE_SIZE).
+    Config: LOG_LEVEL (INFO), LOG_FILE (app.log, empty = console only), LOG_JSON (0),
+    LOG_CONSOLE (1).
+    Hot-path messages are DEBUG with lazy %-args, so at INFO they cost one
+    level check. Idempotent: a second call replaces the previous listener.
+    """
+    global _listener, _queue_handler
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_file = log_file if log_file is not None else os.getenv("LOG_FILE", "app.log")
+    if json_format is None:
+        json_format = os.getenv("LOG_JSON", "0") == "1"
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    if console is None:
+        console = os.getenv("LOG_CONSOLE", "1") == "1"
+
+    formatter = JSONFormatter() if json_format else logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    handlers = [logging.StreamHandler()] if console else []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    stop_logging()
+    log_queue = queue.Queue(queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(session_limiter)
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    return {
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "rate_limited": session_limiter.suppressed,
+    }
@@ -1,17 +1,26 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.connection_manager import manager
 from app.services.audio_processor import AudioProcessor
+from app.services.vad_scheduler import vad_scheduler
+from app.services.audio_buffer import AudioAccumulator
+from app.services.audio_ingest import IngestDecoder
+from app.services.session_tasks import SessionTasks
+from app.services.audio_protocol import CODEC_NAMES, INGEST_CODECS
 from app.services.transcriber import transcriber_service
 from app.services.translator import translator_service
-from gtts import gTTS
+from app.services.tts import tts_service, load_warmup_config
+from app.outbound_pipeline import OutboundPipeline
+from app.outbound_writer import PRIORITY_PREVIEW
+from app.metrics import metrics
+from app.logging_setup import setup_logging, stop_logging, logging_stats, session_limiter
+from app.session_tokens import token_store
+from app.credentials import credentials
 import json
-import base64
-import io
 import time
 import asyncio
 import numpy as np
-from functools import partial
 import os
 from dotenv import load_dotenv
 import logging
@@ -20,23 +29,31 @@ import logging
 load_dotenv()
 
 # --- Logging Configuration ---
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+# Queue-based: the event loop only enqueues; file/stdout writes happen on a listener thread.
+setup_logging()
 logger = logging.getLogger(__name__)
 
 logger.info("BACKEND SERVER RESTARTED SUCCESSFULLY (NumPy IMPORTED)")
 
+# Voice turns: committed transcripts go straight to translation + partner delivery
+VOICE_AUTO_SEND = os.getenv("VOICE_AUTO_SEND", "1") == "1"
+# Pre-translate preview text once it stops changing (warms the translation cache)
+VOICE_SPECULATIVE_MT = os.getenv("VOICE_SPECULATIVE_MT", "1") == "1"
+# Require a signed session token (?token=...) on the WebSocket handshake
+WS_AUTH = os.getenv("WS_AUTH", "1") == "1"
+
 app = FastAPI()
 
+# Language labels come from clients: anything the transcriber doesn't know is "other"
+metrics.restrict_langs([*transcriber_service.lang_map, "auto"])
+# Outbound queue depth across this worker's connections (see OutboundWriter)
+metrics.gauge("ws_queue_items", lambda: manager.writer_stats()["queued_items"], "Messages queued for WebSocket clients.")
+metrics.gauge("ws_queue_bytes", lambda: manager.writer_stats()["queued_bytes"], "Bytes queued for WebSocket clients.")
+metrics.gauge("ws_queue_max_depth", lambda: manager.writer_stats()["max_depth"], "Deepest per-connection queue.")
+
 # Configurable CORS
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
-print(f"CORS Allowed Origins: {ALLOWED_ORIGINS}")
+logger.info("CORS Allowed Origins: %s", ALLOWED_ORIGINS)
 
 app.add_middleware(
     CORSMiddleware, allow_origins=ALLOWED_ORIGINS, allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
@@ -46,103 +63,187 @@ app.add_middleware(
 async def health_check():
     return {"status": "ok", "message": "Voice Chatbot Backend is Running!"}
 
+@app.get("/stats")
+async def stats():
+    """Inference internals: VAD batching, MMS adapter swaps, translation cache."""
+    return {
+        "vad": vad_scheduler.stats(),
+        "transcriber": transcriber_service.stats(),
+        "translator": translator_service.stats(),
+        "tts": tts_service.stats(),
+        "latency": metrics.snapshot(),
+        "logging": logging_stats(),
+        "sessions": token_store.stats(),
+        "credentials": credentials.stats(),
+        "outbound": manager.writer_stats(),
+    }
+
+@app.get("/queue/{user_id}")
+async def queue_status(user_id: str):
+    """Queue position (0 = next) and estimated wait for a waiting customer."""
+    return {"user_id": user_id, "queue": await manager.queue_status(user_id), "stats": await manager.backend.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latency histograms (Prometheus text format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/trace/{session_id}")
+async def session_trace(session_id: str):
+    """Per-session span trace (requires METRICS_TRACE=1)."""
+    return {"session": session_id, "enabled": metrics.trace_enabled, "events": metrics.trace(session_id)}
+
+@app.on_event("startup")
+async def startup():
+    # Subscribe to this worker's channel (cross-worker partner delivery)
+    await manager.start()
+    # Background: don't delay accepting connections
+    asyncio.create_task(warm_up_tts())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await translator_service.aclose()
+    await manager.close()
+    credentials.close()
+    stop_logging()
+
 # --- AUTH ROUTER ---
 from app.auth import router as auth_router
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 
-def generate_audio_sync(text, lang):
-    """Synchronous gTTS generation (Blocking)"""
+async def warm_up_tts():
+    """Pre-synthesizes stock agent phrases (TTS_WARMUP_FILE) in every configured language."""
+    config = load_warmup_config()
+    if not config: return
+    source = config.get("source_lang", "en")
+    phrases = {lang: config.get("phrases", []) for lang in config.get("languages", [])}
+
+    async def translate(phrase, lang):
+        return await translator_service.translate_async(phrase, source, lang)
+
     try:
-        if not text: return None
-        tts = gTTS(text=text, lang=lang, slow=False)
-        mp3_fp = io.BytesIO()
-        tts.write_to_fp(mp3_fp)
-        mp3_fp.seek(0)
-        return base64.b64encode(mp3_fp.read()).decode("utf-8")
+        await tts_service.warm_up(phrases, translate=translate)
     except Exception as e:
-        print(f"TTS Error: {e}")
-        return None
-
-async def generate_audio(text, lang):
-    """Async wrapper for TTS"""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, generate_audio_sync, text, lang)
+        logger.error("TTS Warm-up Error: %s", e)
 
 @app.websocket("/ws/{role}/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, role: str, user_id: str, lang: str = "en"):
-    await manager.connect_user(role, user_id, websocket, lang)
-    processor = AudioProcessor()
+async def websocket_endpoint(websocket: WebSocket, role: str, user_id: str, lang: str = "en", skills: str = "", token: str = ""):
+    # AUTH FIRST: reject before accept() and before any VAD / decoder / pipeline state exists.
+    # Closing during the handshake answers with HTTP 403; the check is an HMAC + dict lookups.
+    if WS_AUTH and token_store.authorize(token, role, user_id) is None:
+        metrics.inc("ws_auth_rejected")
+        await websocket.close(code=1008)
+        return
+
+    # skills: comma-separated languages an employee can serve (e.g. "kn,hi"); defaults to lang
+    languages = [s.strip() for s in skills.split(",") if s.strip()] or None
+    await manager.connect_user(role, user_id, websocket, lang, languages)
+    # Every send to this client goes through its writer (never awaited inline)
+    writer = manager.writer(user_id)
+    if writer is None:
+        return
+    # Cheap per-session VAD context (model is shared, loaded once at startup)
+    processor = AudioProcessor(scheduler=vad_scheduler, session=user_id)
+
+    # Outbound stages (translate -> text -> TTS -> audio) run off the receive loop
+    outbound = OutboundPipeline(user_id, writer).start()
+
+    # Mic ingest: framed s16 / f32 / Opus (or legacy bare float32) -> 16 kHz float32.
+    # Tell the client what we accept; it picks a codec per frame header.
+    decoder = IngestDecoder()
+    writer.send_json({
+        "type": "audio_config",
+        "codecs": [name for name, code in CODEC_NAMES.items() if code in INGEST_CODECS],
+        "sample_rate": decoder.target_rate,
+    })
 
     # Handle Auto-Detect
     # logic: if lang is 'auto', we pass None to the transcriber
     trans_lang = None if lang == "auto" else lang
     
-    # Buffer to hold the growing PCM audio chunks for this sentence
-    # Changed from bytearray to list[bytes] to prevent "BufferError" (locking issues)
-    pcm_chunks = []
+    # Buffer to hold the growing PCM audio for this sentence.
+    # Preallocated float32 accumulator: frames are appended in place and the
+    # DIGITAL GAIN (4.0x Software Pre-amp) is applied only to the new samples.
+    # 1.5 was too weak (Amp 0.05). We need roughly 0.2-0.5 for clear speech.
+    audio_buffer = AudioAccumulator(gain=4.0)
     
+    # Incremental decoder: caches stable CTC logits so previews only
+    # re-encode the tail, and the final commit reuses them.
+    stream = transcriber_service.new_stream()
+
     # Concurrency Lock: Prevents multiple transcription threads from overlapping
     # If the AI is busy, we will DROP the "preview" update (Traffic shaping)
     transcription_lock = asyncio.Lock()
 
-    print(f"Connection Established: {user_id}")
+    # Tracks this session's preview / commit tasks: stale previews are cancelled,
+    # and everything still pending is cancelled on disconnect
+    session_tasks = SessionTasks(user_id, stream)
+
+    logger.info("Connection Established: %s", user_id, extra={"session": user_id})
     
     # Latency Optimization: Throttle intermediate updates
     last_transcribe_time = 0.0
 
     # Sticky Language Detection: Remembers language for the current sentence
     # We use a mutable dict so the background task 'run_preview' can update it
-    session_state = {"lang": None}
+    session_state = {"lang": None, "src_lang": lang, "target_lang": None, "last_preview": None}
 
     try:
         while (True):
             message = await websocket.receive()
             # print(f"DEBUG: Msg Type: {message.get('type')}") # Reduce noise
             if message["type"] == "websocket.disconnect":
-                print(f"Client Disconnected! Code: {message.get('code')} Reason: {message.get('reason')}")
+                logger.info("Client Disconnected! Code: %s Reason: %s", message.get("code"), message.get("reason"),
+                            extra={"session": user_id})
                 raise WebSocketDisconnect()
 
             partner_id = manager.active_pairs.get(user_id)
             target_lang = "en"
             if partner_id:
                 target_lang = await manager.get_user_lang(partner_id)
+            session_state["target_lang"] = target_lang if partner_id else None
 
             msg_type = message.get("type")
 
-            # --- CASE A: AUDIO STREAM (Raw PCM Float32) ---
+            # --- CASE A: AUDIO STREAM (framed s16 / f32 / Opus, or legacy raw Float32) ---
             if msg_type == "websocket.receive.bytes" or "bytes" in message:
                 audio_chunk = message.get("bytes")
                 if audio_chunk:
-                    # Safety check
-                    if len(audio_chunk) % 4 != 0: continue
+                    frame_start = time.perf_counter()
+                    lost, reordered = decoder.lost, decoder.reordered
+                    samples = decoder.decode(audio_chunk)
+                    if decoder.lost != lost:
+                        metrics.inc("audio_frames_lost", lang, decoder.lost - lost)
+                        logger.debug("%s: %d mic frame(s) lost", user_id, decoder.lost - lost, extra={"session": user_id})
+                    if decoder.reordered != reordered:
+                        metrics.inc("audio_frames_reordered", lang)
+                    # Malformed, late or (Opus) still buffering
+                    if samples is None or len(samples) == 0: continue
+                    effective_lang = trans_lang if trans_lang else session_state["lang"]
+                    tags = metric_tags(user_id, effective_lang or lang)
                         
-                    # 1. Append to List (Safe, O(1))
-                    pcm_chunks.append(audio_chunk)
+                    # 1. Append in place (O(frame), gain applied to new samples only)
+                    new_samples = audio_buffer.append(samples)
                     
-                    # 2. Check VAD (Needs full context?)
-                    # For VAD, we need to look at recent history. 
-                    # Combining ALL chunks is fast for < 30s audio.
-                    full_audio_bytes = b"".join(pcm_chunks)
-                    pcm_audio = np.frombuffer(full_audio_bytes, dtype=np.float32)
+                    # 2. Streaming VAD: score only the NEW 512-sample windows (once each),
+                    #    batched with every other live session by the shared scheduler
+                    with metrics.span("vad", **tags):
+                        await processor.feed_async(new_samples)
                     
                     # 3. Throttled Transcription (Every 0.5s)
                     now = time.time()
                     
-                    # DIGITAL GAIN: Boost volume by 4.0x (Software Pre-amp)
-                    # 1.5 was too weak (Amp 0.05). We need roughly 0.2-0.5 for clear speech.
-                    pcm_audio = pcm_audio * 4.0
-                    
                     # Check if speaking
-                    # OPTIMIZATION: Only check VAD on the last 0.3s (4800 samples)
-                    vad_chunk = pcm_audio[-4800:] if len(pcm_audio) > 4800 else pcm_audio
+                    # OPTIMIZATION: Amplitude gate only looks at the last 0.3s (4800 samples, zero-copy view)
+                    vad_chunk = audio_buffer.tail(4800)
                     
                     # DEBUG AMPLITUDE: Check if mic is too quiet
                     max_amp = float(np.max(np.abs(vad_chunk))) if len(vad_chunk) > 0 else 0.0
                     
                     # HYBRID VAD:
-                    # 1. Trust Silero VAD
+                    # 1. Trust Silero VAD (cached per-window history, same last 0.3s as the amplitude gate)
                     # 2. OR Trust raw Amplitude > 0.01 (Fallback if VAD fails on foreign language)
-                    is_speaking = processor.has_speech(vad_chunk) or (max_amp > 0.01)
+                    is_speaking = processor.recent_speech(4800 // 512) or (max_amp > 0.01)
                     
                     if is_speaking:
                          # print(f"Speech Detected! Amp: {max_amp:.4f}")
@@ -157,32 +258,29 @@ async def websocket_endpoint(websocket: WebSocket, role: str, user_id: str, lang
                         if not hasattr(websocket, "last_preview_time"): websocket.last_preview_time = 0
                         
                         if (now - websocket.last_preview_time) > 0.5:
-                            # CONCURRENCY CHECK: Only transcribe if AI is FREE
-                            # If locked, we SKIP this preview. This prevents "infinite loop" / lag buildup.
-                            if not transcription_lock.locked():
-                                # Lock and Run
-                                # Sticky Logic: Use cached language if we found one, else use global setting
-                                # CHECK: If trans_lang is set, we MUST use it. 
-                                # session_state["lang"] is only for "auto" mode persistence.
-                                effective_lang = trans_lang if trans_lang else session_state["lang"]
-                                
+                            # CONCURRENCY CHECK: one preview per session (SessionTasks).
+                            # Busy on the model or a commit pending -> we SKIP this preview (no lag buildup);
+                            # an older preview still queued for the model is replaced by this newer one.
+                            # Sticky Logic: Use cached language if we found one, else use global setting
+                            # CHECK: If trans_lang is set, we MUST use it.
+                            # session_state["lang"] is only for "auto" mode persistence.
+                            effective_lang = trans_lang if trans_lang else session_state["lang"]
+
+                            # OPTIMIZATION: Incremental Preview
+                            # The streaming decoder only re-encodes the unstable tail
+                            # (plus fixed left context), so we can hand it the whole
+                            # utterance (zero-copy view) at ~constant cost.
+                            preview_audio = audio_buffer.view()
+
+                            if session_tasks.start_preview(run_preview(writer, preview_audio, effective_lang, transcription_lock, session_state, stream, tags, session_tasks)):
                                 # DEBUG LANGUAGE: Critical to verify "kn" is passed
-                                logger.info(f"Previewing with Lang: {effective_lang} (User Req: {trans_lang})")
-                                
+                                logger.debug("Previewing with Lang: %s (User Req: %s)", effective_lang, trans_lang,
+                                             extra={"session": user_id, "lang": effective_lang})
                                 websocket.last_preview_time = now
-                                
-                                # OPTIMIZATION: Rolling Window for Preview
-                                # Only transcribe the last 15 seconds (240,000 samples)
-                                # This keeps "preview" fast even for long audio.
-                                # The final "Commit" will still use full audio.
-                                samples_15s = 16000 * 15
-                                preview_audio = pcm_audio[-samples_15s:] if len(pcm_audio) > samples_15s else pcm_audio
-                                
-                                asyncio.create_task(run_preview(websocket, preview_audio, effective_lang, transcription_lock, session_state))
                             else:
                                 # System busy, skipping frame (Traffic shaping)
                                 # print("⚠️ Skipping Preview (System Busy)")
-                                pass
+                                metrics.inc("preview_skipped_busy", lang=tags["lang"])
                             
                         websocket.last_speech_time = now
 
@@ -192,25 +290,42 @@ async def websocket_endpoint(websocket: WebSocket, role: str, user_id: str, lang
                         
                         silence_dur = now - websocket.last_speech_time
                         
-                        if silence_dur > 1.2 and len(pcm_audio) > 16000:
+                        if silence_dur > 1.2 and len(audio_buffer) > 16000:
                             # > 1.2s Silence -> COMMIT
-                            print(f"Silence ({silence_dur:.1f}s) -> Committing (Async).")
-                            print(f"Silence ({silence_dur:.1f}s) -> Committing (Async).")
+                            logger.debug("Silence (%.1fs) -> Committing (Async).", silence_dur, extra={"session": user_id})
+                            # Actual silence seen at commit (threshold + frame granularity)
+                            metrics.observe("commit_silence", silence_dur, **tags)
+                            metrics.inc("commit", lang=tags["lang"])
                             
                             # Fire and forget (Background Commit) to prevent blocking WS loop
                             effective_lang = trans_lang if trans_lang else session_state["lang"]
                             
                             # Offload to background task
-                            await websocket.send_json({"type": "status", "status": "processing"})
-                            asyncio.create_task(process_commit(websocket, pcm_audio, effective_lang, transcription_lock))
+                            writer.send_json({"type": "status", "status": "processing"})
                             
-                            # Clear Buffer (Reset list)
-                            pcm_chunks = []
+                            # Hand off the utterance (zero-copy) and start a fresh buffer
+                            pcm_audio = audio_buffer.detach()
+                            
+                            # Server-side voice turn: commit -> MT -> partner (+ TTS), timed per stage
+                            voice_turn = None
+                            if VOICE_AUTO_SEND and partner_id:
+                                voice_turn = {
+                                    "outbound": outbound,
+                                    "src_lang": effective_lang or lang,
+                                    "target_lang": target_lang,
+                                    "timing": {"speech_end": websocket.last_speech_time, "commit": now},
+                                }
+                            session_state["last_preview"] = None
+                            # Supersedes any preview still pending for this utterance
+                            session_tasks.start_commit(process_commit(writer, pcm_audio, effective_lang, transcription_lock, stream, voice_turn, tags))
                             # Reset flags
                             websocket.last_speech_time = now 
                             # Reset Sticky Language (Next sentence might be different)
                             session_state["lang"] = None 
 
+                    # Receive-loop time spent on this frame (everything above is inline)
+                    metrics.observe("frame", time.perf_counter() - frame_start, **tags)
+
             # --- CASE B: TEXT / COMMANDS ---
             elif msg_type == "websocket.receive.text" or "text" in message:
                 text_data = message.get("text")
@@ -219,21 +334,25 @@ async def websocket_endpoint(websocket: WebSocket, role: str, user_id: str, lang
 
                 # 1. HANDLE "STOP RECORDING" (FORCE FLUSH)
                 if parsed.get("type") == "stop_recording":
-                    print(f"{user_id}: Stop Received.")
+                    logger.debug("%s: Stop Received.", user_id, extra={"session": user_id})
                     # Flush whatever is left
                     # (Code condensed for brevity, logic remains same)
-                    if len(pcm_chunks) > 0:
-                        full_audio_bytes = b"".join(pcm_chunks)
-                        pcm_audio = np.frombuffer(full_audio_bytes, dtype=np.float32)
-                        pcm_chunks = [] 
+                    # Mic is off: next recording is a new stream for the VAD
+                    # and may restart its sequence numbers / codec
+                    processor.reset_stream()
+                    decoder.reset_stream()
+                    session_tasks.cancel_preview()
+                    if len(audio_buffer) > 0:
+                        pcm_audio = audio_buffer.detach()
                         
                         async with transcription_lock:
                             effective_lang = trans_lang if trans_lang else session_state["lang"]
-                            final_text, detected_lang = await run_transcribe_sync(pcm_audio, effective_lang)
+                            with metrics.span("stop_asr", **metric_tags(user_id, effective_lang or lang)):
+                                final_text, detected_lang = await run_transcribe_sync(pcm_audio, effective_lang, stream)
                             
                         if final_text:
-                             try: await websocket.send_json({"type": "preview", "text": final_text})
-                             except RuntimeError: pass
+                             # Final text: control priority, so it can't be coalesced away
+                             writer.send_json({"type": "preview", "text": final_text})
 
                 # 2. HANDLE "LANGUAGE CHANGE"
                 elif parsed.get("type") == "language_change":
@@ -248,101 +367,115 @@ async def websocket_endpoint(websocket: WebSocket, role: str, user_id: str, lang
                             trans_lang = new_lang
                             session_state["lang"] = new_lang
                         
-                        logger.info(f"Language updated to: {new_lang}")
-                        await websocket.send_json({"system": f"Language switched to {new_lang}"})
+                        logger.info("Language updated to: %s", new_lang, extra={"session": user_id})
+                        writer.send_json({"system": f"Language switched to {new_lang}"})
 
                 # 3. HANDLE "TEXT MESSAGE" (SEND)
                 elif "text" in parsed:
                     actual_text = parsed["text"]
                     if not actual_text.strip(): continue
 
-                    print(f"{user_id} sending: {actual_text}")
+                    logger.debug("%s sending: %s", user_id, actual_text, extra={"session": user_id})
                     
-                    # ASYNC TRANSLATION (Non-blocking)
-                    # Google Translate API is slow, so we must run it in a thread.
-                    loop = asyncio.get_running_loop()
-                    translated_text = await loop.run_in_executor(
-                        None, 
-                        translator_service.translate_text, 
-                        actual_text, lang, target_lang
-                    )
-                    
-                    audio_b64 = await generate_audio(translated_text, target_lang)
-
-                    # 1. Send Text Update
-                    text_payload = {
-                        "sender": user_id,
-                        "original": actual_text,
-                        "translated": translated_text,
-                        "src_lang": lang,
-                        "target_lang": target_lang
-                    }
-                    await websocket.send_json(text_payload)
-                    await manager.send_to_partner(user_id, text_payload)
-
-                    # 2. Send Audio Update (If available)
-                    if audio_b64:
-                        audio_payload = {
-                            "type": "audio",
-                            "payload": audio_b64,
-                            "sender": user_id
-                        }
-                        await websocket.send_json(audio_payload)
-                        await manager.send_to_partner(user_id, audio_payload)
+                    # PIPELINED: translation, text delivery, TTS and audio delivery
+                    # happen in the session's outbound stages. We never wait here,
+                    # so incoming mic frames keep flowing.
+                    if not outbound.submit(actual_text, lang, target_lang):
+                        writer.send_json({"system": "Too many messages pending. Please wait."})
 
     except WebSocketDisconnect:
         await manager.disconnect(user_id)
+    finally:
+        # Nobody will see these results: stop spending inference on them
+        await session_tasks.close()
+        await outbound.close()
+        metrics.end_session(user_id)
+        session_limiter.forget(user_id)
 
 # --- HELPER FUNCTIONS FOR CONCURRENCY ---
-async def run_preview(websocket, pcm_audio, lang, lock, session_state=None):
+def metric_tags(session, lang):
+    """Span tags: session, language and the MMS adapter that language maps to."""
+    return {"session": session, "lang": lang, "adapter": transcriber_service._target_code(lang)}
+
+async def run_preview(writer, pcm_audio, lang, lock, session_state=None, stream=None, tags=None, tasks=None):
     """
     Runs transcription getting the lock first.
-    Returns: None (Sends WS message directly)
+    Returns: None (queues the preview on the session's writer; newer previews replace unsent ones)
     """
+    tags = tags or {}
+    preview_start = time.perf_counter()
     async with lock:
-        loop = asyncio.get_event_loop()
+        metrics.observe("lock_wait_preview", time.perf_counter() - preview_start, **tags)
         try:
-             # Unpack tuple from transcriber
-             result = await loop.run_in_executor(None, partial(transcriber_service.transcribe_audio, pcm_audio, language=lang))
+             # Unpack tuple from transcriber (batched on the shared inference worker)
+             with metrics.span("preview_asr", **tags):
+                 if stream is not None:
+                     result = await stream.update(pcm_audio, language=lang)
+                 else:
+                     result = await transcriber_service.transcribe_async(pcm_audio, language=lang)
              text, detected_info = result
              
              if text:
                  # Update Sticky Language if it was Auto
                  if session_state and detected_info and not session_state["lang"]:
-                     print(f"Auto-Detected Logic: Locked to '{detected_info}'")
+                     logger.info("Auto-Detected Logic: Locked to '%s'", detected_info, extra=tags)
                      session_state["lang"] = detected_info
                  
-                 try: await websocket.send_json({"type": "preview", "text": text})
-                 except RuntimeError: pass 
+                 writer.send_json({"type": "preview", "text": text}, PRIORITY_PREVIEW)
+                 # Preview start (request) -> preview end (sent to client)
+                 metrics.observe("preview", time.perf_counter() - preview_start, **tags)
+
+                 # SPECULATIVE MT: preview unchanged since last time -> likely final.
+                 # Translate it now; the commit will then hit the cache (or join this call).
+                 # Owned by the session's tasks: one at a time, cancelled on disconnect.
+                 if VOICE_SPECULATIVE_MT and tasks and session_state and session_state.get("target_lang"):
+                     if text == session_state.get("last_preview"):
+                         src = lang or session_state.get("src_lang")
+                         tasks.start_speculation(translator_service.translate_async(text, src, session_state["target_lang"]))
+                     session_state["last_preview"] = text
         except Exception as e:
-            print(f"Preview Error: {e}")
+            logger.error("Preview Error: %s", e, extra=tags)
 
-async def process_commit(websocket, pcm_audio, lang, lock):
+async def process_commit(writer, pcm_audio, lang, lock, stream=None, voice_turn=None, tags=None):
     """
     Runs final transcription and commits (Async Background Task).
+    With a voice_turn, the transcript is also handed straight to the session's
+    outbound pipeline (translate -> partner -> TTS) instead of waiting for the
+    client to send it back as a text message.
     """
+    tags = tags or {}
+    wait_start = time.perf_counter()
     async with lock:
+        metrics.observe("lock_wait_commit", time.perf_counter() - wait_start, **tags)
         try:
-            final_text, detected_lang = await run_transcribe_sync(pcm_audio, lang)
+            with metrics.span("commit_asr", **tags):
+                final_text, detected_lang = await run_transcribe_sync(pcm_audio, lang, stream)
             if final_text:
-                try: await websocket.send_json({"type": "commit", "text": final_text})
-                except RuntimeError: pass # Socket closed
-            
-            try: await websocket.send_json({"type": "status", "status": "idle"})
-            except RuntimeError: pass
+                auto_sent = False
+                if voice_turn is not None:
+                    voice_turn["timing"]["asr_done"] = time.time()
+                    auto_sent = voice_turn["outbound"].submit(
+                        final_text, voice_turn["src_lang"], voice_turn["target_lang"], timing=voice_turn["timing"]
+                    )
+                # A preview still waiting to go out is older than this commit
+                writer.send_json({"type": "commit", "text": final_text, "auto_sent": auto_sent}, drop_preview=True)
+
+            writer.send_json({"type": "status", "status": "idle"})
             
         except Exception as e:
-            print(f"Commit Error: {e}")
+            logger.error("Commit Error: %s", e, extra=tags)
 
-async def run_transcribe_sync(pcm_audio, lang):
+async def run_transcribe_sync(pcm_audio, lang, stream=None):
     """
-    Helper to run transcription in executor (blocking wrapper)
+    Helper to run transcription on the inference scheduler.
+    With a stream, only the unstable tail is encoded (cached logits are reused).
     """
-    loop = asyncio.get_event_loop()
     try:
-        return await loop.run_in_executor(None, partial(transcriber_service.transcribe_audio, pcm_audio, language=lang))
+        if stream is not None:
+            return await stream.finalize(pcm_audio, language=lang)
+        return await transcriber_service.transcribe_async(pcm_audio, language=lang)
     except Exception as e:
-        print(f"Transcribe Error: {e}")
+        logger.error("Transcribe Error: %s", e)
         return None, None
 
 if __name__ == "__main__":
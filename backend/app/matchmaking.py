@@ -0,0 +1,245 @@
+#Matchmaking: per-language customer queues + agent pool. O(1) enqueue / claim / cancel.
+import itertools
+import os
+import time
+from collections import OrderedDict
+
+# Queue for customers on auto-detect: any agent can take them
+ANY_LANGUAGE = "*"
+
+
+def queue_language(lang: str) -> str:
+    return ANY_LANGUAGE if not lang or lang == "auto" else lang
+
+
+class FenwickTree:
+    """Prefix sums over queue slots -> 'how many are still ahead of me' in O(log n)."""
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int):
+        index += 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        """Sum of slots [0, index)."""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    @classmethod
+    def build(cls, size: int, occupied: int):
+        """Tree of `size` slots whose first `occupied` slots hold 1 (O(n))."""
+        tree = cls(size)
+        for i in range(1, size + 1):
+            if i <= occupied:
+                tree.tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= size:
+                tree.tree[parent] += tree.tree[i]
+        return tree
+
+
+class LanguageQueue:
+    """
+    FIFO of waiting customers for one language.
+    OrderedDict gives O(1) push / pop-head / cancel; the Fenwick tree over
+    arrival slots gives the live position of any customer in O(log n).
+    """
+    def __init__(self, size: int = 64):
+        self.entries = OrderedDict()  # customer_id -> (slot, seq, enqueued_at)
+        self.tree = FenwickTree(size)
+        self.next_slot = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, customer_id, seq, enqueued_at):
+        if self.next_slot == self.tree.size:
+            self._reindex()
+        slot = self.next_slot
+        self.next_slot += 1
+        self.tree.add(slot, 1)
+        self.entries[customer_id] = (slot, seq, enqueued_at)
+
+    def remove(self, customer_id):
+        slot, seq, enqueued_at = self.entries.pop(customer_id)
+        self.tree.add(slot, -1)
+        if not self.entries:
+            self.next_slot = 0  # tree is all zeros again
+        return seq, enqueued_at
+
+    def head(self):
+        """(customer_id, seq) of the longest-waiting customer, or None."""
+        for customer_id, (_, seq, _) in self.entries.items():
+            return customer_id, seq
+        return None
+
+    def position(self, customer_id) -> int:
+        """Customers ahead of this one (0 = next)."""
+        return self.tree.prefix(self.entries[customer_id][0])
+
+    def _reindex(self):
+        # Slots run out: compact live entries to the front (and grow if still
+        # more than half full). Amortized O(1) per push.
+        live = len(self.entries)
+        size = self.tree.size * 2 if live > self.tree.size // 2 else self.tree.size
+        self.tree = FenwickTree.build(size, live)
+        for slot, (customer_id, (_, seq, enqueued_at)) in enumerate(list(self.entries.items())):
+            self.entries[customer_id] = (slot, seq, enqueued_at)
+        self.next_slot = live
+
+
+class WaitEstimator:
+    """
+    ETA = (position + 1) x EWMA of the interval between matches in a language.
+    Only intervals during a backlog count: time spent with an empty queue
+    says nothing about how fast agents free up.
+    State per language is a plain dict so shared backends can store it too.
+    """
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+
+    def advance(self, state: dict, now: float, backlog: bool) -> dict:
+        last, interval = state.get("last"), state.get("interval")
+        if last is not None and state.get("backlog"):
+            gap = now - last
+            interval = gap if interval is None else interval + self.alpha * (gap - interval)
+        return {"last": now, "interval": interval, "backlog": backlog}
+
+    @staticmethod
+    def estimate(state: dict, position: int):
+        interval = state.get("interval") if state else None
+        if interval is None:
+            return None
+        return round((position + 1) * interval, 1)
+
+
+class MatchmakingEngine:
+    """
+    In-process matchmaking:
+    - Customers wait in per-language queues, plus one global arrival order.
+    - Agents declare the languages they speak; each language has an idle pool
+      (longest idle first), plus one global idle order.
+    - A customer gets an idle agent who speaks their language; a freed agent
+      takes the longest-waiting customer among the languages they speak.
+      Same language on both sides means no translation hop.
+    - Unless MATCH_STRICT_LANGUAGE=1, anyone falls back to any agent/customer
+      (translation covers the gap) rather than waiting.
+    """
+    def __init__(self, strict_language: bool = None, alpha: float = None, clock=time.monotonic):
+        self.strict = strict_language if strict_language is not None else os.getenv("MATCH_STRICT_LANGUAGE", "0") == "1"
+        self.clock = clock
+        self.queues = {}                # lang -> LanguageQueue
+        self.waiting = OrderedDict()    # customer_id -> lang (global arrival order)
+        self.agents = OrderedDict()     # agent_id -> languages (longest idle first)
+        self.agents_by_lang = {}        # lang -> OrderedDict(agent_id -> None)
+        self.estimator = WaitEstimator(alpha or float(os.getenv("MATCH_WAIT_EWMA_ALPHA", "0.2")))
+        self.wait_state = {}            # lang -> estimator state
+        self._seq = itertools.count()
+        self.matches = 0
+
+    # --- CUSTOMERS ---
+    def enqueue_customer(self, customer_id, lang) -> int:
+        """Returns the customer's position (0 = next)."""
+        lang = queue_language(lang)
+        if customer_id in self.waiting:
+            self.remove_customer(customer_id)
+        queue = self.queues.get(lang)
+        if queue is None:
+            queue = self.queues[lang] = LanguageQueue()
+        queue.push(customer_id, next(self._seq), self.clock())
+        self.waiting[customer_id] = lang
+        return len(queue) - 1
+
+    def remove_customer(self, customer_id) -> bool:
+        lang = self.waiting.pop(customer_id, None)
+        if lang is None:
+            return False
+        queue = self.queues[lang]
+        queue.remove(customer_id)
+        if not queue:
+            del self.queues[lang]
+        return True
+
+    def claim_customer(self, languages):
+        """Longest-waiting customer this agent can serve, or None."""
+        best = None
+        for lang in itertools.chain(languages, (ANY_LANGUAGE,)):
+            queue = self.queues.get(lang)
+            head = queue.head() if queue else None
+            if head and (best is None or head[1] < best[1]):
+                best = head
+        if best is not None:
+            customer_id = best[0]
+        elif self.waiting and not self.strict:
+            customer_id = next(iter(self.waiting))
+        else:
+            return None
+        lang = self.waiting[customer_id]
+        self.remove_customer(customer_id)
+        self._record_match(lang)
+        return customer_id
+
+    def position(self, customer_id):
+        """(position, eta_seconds) or None if not waiting. ETA is None until measured."""
+        lang = self.waiting.get(customer_id)
+        if lang is None:
+            return None
+        position = self.queues[lang].position(customer_id)
+        return position, self.estimator.estimate(self.wait_state.get(lang), position)
+
+    # --- AGENTS ---
+    def add_agent(self, agent_id, languages):
+        languages = tuple(languages)
+        self.remove_agent(agent_id)
+        self.agents[agent_id] = languages
+        for lang in languages:
+            pool = self.agents_by_lang.get(lang)
+            if pool is None:
+                pool = self.agents_by_lang[lang] = OrderedDict()
+            pool[agent_id] = None
+
+    def remove_agent(self, agent_id) -> bool:
+        languages = self.agents.pop(agent_id, None)
+        if languages is None:
+            return False
+        for lang in languages:
+            pool = self.agents_by_lang[lang]
+            del pool[agent_id]
+            if not pool:
+                del self.agents_by_lang[lang]
+        return True
+
+    def claim_agent(self, lang):
+        """Longest-idle agent for this customer's language, or None."""
+        lang = queue_language(lang)
+        pool = self.agents_by_lang.get(lang)
+        if pool:
+            agent_id = next(iter(pool))
+        elif self.agents and (lang == ANY_LANGUAGE or not self.strict):
+            agent_id = next(iter(self.agents))
+        else:
+            return None
+        self.remove_agent(agent_id)
+        self._record_match(lang)
+        return agent_id
+
+    # --- STATS ---
+    def _record_match(self, lang):
+        backlog = lang in self.queues
+        self.wait_state[lang] = self.estimator.advance(self.wait_state.get(lang, {}), self.clock(), backlog)
+        self.matches += 1
+
+    def stats(self) -> dict:
+        return {
+            "waiting": len(self.waiting),
+            "waiting_by_lang": {lang: len(queue) for lang, queue in self.queues.items()},
+            "idle_agents": len(self.agents),
+            "matches": self.matches,
+        }
@@ -0,0 +1,219 @@
+#Latency instrumentation: timing spans -> histograms (Prometheus text) + optional per-session traces.
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds. Covers a ~1 ms VAD step up to a multi-second commit + TTS.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Spans are tagged with session, language and adapter.
+    - Histograms aggregate per (stage, lang, adapter). The session is kept out
+      of the Prometheus labels on purpose: one series per connection would
+      grow without bound. For the same reason, lang values outside the set
+      given to restrict_langs() are recorded as "other".
+    - The session tag goes to the per-session trace (ring buffer), enabled
+      with METRICS_TRACE=1. Traces are served by /metrics/trace/{session} and,
+      if METRICS_TRACE_DIR is set, dumped as JSON lines when the session ends
+      (in the default executor when called from the event loop).
+    - Gauges are sampled at render time; one failing callback is logged and
+      skipped instead of breaking the whole scrape.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, trace: bool = None, trace_size: int = None,
+                 trace_dir: str = None, clock=time.perf_counter):
+        self.buckets = tuple(buckets)
+        self.trace_enabled = trace if trace is not None else os.getenv("METRICS_TRACE", "0") == "1"
+        self.trace_size = trace_size or int(os.getenv("METRICS_TRACE_SIZE", "2000"))
+        self.trace_dir = trace_dir if trace_dir is not None else os.getenv("METRICS_TRACE_DIR", "")
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._histograms = {}  # (stage, lang, adapter) -> Histogram
+        self._counters = {}    # (event, lang) -> int
+        self._gauges = {}      # name -> (help, callable), sampled at render time
+        self._traces = {}      # session -> deque of events
+        self.langs = None      # allowed lang label values (None: any)
+
+    def restrict_langs(self, langs):
+        """Lang label values outside `langs` are recorded as "other"."""
+        self.langs = frozenset(langs)
+
+    def _lang(self, lang) -> str:
+        if not lang:
+            return ""
+        if self.langs is not None and lang not in self.langs:
+            return "other"
+        return lang
+
+    # --- RECORDING ---
+    def observe(self, stage: str, seconds: float, session=None, lang=None, adapter=None):
+        key = (stage, self._lang(lang), adapter or "")
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self.buckets)
+            hist.observe(seconds)
+            if self.trace_enabled and session is not None:
+                events = self._traces.get(session)
+                if events is None:
+                    events = self._traces[session] = deque(maxlen=self.trace_size)
+                events.append({
+                    "ts": time.time(),
+                    "stage": stage,
+                    "ms": round(seconds * 1000, 3),
+                    "lang": lang,
+                    "adapter": adapter,
+                })
+
+    @contextmanager
+    def span(self, stage: str, session=None, lang=None, adapter=None):
+        """Times the enclosed block (sync or async code) as one observation of `stage`."""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(stage, self.clock() - start, session=session, lang=lang, adapter=adapter)
+
+    def inc(self, event: str, lang=None, value: int = 1):
+        key = (event, self._lang(lang))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, fn, help_text: str = ""):
+        """Registers `voice_<name>`, read from fn() whenever /metrics is scraped."""
+        with self._lock:
+            self._gauges[name] = (help_text or name, fn)
+
+    # --- TRACES ---
+    def trace(self, session) -> list:
+        with self._lock:
+            return list(self._traces.get(session, ()))
+
+    def dump_trace(self, session, path: str = None, events: list = None):
+        """Writes the session's trace as JSON lines. Returns the path, or None if empty."""
+        events = self.trace(session) if events is None else events
+        if not events:
+            return None
+        if path is None:
+            os.makedirs(self.trace_dir or ".", exist_ok=True)
+            path = os.path.join(self.trace_dir or ".", f"trace_{session}_{int(time.time())}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+        return path
+
+    def end_session(self, session):
+        """
+        Called on disconnect: free the session's trace and dump it (if configured).
+        Inside an event loop the file write runs in the default executor; the
+        returned future can be awaited, or ignored.
+        """
+        with self._lock:
+            events = list(self._traces.pop(session, ()))
+        if not (self.trace_enabled and self.trace_dir and events):
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_trace(session, events)
+            return None
+        return loop.run_in_executor(None, self._write_trace, session, events)
+
+    def _write_trace(self, session, events):
+        try:
+            path = self.dump_trace(session, events=events)
+            logger.info("Trace written: %s", path, extra={"session": session})
+        except OSError as e:
+            logger.error("Trace Dump Error: %s", e, extra={"session": session})
+
+    # --- EXPORT ---
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = sorted(
+                (key, list(hist.cumulative()), hist.sum, hist.count) for key, hist in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+        lines = [
+            "# HELP voice_stage_seconds Latency of voice pipeline stages.",
+            "# TYPE voice_stage_seconds histogram",
+        ]
+        for (stage, lang, adapter), cumulative, total, count in histograms:
+            base = [("stage", stage), ("lang", lang), ("adapter", adapter)]
+            for bound, running in cumulative:
+                lines.append(f"voice_stage_seconds_bucket{{{_format_labels(base + [('le', repr(bound))])}}} {running}")
+            lines.append(f"voice_stage_seconds_bucket{{{_format_labels(base + [('le', '+Inf')])}}} {count}")
+            lines.append(f"voice_stage_seconds_sum{{{_format_labels(base)}}} {total}")
+            lines.append(f"voice_stage_seconds_count{{{_format_labels(base)}}} {count}")
+
+        lines.append("# HELP voice_events_total Voice pipeline events.")
+        lines.append("# TYPE voice_events_total counter")
+        for (event, lang), value in counters:
+            lines.append(f"voice_events_total{{{_format_labels([('event', event), ('lang', lang)])}}} {value}")
+
+        for name, (help_text, fn) in gauges:
+            try:
+                value = fn()
+            except Exception as e:
+                logger.warning("Gauge voice_%s failed: %s", name, e)
+                continue
+            lines.append(f"# HELP voice_{name} {help_text}")
+            lines.append(f"# TYPE voice_{name} gauge")
+            lines.append(f"voice_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Count / mean (ms) per stage, for quick inspection on /stats."""
+        with self._lock:
+            return {
+                "|".join(part for part in key if part): {
+                    "count": hist.count,
+                    "mean_ms": round(hist.sum / hist.count * 1000, 2) if hist.count else 0.0,
+                }
+                for key, hist in self._histograms.items()
+            }
+
+
+# Global Instance
+metrics = MetricsRegistry()
@@ -0,0 +1,159 @@
+#Per-session outbound pipeline: translate -> text delivery -> TTS -> audio delivery.
+import asyncio
+import logging
+import os
+import time
+
+from app.connection_manager import manager
+from app.metrics import metrics
+from app.services.translator import translator_service
+from app.services.tts import tts_service
+from app.services.audio_protocol import pack_audio_frame, next_message_id, CODEC_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundMessage:
+    __slots__ = ("text", "src_lang", "target_lang", "translated", "message_id", "text_sent", "timing")
+
+    def __init__(self, text, src_lang, target_lang, timing=None):
+        self.text = text
+        self.src_lang = src_lang
+        self.target_lang = target_lang
+        self.translated = None
+        self.message_id = None
+        self.text_sent = asyncio.Event()
+        # Voice turns only: wall-clock stage timestamps (speech_end, commit, asr_done, ...)
+        self.timing = timing
+
+    def mark(self, stage: str):
+        if self.timing is not None and stage not in self.timing:
+            self.timing[stage] = time.time()
+
+    def timing_report(self) -> dict:
+        """Milliseconds since end of speech for each stage of this voice turn."""
+        base = self.timing["speech_end"]
+        stages = ("commit", "asr_done", "mt_done", "text_delivered", "tts_first_audio", "tts_done", "audio_delivered")
+        return {
+            "type": "timing",
+            "audio_id": self.message_id,
+            "since_speech_end_ms": {
+                stage: round((self.timing[stage] - base) * 1000) for stage in stages if stage in self.timing
+            },
+        }
+
+
+class OutboundPipeline:
+    """
+    One per WebSocket session. Four stages, each a single task, connected by
+    bounded queues:
+
+        submit() -> [translate] -> [text delivery]
+                               \\-> [TTS] -> [audio delivery]
+
+    - The receive loop only does put_nowait(): it never waits on translation or TTS.
+    - Text goes out as soon as its translation is ready (no waiting behind TTS).
+    - Every stage is FIFO with a single consumer, so message order is preserved;
+      audio for a message is held until that message's text has been delivered.
+    """
+    def __init__(self, user_id: str, writer, maxsize: int = None):
+        self.user_id = user_id
+        self.writer = writer  # the session's OutboundWriter (sends never block this pipeline)
+        maxsize = maxsize or int(os.getenv("OUTBOUND_QUEUE_SIZE", "32"))
+        self.translate_queue = asyncio.Queue(maxsize)
+        self.text_queue = asyncio.Queue(maxsize)
+        self.tts_queue = asyncio.Queue(maxsize)
+        self.audio_queue = asyncio.Queue(maxsize * 4)
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._translate_stage()),
+            asyncio.create_task(self._text_stage()),
+            asyncio.create_task(self._tts_stage()),
+            asyncio.create_task(self._audio_stage()),
+        ]
+        return self
+
+    def submit(self, text: str, src_lang: str, target_lang: str, timing: dict = None) -> bool:
+        """Non-blocking. Returns False if the session already has too much queued."""
+        try:
+            self.translate_queue.put_nowait(OutboundMessage(text, src_lang, target_lang, timing))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- STAGES ---
+    async def _translate_stage(self):
+        while True:
+            msg = await self.translate_queue.get()
+            try:
+                with metrics.span("translate", session=self.user_id, lang=msg.target_lang):
+                    msg.translated = await translator_service.translate_async(msg.text, msg.src_lang, msg.target_lang)
+            except Exception as e:
+                logger.error("Pipeline Translate Error: %s", e, extra={"session": self.user_id})
+                msg.translated = msg.text
+            msg.message_id = next_message_id()
+            msg.mark("mt_done")
+            await self.text_queue.put(msg)
+            await self.tts_queue.put(msg)
+
+    async def _text_stage(self):
+        while True:
+            msg = await self.text_queue.get()
+            # audio_id links the binary audio frames to this message
+            payload = {
+                "sender": self.user_id,
+                "original": msg.text,
+                "translated": msg.translated,
+                "src_lang": msg.src_lang,
+                "target_lang": msg.target_lang,
+                "audio_id": msg.message_id
+            }
+            self.writer.send_json(payload)  # False if sender is gone; partner may still be listening
+            with metrics.span("send_text", session=self.user_id, lang=msg.target_lang):
+                await manager.send_to_partner(self.user_id, payload)
+            msg.mark("text_delivered")
+            msg.text_sent.set()
+
+    async def _tts_stage(self):
+        codec = CODEC_NAMES[tts_service.backend.codec]
+        while True:
+            msg = await self.tts_queue.get()
+            seq = 0
+            tts_start = time.perf_counter()
+            try:
+                # One piece per sentence, synthesized with lookahead
+                async for chunk in tts_service.stream_audio(msg.translated, msg.target_lang):
+                    if seq == 0:
+                        metrics.observe("tts_first_audio", time.perf_counter() - tts_start, session=self.user_id, lang=msg.target_lang)
+                    msg.mark("tts_first_audio")
+                    await self.audio_queue.put((msg, pack_audio_frame(msg.message_id, seq, codec, chunk), False))
+                    seq += 1
+            except Exception as e:
+                logger.error("Pipeline TTS Error: %s", e, extra={"session": self.user_id})
+            metrics.observe("tts", time.perf_counter() - tts_start, session=self.user_id, lang=msg.target_lang)
+            msg.mark("tts_done")
+            # Always close the clip so the client can finalize playback
+            await self.audio_queue.put((msg, pack_audio_frame(msg.message_id, seq, codec, b"", last=True), True))
+
+    async def _audio_stage(self):
+        while True:
+            msg, frame, last = await self.audio_queue.get()
+            await msg.text_sent.wait()
+            with metrics.span("send_audio", session=self.user_id, lang=msg.target_lang):
+                await manager.send_bytes_to_partner(self.user_id, frame)
+            if last and msg.timing is not None:
+                msg.mark("audio_delivered")
+                metrics.observe("voice_turn", msg.timing["audio_delivered"] - msg.timing["speech_end"],
+                                session=self.user_id, lang=msg.target_lang)
+                report = msg.timing_report()
+                logger.debug("Voice turn %s: %s", self.user_id, report["since_speech_end_ms"],
+                             extra={"session": self.user_id, "stage": "voice_turn"})
+                self.writer.send_json(report)
@@ -0,0 +1,170 @@
+#Per-connection WebSocket writer: bounded priority queue, preview coalescing, send timeout, slow-consumer eviction.
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower goes first)
+PRIORITY_CONTROL = 0   # commit, chat text, system / status notices
+PRIORITY_AUDIO = 1     # streamed TTS frames
+PRIORITY_PREVIEW = 2   # live transcript previews: only the latest one matters
+
+# Close code for evicted clients ("try again later")
+CLOSE_SLOW_CONSUMER = 1013
+
+
+class OutboundWriter:
+    """
+    The only task that writes to its WebSocket. Everyone else calls
+    send_json() / send_bytes(), which never block: they serialize, enqueue
+    and return False only if the connection is already gone.
+
+    - Control messages go before audio frames, audio before previews; FIFO
+      within a class, so text N still precedes audio N.
+    - Previews occupy a single slot: a newer one replaces the pending one, and
+      a message sent with drop_preview=True (the commit) discards it.
+    - Control + audio are bounded by count and bytes. A client that lets them
+      fill up, or doesn't complete one send within `send_timeout`, is evicted:
+      the queue is freed, the socket closed with 1013 and `on_evict(writer)`
+      awaited so the partner and queues are cleaned up.
+    So a stalled client costs at most max_items / max_bytes plus one preview.
+    """
+    def __init__(self, user_id: str, websocket, on_evict=None, max_items: int = None,
+                 max_bytes: int = None, send_timeout: float = None):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.on_evict = on_evict
+        self.max_items = max_items or int(os.getenv("WS_QUEUE_ITEMS", "512"))
+        self.max_bytes = max_bytes or int(os.getenv("WS_QUEUE_BYTES", str(4 * 1024 * 1024)))
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT", "10"))
+        self._queues = (deque(), deque())  # PRIORITY_CONTROL, PRIORITY_AUDIO: (kind, data, size, queued_at)
+        self._preview = None
+        self._items = 0
+        self._bytes = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._evict_task = None
+        self.closed = False
+
+        # Stats
+        self.sent = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.evicted = None  # reason, once evicted
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    # --- ENQUEUE (non-blocking) ---
+    def send_json(self, payload, priority: int = PRIORITY_CONTROL, drop_preview: bool = False) -> bool:
+        # Same encoding as Starlette's send_json, done once here
+        text = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+        # Bytes on the wire, not characters: Kannada / Hindi text is ~3 bytes per character
+        return self._enqueue("text", text, len(text.encode("utf-8")), priority, drop_preview)
+
+    def send_bytes(self, data: bytes, priority: int = PRIORITY_AUDIO) -> bool:
+        return self._enqueue("bytes", data, len(data), priority, False)
+
+    def _enqueue(self, kind, data, size, priority, drop_preview) -> bool:
+        if self.closed:
+            return False
+        item = (kind, data, size, time.perf_counter())
+        if priority == PRIORITY_PREVIEW:
+            if self._preview is not None:
+                self.coalesced += 1
+                metrics.inc("ws_preview_coalesced")
+            self._preview = item
+        else:
+            if self._items >= self.max_items or self._bytes + size > self.max_bytes:
+                self._evict("queue full")
+                return False
+            self._queues[priority].append(item)
+            self._items += 1
+            self._bytes += size
+            self.max_depth = max(self.max_depth, self._items)
+            if drop_preview:
+                self._preview = None
+        self._wakeup.set()
+        return True
+
+    def _next(self):
+        for queue in self._queues:
+            if queue:
+                item = queue.popleft()
+                self._items -= 1
+                self._bytes -= item[2]
+                return item
+        item, self._preview = self._preview, None
+        return item
+
+    # --- WRITER TASK ---
+    async def _run(self):
+        # Checked each turn as well as cancelled: wait_for() can swallow a
+        # cancel that races with a completing send
+        while not self.closed:
+            item = self._next()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            kind, data, _, queued_at = item
+            metrics.observe("ws_queue_wait", time.perf_counter() - queued_at, session=self.user_id)
+            send = self.websocket.send_text(data) if kind == "text" else self.websocket.send_bytes(data)
+            try:
+                await asyncio.wait_for(send, self.send_timeout)
+            except asyncio.TimeoutError:
+                self._evict("send timeout")
+                return
+            except Exception:
+                # Socket already closed: the receive loop handles the disconnect
+                self._discard()
+                return
+            self.sent += 1
+
+    # --- SHUTDOWN ---
+    def _discard(self):
+        self.closed = True
+        for queue in self._queues:
+            queue.clear()
+        self._preview = None
+        self._items = self._bytes = 0
+        self._wakeup.set()
+
+    def _evict(self, reason: str):
+        if self.closed:
+            return
+        self._discard()
+        self.evicted = reason
+        metrics.inc("ws_evicted")
+        logger.warning("Evicting slow client %s (%s)", self.user_id, reason, extra={"session": self.user_id})
+        self._evict_task = asyncio.create_task(self._close_evicted())
+
+    async def _close_evicted(self):
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=CLOSE_SLOW_CONSUMER), self.send_timeout)
+        except Exception:
+            pass
+        if self.on_evict is not None:
+            await self.on_evict(self)
+
+    async def close(self):
+        """Normal disconnect: stop writing, drop whatever is queued."""
+        self._discard()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def depth(self) -> int:
+        return self._items + (self._preview is not None)
+
+    def queued_bytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,72 @@
+#Growable float32 accumulator for the live utterance (replaces b"".join per frame).
+import numpy as np
+
+
+class AudioAccumulator:
+    """
+    Preallocated, growable float32 buffer for one utterance.
+
+    - append_bytes() writes each frame in place and applies gain ONLY to the new samples.
+    - view() / tail() return zero-copy views (VAD tail, 15s preview window).
+    - detach() hands the whole utterance to the commit task without copying,
+      and starts a fresh buffer so old views are never overwritten.
+
+    Growth doubles the capacity, so appends are amortized O(frame), not O(utterance).
+    """
+    def __init__(self, gain: float = 1.0, sample_rate: int = 16000, initial_seconds: float = 30.0):
+        self.gain = gain
+        self.sample_rate = sample_rate
+        self._initial_capacity = int(sample_rate * initial_seconds)
+        self._buf = np.empty(self._initial_capacity, dtype=np.float32)
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def duration(self) -> float:
+        return self._len / self.sample_rate
+
+    def _reserve(self, extra: int):
+        needed = self._len + extra
+        if needed <= len(self._buf):
+            return
+        # Reallocate (amortized O(1)). Views handed out earlier keep the old array alive.
+        new_buf = np.empty(max(needed, len(self._buf) * 2), dtype=np.float32)
+        new_buf[:self._len] = self._buf[:self._len]
+        self._buf = new_buf
+
+    def append(self, samples: np.ndarray) -> np.ndarray:
+        """Appends float32 samples (gain applied in place). Returns a view of the new samples."""
+        n = len(samples)
+        self._reserve(n)
+        dst = self._buf[self._len:self._len + n]
+        if self.gain != 1.0:
+            np.multiply(samples, self.gain, out=dst, casting="unsafe")
+        else:
+            dst[:] = samples
+        self._len += n
+        return dst
+
+    def append_bytes(self, chunk: bytes) -> np.ndarray:
+        """Appends a raw Float32 PCM frame. Returns a view of the new (gained) samples."""
+        return self.append(np.frombuffer(chunk, dtype=np.float32))
+
+    def view(self) -> np.ndarray:
+        """Zero-copy view of the whole utterance so far."""
+        return self._buf[:self._len]
+
+    def tail(self, n_samples: int) -> np.ndarray:
+        """Zero-copy view of the last n samples (or everything if shorter)."""
+        start = max(0, self._len - n_samples)
+        return self._buf[start:self._len]
+
+    def detach(self) -> np.ndarray:
+        """
+        Returns the utterance (zero-copy) and resets to a fresh, empty buffer.
+        The returned array is owned by the caller from now on.
+        """
+        audio = self._buf[:self._len]
+        self._buf = np.empty(self._initial_capacity, dtype=np.float32)
+        self._len = 0
+        return audio
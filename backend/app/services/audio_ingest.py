@@ -0,0 +1,142 @@
+#Per-connection mic ingest: decodes framed int16 / float32 / Opus audio to 16 kHz float32 and tracks sequence gaps.
+import av
+import numpy as np
+
+from app.services.audio_protocol import (
+    unpack_ingest_frame, CODEC_PCM_F32, CODEC_PCM_S16, CODEC_OPUS,
+)
+
+TARGET_RATE = 16000
+_SEQ_MOD = 1 << 32
+
+
+class IngestDecoder:
+    """
+    One per WebSocket. decode(frame) returns float32 samples at 16 kHz
+    (the accumulator copies them in) or None if the frame is dropped.
+
+    - Framed audio (audio_protocol ingest header): s16 / f32 PCM at any rate,
+      or raw Opus packets (decoded with av, 48 kHz internally).
+    - Headerless frames are the legacy bare float32 stream (length % 4 == 0).
+    - Sequence numbers: a jump ahead counts the skipped frames as lost (the
+      audio just continues; ASR copes better with a gap than with stale
+      audio), a frame older than the last one accepted is a late/duplicate
+      frame and is dropped.
+    """
+    def __init__(self, target_rate: int = TARGET_RATE):
+        self.target_rate = target_rate
+        self._expected_seq = None
+        self._opus = None
+        self._resampler = None
+        self._resampler_key = None
+
+        # Stats
+        self.frames = 0
+        self.bytes_in = 0
+        self.samples_out = 0
+        self.lost = 0
+        self.reordered = 0
+        self.invalid = 0
+        self.legacy_frames = 0
+        self.last_codec = None
+
+    def decode(self, frame: bytes):
+        self.bytes_in += len(frame)
+        parsed = unpack_ingest_frame(frame)
+        if parsed is None:
+            if len(frame) % 4 != 0:
+                self.invalid += 1
+                return None
+            self.legacy_frames += 1
+            samples = np.frombuffer(frame, dtype="<f4")
+        else:
+            seq, codec, rate, payload = parsed
+            if not self._accept_seq(seq):
+                return None
+            try:
+                samples = self._decode_payload(codec, rate, payload)
+            except (ValueError, av.error.FFmpegError):
+                self.invalid += 1
+                return None
+            self.last_codec = codec
+        self.frames += 1
+        self.samples_out += len(samples)
+        return samples
+
+    def reset_stream(self):
+        """New recording: sequence numbers and codec state start over."""
+        self._expected_seq = None
+        self._opus = None
+        self._resampler = None
+        self._resampler_key = None
+
+    # --- SEQUENCING ---
+    def _accept_seq(self, seq: int) -> bool:
+        if self._expected_seq is not None:
+            ahead = (seq - self._expected_seq) % _SEQ_MOD
+            if ahead >= _SEQ_MOD // 2:
+                self.reordered += 1
+                return False
+            self.lost += ahead
+        self._expected_seq = (seq + 1) % _SEQ_MOD
+        return True
+
+    # --- DECODING ---
+    def _decode_payload(self, codec: int, rate: int, payload: bytes) -> np.ndarray:
+        if codec == CODEC_PCM_S16:
+            if len(payload) % 2:
+                raise ValueError("odd-length int16 payload")
+            samples = np.frombuffer(payload, dtype="<i2").astype(np.float32)
+            samples *= 1.0 / 32768.0
+        elif codec == CODEC_PCM_F32:
+            if len(payload) % 4:
+                raise ValueError("float32 payload not a multiple of 4")
+            samples = np.frombuffer(payload, dtype="<f4")
+        elif codec == CODEC_OPUS:
+            return self._decode_opus(payload)
+        else:
+            raise ValueError(f"unsupported codec {codec}")
+        if rate != self.target_rate:
+            samples = self._resample(samples, rate)
+        return samples
+
+    def _decode_opus(self, payload: bytes) -> np.ndarray:
+        if self._opus is None:
+            self._opus = av.CodecContext.create("opus", "r")
+            self._opus.sample_rate = 48000
+            self._opus.layout = "mono"
+        chunks = []
+        for frame in self._opus.decode(av.Packet(payload)):
+            chunks.extend(self._resampler_for(frame.sample_rate).resample(frame))
+        return self._to_array(chunks)
+
+    def _resample(self, samples: np.ndarray, rate: int) -> np.ndarray:
+        frame = av.AudioFrame.from_ndarray(np.ascontiguousarray(samples, dtype=np.float32).reshape(1, -1),
+                                           format="flt", layout="mono")
+        frame.sample_rate = rate
+        return self._to_array(self._resampler_for(rate).resample(frame))
+
+    def _resampler_for(self, rate: int):
+        # Keeps filter state across frames; rebuilt only if the input rate changes
+        if self._resampler_key != rate:
+            self._resampler = av.AudioResampler(format="flt", layout="mono", rate=self.target_rate)
+            self._resampler_key = rate
+        return self._resampler
+
+    @staticmethod
+    def _to_array(frames) -> np.ndarray:
+        arrays = [f.to_ndarray().reshape(-1) for f in frames]
+        if not arrays:
+            return np.empty(0, dtype=np.float32)
+        return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "bytes_in": self.bytes_in,
+            "samples_out": self.samples_out,
+            "lost": self.lost,
+            "reordered": self.reordered,
+            "invalid": self.invalid,
+            "legacy_frames": self.legacy_frames,
+        }
@@ -1,13 +1,43 @@
 #Handles Voice Activity Detection (VAD) and buffers raw bytes into valid 30ms frames.
 import torch
-import torch
 import numpy as np
 import io
+import logging
+import os
+import threading
+from collections import deque
 import av
 
-class AudioProcessor:
+logger = logging.getLogger(__name__)
+
+# Silero v5 prepends the last 64 samples of the previous window (16 kHz)
+VAD_CONTEXT_SIZE = 64
+
+
+class VADState:
+    """
+    Per-connection recurrent state for the shared Silero model.
+    Tiny (a few KB) compared to a full model copy.
+    """
+    __slots__ = ("rnn", "context")
+
     def __init__(self):
-        # Load Silero VAD Model
+        self.rnn = None      # None = fresh session (zeros)
+        self.context = None
+
+    def reset(self):
+        self.rnn = None
+        self.context = None
+
+
+class VADEngine:
+    """
+    Process-wide Silero VAD model.
+    Loaded ONCE at startup and shared by every WebSocket session.
+    Each session keeps its own VADState; the engine swaps it in around every call.
+    """
+    def __init__(self):
+        logger.info("Loading Silero VAD Model (shared)...")
         self.model, utils = torch.hub.load(
             repo_or_dir='snakers4/silero-vad',
             model='silero_vad',
@@ -15,18 +45,97 @@ class AudioProcessor:
             trust_repo=True
         )
         (self.get_speech_timestamps, _, self.read_audio, _, _) = utils
-        
+        self.sample_rate = 16000
+
+        # The JIT model keeps its recurrent state on the module itself,
+        # so calls from different sessions must not interleave.
+        self._lock = threading.Lock()
+
+        # Silero v5 exposes _state/_context. Older releases don't;
+        # for those we fall back to stateless scoring (reset before each call).
+        self.model.reset_states()
+        self.stateful = hasattr(self.model, "_state")
+        if self.stateful:
+            self._zero_rnn = torch.zeros_like(self.model._state)
+
+    def new_state(self) -> VADState:
+        return VADState()
+
+    def _restore(self, states):
+        """Loads one or more session states into the model (batch dim = sessions)."""
+        rnn = [s.rnn if s.rnn is not None else self._zero_rnn for s in states]
+        ctx = [s.context if s.context is not None else torch.zeros(1, VAD_CONTEXT_SIZE) for s in states]
+        self.model._state = torch.cat(rnn, dim=1)
+        self.model._context = torch.cat(ctx, dim=0)
+        self.model._last_sr = self.sample_rate
+        self.model._last_batch_size = len(states)
+
+    def _capture(self, states):
+        """Copies the updated model state back into each session."""
+        for i, s in enumerate(states):
+            s.rnn = self.model._state[:, i:i + 1].clone()
+            s.context = self.model._context[i:i + 1].clone()
+
+    def score(self, state: VADState, window: np.ndarray) -> float:
+        """Speech probability of one 512-sample window, advancing the session state."""
+        return self.score_batch([state], [window])[0]
+
+    def score_batch(self, states, windows) -> list:
+        """
+        Scores one window per session in a single forward pass.
+        states[i] is advanced by windows[i]. A session must appear at most once per batch.
+        """
+        if not self.stateful:
+            probs = []
+            with self._lock, torch.inference_mode():
+                for window in windows:
+                    self.model.reset_states()
+                    tensor = torch.from_numpy(np.ascontiguousarray(window, dtype=np.float32))
+                    probs.append(self.model(tensor, self.sample_rate).item())
+            return probs
+
+        batch = torch.from_numpy(np.stack(windows).astype(np.float32, copy=False))
+        with self._lock, torch.inference_mode():
+            self._restore(states)
+            out = self.model(batch, self.sample_rate)
+            self._capture(states)
+        return out.reshape(-1).tolist()
+
+
+# Global instance (Loaded once at startup; MODEL_PRELOAD=0 skips it, e.g. in tests)
+vad_engine = VADEngine() if os.getenv("MODEL_PRELOAD", "1") == "1" else None
+
+
+class AudioProcessor:
+    """
+    Lightweight per-connection VAD context.
+    Holds buffers + recurrent state only; the model lives in the shared VADEngine.
+    """
+    def __init__(self, engine: VADEngine = None, scheduler=None, session: str = None):
+        self.engine = engine or vad_engine
+        # Optional VADScheduler: batches this session's windows with everyone else's
+        self.scheduler = scheduler
+        self.session = session
+        self.vad_state = self.engine.new_state()
+
         self.sample_rate = 16000
         self.audio_buffer = bytearray()
         self.speech_buffer = bytearray()
         self.is_speaking = False
-        self.is_speaking = False
         self.threshold = 0.1 # Tuning: Aggressive Low Threshold
         
         # New: Silence Tolerance
         self.silence_counter = 0
         self.silence_tolerance = 10 # 10 chunks * 30ms = 300ms of silence allowed
 
+        # --- STREAMING VAD STATE ---
+        # Each 512-sample window is scored once, in time order, and cached here.
+        self.window_size = 512
+        self._pending = np.zeros(0, dtype=np.float32)  # < 1 window of leftover samples
+        self.prob_history = deque(maxlen=4096)          # ~2 min of per-window probabilities
+        self.windows_seen = 0
+        self._last_speech_window = None
+
     def process_stream(self, chunk_bytes: bytes):
         """
         Analyzes audio chunk.
@@ -47,17 +156,16 @@ class AudioProcessor:
             audio_float32 = audio_int16.astype(np.float32) / 32768.0
             
             # DEBUG: Check if audio is silent
-            print(f"DEBUG: Max Signal: {np.max(np.abs(audio_float32)):.4f}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Max Signal: %.4f", float(np.max(np.abs(audio_float32))))
             
             # Additional safety check for exact shape
             if len(audio_float32) != 512:
                 continue
 
-            tensor = torch.from_numpy(audio_float32)
-
             # Check if this chunk contains speech
-            speech_prob = self.model(tensor, self.sample_rate).item()
-            print(f"DEBUG: VAD Score: {speech_prob:.4f}") # Trace sensitivity
+            speech_prob = self.engine.score(self.vad_state, audio_float32)
+            logger.debug("VAD Score: %.4f", speech_prob) # Trace sensitivity
             
             if speech_prob > self.threshold:
                 # SPEECH DETECTED
@@ -88,7 +196,7 @@ class AudioProcessor:
         FORCE returns whatever is in the buffer (Called when user clicks Stop)
         """
         if len(self.speech_buffer) > 0:
-            print(f"⚠️ Flushing {len(self.speech_buffer)} bytes of audio...")
+            logger.debug("Flushing %d bytes of audio...", len(self.speech_buffer), extra={"session": self.session})
             result = bytes(self.speech_buffer)
             self.speech_buffer = bytearray()
             self.is_speaking = False
@@ -97,43 +205,71 @@ class AudioProcessor:
 
     # decode_webm_to_pcm REMOVED - We now expect raw PCM input.
 
-    def has_speech(self, pcm_array: np.ndarray) -> bool:
+    # --- STREAMING VAD ---
+    def feed(self, samples: np.ndarray) -> int:
         """
-        Quick check if the audio array contains speech.
-        1. Volume Gate
-        2. VAD Model Check
+        Streaming VAD: scores every NEW complete 512-sample window exactly once,
+        in time order, with this session's recurrent state.
+        Returns the number of windows scored.
         """
-        if len(pcm_array) < 512: return False
-        
-        # 1. Volume Gate (Filter absolute silence)
-        max_vol = np.max(np.abs(pcm_array))
-        if max_vol < 0.01: # Silence threshold
-            return False
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
 
-        # 2. VAD Model Check (Sample center of array)
-        # We take a window from the middle/end to see if active
-        # FIX: Check last 1 second (approx 32 * 512 samples) to capture end of sentences
-        window_size = 512
-        chunk_count = 32 # ~1 second
-        
-        if len(pcm_array) < window_size:
+        n_windows = len(samples) // self.window_size
+        for i in range(n_windows):
+            window = samples[i * self.window_size:(i + 1) * self.window_size]
+            self._record(self.engine.score(self.vad_state, window))
+
+        self._pending = samples[n_windows * self.window_size:].copy()
+        return n_windows
+
+    async def feed_async(self, samples: np.ndarray) -> int:
+        """
+        Same as feed(), but the windows are scored by the shared VADScheduler
+        (batched with all other live sessions, off the event loop).
+        """
+        if self.scheduler is None:
+            return self.feed(samples)
+
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+
+        n_windows = len(samples) // self.window_size
+        self._pending = samples[n_windows * self.window_size:].copy()
+        if n_windows == 0:
+            return 0
+
+        windows = [samples[i * self.window_size:(i + 1) * self.window_size] for i in range(n_windows)]
+        for prob in await self.scheduler.submit(self.vad_state, windows):
+            self._record(prob)
+        return n_windows
+
+    def _record(self, prob: float):
+        self.prob_history.append(prob)
+        if prob > self.threshold:
+            self._last_speech_window = self.windows_seen
+        self.windows_seen += 1
+
+    def recent_speech(self, window_count: int = 4800 // 512) -> bool:
+        """
+        True if any of the last `window_count` windows (~0.3s for 9) was speech.
+        Answered from the cached history (O(1), no inference).
+        """
+        if self._last_speech_window is None:
             return False
+        # Last N windows = indices [windows_seen - N, windows_seen - 1]
+        return self._last_speech_window >= self.windows_seen - window_count
 
-        # Scan backwards up to 1 second
-        max_chunks = min(len(pcm_array) // window_size, chunk_count)
-        
-        for i in range(max_chunks):
-            # chunks from end: -512, -1024...
-            start = -window_size * (i + 1)
-            end = -window_size * i if i > 0 else None
-            
-            chunk = pcm_array[start:end]
-            if len(chunk) != window_size: continue
-            
-            tensor = torch.from_numpy(chunk)
-            speech_prob = self.model(tensor, self.sample_rate).item()
-            
-            if speech_prob > self.threshold:
-                return True
-                
-        return False
\ No newline at end of file
+    def trailing_silence(self) -> float:
+        """Seconds of audio since the last window classified as speech."""
+        last = -1 if self._last_speech_window is None else self._last_speech_window
+        silent_windows = self.windows_seen - last - 1
+        return silent_windows * self.window_size / self.sample_rate
+
+    def reset_stream(self):
+        """Drops streaming history + recurrent state (e.g. after Stop Recording)."""
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.prob_history.clear()
+        self.windows_seen = 0
+        self._last_speech_window = None
+        self.vad_state.reset()
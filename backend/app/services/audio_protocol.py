@@ -0,0 +1,64 @@
+#Binary WebSocket audio framing (server -> client TTS stream, client -> server mic ingest).
+import struct
+import itertools
+
+# Header: magic "BA" | version u8 | codec u8 | message id u32 | sequence u16 | flags u8  (11 bytes, big-endian)
+AUDIO_OUT_MAGIC = b"BA"
+PROTOCOL_VERSION = 1
+_OUT_HEADER = struct.Struct("!2sBBIHB")
+OUT_HEADER_SIZE = _OUT_HEADER.size
+
+# Header: magic "AU" | version u8 | codec u8 | sample rate u32 | sequence u32  (12 bytes, big-endian)
+AUDIO_IN_MAGIC = b"AU"
+_IN_HEADER = struct.Struct("!2sBBII")
+IN_HEADER_SIZE = _IN_HEADER.size
+
+# Codecs
+CODEC_MP3 = 1
+CODEC_PCM_F32 = 2   # little-endian float32 PCM
+CODEC_PCM_S16 = 3   # little-endian int16 PCM
+CODEC_OPUS = 4      # one raw Opus packet per frame (no Ogg container)
+CODEC_NAMES = {"mp3": CODEC_MP3, "f32": CODEC_PCM_F32, "s16": CODEC_PCM_S16, "opus": CODEC_OPUS}
+INGEST_CODECS = (CODEC_PCM_F32, CODEC_PCM_S16, CODEC_OPUS)
+
+# Flags
+FLAG_LAST = 0x01
+
+_message_ids = itertools.count(1)
+
+
+def next_message_id() -> int:
+    """Process-unique (wrapping) id linking a text message to its audio frames."""
+    return next(_message_ids) & 0xFFFFFFFF
+
+
+def pack_audio_frame(message_id: int, seq: int, codec: int, payload: bytes, last: bool = False) -> bytes:
+    header = _OUT_HEADER.pack(AUDIO_OUT_MAGIC, PROTOCOL_VERSION, codec, message_id, seq & 0xFFFF, FLAG_LAST if last else 0)
+    return header + payload
+
+
+def unpack_audio_frame(frame: bytes):
+    """Returns (message_id, seq, codec, flags, payload). Raises ValueError on bad frames."""
+    if len(frame) < OUT_HEADER_SIZE:
+        raise ValueError("Frame too short")
+    magic, version, codec, message_id, seq, flags = _OUT_HEADER.unpack_from(frame)
+    if magic != AUDIO_OUT_MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError("Not an audio frame")
+    return message_id, seq, codec, flags, frame[OUT_HEADER_SIZE:]
+
+
+def pack_ingest_frame(seq: int, codec: int, sample_rate: int, payload: bytes) -> bytes:
+    return _IN_HEADER.pack(AUDIO_IN_MAGIC, PROTOCOL_VERSION, codec, sample_rate, seq & 0xFFFFFFFF) + payload
+
+
+def unpack_ingest_frame(frame: bytes):
+    """
+    Returns (seq, codec, sample_rate, payload), or None for a headerless frame
+    (legacy clients that send bare float32 PCM).
+    """
+    if len(frame) < IN_HEADER_SIZE or frame[:2] != AUDIO_IN_MAGIC:
+        return None
+    _, version, codec, sample_rate, seq = _IN_HEADER.unpack_from(frame)
+    if version != PROTOCOL_VERSION or codec not in INGEST_CODECS or not sample_rate:
+        return None
+    return seq, codec, sample_rate, frame[IN_HEADER_SIZE:]
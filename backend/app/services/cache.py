@@ -0,0 +1,178 @@
+#Small caching toolkit: bounded LRU + TTL in memory, with an optional persistent tier.
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SQLiteTier:
+    """
+    Persistent key/value tier (survives restarts).
+    Values can be str (TEXT) or bytes (BLOB). Expiry is stored per row.
+    Expired rows are only skipped on read, so every `purge_every` writes (and
+    once on open) they are deleted, and the rows expiring soonest are dropped
+    past `max_rows` (None = no cap) to keep the file bounded.
+    """
+    def __init__(self, path: str, table: str = "cache", max_rows: int = None, purge_every: int = 256,
+                 clock=time.time):
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        self.purge_every = purge_every
+        self.clock = clock
+        self._writes = 0
+        self.purged = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value, expires REAL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires ON {table} (expires)")
+        self._conn.commit()
+        self.trim()
+
+    def get(self, key):
+        """Returns (value, expires) or None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row
+
+    def set(self, key, value, expires: float):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, expires),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._trim(self.clock())
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def items(self, now: float = None):
+        """All unexpired (key, value, expires) rows."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT key, value, expires FROM {self.table} WHERE expires >= ?", (now or time.time(),)
+            ).fetchall()
+
+    def data_version(self) -> int:
+        """Changes whenever ANOTHER connection (e.g. another worker) commits to this file."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def purge_expired(self, now: float = None):
+        with self._lock:
+            self._trim(now or self.clock(), cap=False)
+
+    def trim(self, now: float = None):
+        """Deletes expired rows, then the soonest-expiring ones beyond max_rows."""
+        with self._lock:
+            self._trim(now or self.clock())
+
+    def _trim(self, now: float, cap: bool = True):
+        deleted = self._conn.execute(f"DELETE FROM {self.table} WHERE expires < ?", (now,)).rowcount
+        if cap and self.max_rows is not None:
+            excess = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_rows
+            if excess > 0:
+                deleted += self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY expires LIMIT ?)", (excess,)
+                ).rowcount
+        self._conn.commit()
+        self.purged += deleted
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TTLCache:
+    """
+    Bounded in-memory LRU where every entry also expires after `ttl` seconds.
+    An optional persistent tier (e.g. SQLiteTier) is consulted on memory misses
+    and written through on set(). Thread-safe (used from executor threads).
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, disk=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (value, expires)
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_memory(self, key):
+        """Memory tier only (never blocks on disk): the value, or None without counting a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._data[key]
+        return None
+
+    def get(self, key):
+        now = self.clock()
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+
+        if self.disk is not None:
+            row = self.disk.get(key)
+            if row is not None and row[1] > now:
+                with self._lock:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires = self.clock() + self.ttl
+        with self._lock:
+            self._store(key, value, expires)
+        if self.disk is not None:
+            self.disk.set(key, value, expires)
+
+    def _store(self, key, value, expires):
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk_purged": self.disk.purged if self.disk is not None else 0,
+        }
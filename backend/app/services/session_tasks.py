@@ -0,0 +1,132 @@
+#Per-session supervision of background inference (previews, commits): cancellation, preemption, wasted-work accounting.
+import asyncio
+import logging
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _count_wasted(fut):
+    # Runs on whichever thread completed the inference
+    if not fut.cancelled():
+        metrics.observe("inference_wasted", getattr(fut, "compute_seconds", 0.0))
+
+
+async def await_inference(fut):
+    """
+    Awaits a scheduler (concurrent.futures) Future from the event loop.
+    If the awaiting task is cancelled, a request still queued is cancelled
+    too (the worker skips it). One already on the model runs to completion;
+    its compute time is recorded as `inference_wasted`.
+    """
+    try:
+        return await asyncio.wrap_future(fut)
+    except asyncio.CancelledError:
+        if fut.cancel():
+            metrics.inc("inference_cancelled")
+        else:
+            fut.add_done_callback(_count_wasted)
+        raise
+
+
+class SessionTasks:
+    """
+    Owns the preview and commit tasks of one WebSocket session.
+
+    - At most one preview at a time. A newer preview preempts the current one
+      only while its inference is still queued (cancelling it is free and the
+      newer audio is a superset); once on the model it is left to finish.
+    - A commit supersedes the pending preview: it is cancelled, and no new
+      previews start until the commit is done.
+    - At most one speculative translation (of a settled preview) in flight;
+      another one arriving meanwhile is dropped, since the commit will
+      translate the final text anyway.
+    - close() (disconnect) cancels everything still queued or waiting.
+    `stream.inflight` is the scheduler Future the session's stream is
+    currently waiting on (None between requests). Both backends mark it
+    running when it reaches the model (the process pool once its worker
+    acknowledges the job), which is what tells queued from computing.
+    """
+    def __init__(self, session: str, stream=None):
+        self.session = session
+        self.stream = stream
+        self._preview = None
+        self._speculation = None
+        self._commits = set()
+
+        # Stats
+        self.preempted = 0
+        self.superseded = 0
+        self.speculation_skipped = 0
+        self.cancelled_on_close = 0
+
+    def _preview_active(self) -> bool:
+        return self._preview is not None and not self._preview.done()
+
+    def _preview_queued(self) -> bool:
+        """The active preview is waiting in the inference queue (not on the model yet)."""
+        fut = getattr(self.stream, "inflight", None)
+        return fut is not None and not fut.running() and not fut.done()
+
+    def start_preview(self, coro) -> bool:
+        """Schedules a preview. False (coro discarded) if it would only duplicate running work."""
+        if self._commits:
+            coro.close()
+            return False
+        if self._preview_active():
+            if not self._preview_queued():
+                coro.close()
+                return False
+            self._preview.cancel()
+            self.preempted += 1
+            metrics.inc("preview_preempted")
+        self._preview = asyncio.create_task(coro)
+        return True
+
+    def cancel_preview(self):
+        """The utterance is being finalized: its pending preview is stale."""
+        if self._preview_active():
+            self._preview.cancel()
+            self.superseded += 1
+            metrics.inc("preview_superseded")
+
+    def start_speculation(self, coro) -> bool:
+        """Schedules a speculative translation. False (coro discarded) if one is still running."""
+        if self._speculation is not None and not self._speculation.done():
+            coro.close()
+            self.speculation_skipped += 1
+            metrics.inc("speculation_skipped")
+            return False
+        self._speculation = asyncio.create_task(coro)
+        return True
+
+    def start_commit(self, coro):
+        self.cancel_preview()
+        task = asyncio.create_task(coro)
+        self._commits.add(task)
+        task.add_done_callback(self._commits.discard)
+        return task
+
+    async def close(self):
+        """Disconnect: nobody will see these results."""
+        tasks = [t for t in [self._preview, self._speculation, *self._commits] if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        self.cancelled_on_close += len(tasks)
+        if tasks:
+            metrics.inc("session_tasks_cancelled", value=len(tasks))
+            logger.debug("%s: cancelled %d inference task(s) on disconnect", self.session, len(tasks),
+                         extra={"session": self.session})
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._preview = None
+        self._speculation = None
+        self._commits.clear()
+
+    def stats(self) -> dict:
+        return {
+            "preempted": self.preempted,
+            "superseded": self.superseded,
+            "speculation_skipped": self.speculation_skipped,
+            "cancelled_on_close": self.cancelled_on_close,
+        }
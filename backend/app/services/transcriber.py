@@ -2,125 +2,824 @@ import torch
 from transformers import Wav2Vec2ForCTC, AutoProcessor
 import numpy as np
 import os
+import time
+import asyncio
+import threading
+import itertools
+import zlib
+import queue
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from collections import deque, OrderedDict
+from concurrent.futures import Future, InvalidStateError
 
-class TranscriberService:
-    def __init__(self):
-        print("Loading Meta MMS-1B (Massively Multilingual Speech) Model...")
-        self.model_id = "facebook/mms-1b-all"
+from app.metrics import metrics
+from app.services.session_tasks import await_inference
+
+logger = logging.getLogger(__name__)
+
+
+class _InferenceRequest:
+    __slots__ = ("audio", "language", "target_code", "want_logits", "on_start", "future", "enqueued_at")
+
+    def __init__(self, audio, language, target_code, want_logits, on_start=None):
+        self.audio = audio
+        self.language = language
+        self.target_code = target_code
+        self.want_logits = want_logits
+        self.on_start = on_start  # called on the inference thread when the request reaches the model
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class AdapterManager:
+    """
+    Keeps the language-adapter weights of the N most-used languages in memory (LRU).
+
+    - First use of a language: model.load_adapter() (disk/hub I/O) once, then snapshot.
+    - Later switches: copy the cached tensors into the live parameters (no disk I/O).
+    - Only the inference worker calls activate(), and it runs activate + forward + decode
+      for one adapter group at a time, so no request can decode with the wrong language.
+    """
+    def __init__(self, model, tokenizer, capacity: int = None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.capacity = capacity or int(os.getenv("MMS_ADAPTER_CACHE_SIZE", "8"))
+        self._cache = OrderedDict()  # target_code -> {param_name: tensor}
+        self.active = None
+
+        # Metrics
+        self.swaps = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.swap_seconds_total = 0.0
+        self.last_swap_seconds = 0.0
+
+    def activate(self, target_code: str):
+        if target_code == self.active:
+            return
+
+        t0 = time.perf_counter()
+        self.tokenizer.set_target_lang(target_code)
+
+        weights = self._cache.get(target_code)
+        if weights is None:
+            # Cold: load from disk once, then keep a private copy
+            self.cache_misses += 1
+            self.model.load_adapter(target_code)
+            weights = {name: p.detach().clone() for name, p in self.model._get_adapters().items()}
+            self._cache[target_code] = weights
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        else:
+            # Hot: in-memory copy only
+            self.cache_hits += 1
+            self._cache.move_to_end(target_code)
+            self._apply(weights)
+
+        self.active = target_code
+        self.swaps += 1
+        self.last_swap_seconds = time.perf_counter() - t0
+        self.swap_seconds_total += self.last_swap_seconds
+
+    def _apply(self, weights):
+        with torch.no_grad():
+            for name, param in self.model._get_adapters().items():
+                cached = weights[name]
+                if param.shape == cached.shape:
+                    param.copy_(cached)
+                else:
+                    # Vocab size differs per language (lm_head): resize in place
+                    param.data = cached.clone()
+        vocab_size = weights["lm_head.weight"].shape[0]
+        self.model.config.vocab_size = vocab_size
+        self.model.lm_head.out_features = vocab_size
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "cached": list(self._cache.keys()),
+            "capacity": self.capacity,
+            "swaps": self.swaps,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "swap_seconds_total": round(self.swap_seconds_total, 4),
+            "last_swap_seconds": round(self.last_swap_seconds, 4),
+            "avg_swap_seconds": round(self.swap_seconds_total / self.swaps, 4) if self.swaps else 0.0,
+        }
+
+
+class InferenceScheduler:
+    """
+    Cross-session micro-batching for the shared MMS model.
+
+    - Requests from all sessions go into ONE queue.
+    - A single dedicated worker thread (fixed torch thread budget) takes the oldest
+      request, plus every other queued request for the SAME language adapter
+      (up to max_batch), and runs them as one padded batch with attention masks.
+    - Results come back through concurrent.futures.Future objects.
+    """
+    def __init__(self, service, max_batch: int = None, max_wait: float = None, num_threads: int = None):
+        self.service = service
+        self.max_batch = max_batch or int(os.getenv("TRANSCRIBER_MAX_BATCH", "8"))
+        # How long the worker lingers to let more requests join a batch
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("TRANSCRIBER_BATCH_WAIT_MS", "15")) / 1000.0
+        self.num_threads = num_threads or int(os.getenv("TRANSCRIBER_THREADS", str(os.cpu_count() or 1)))
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, name="mms-inference", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio, language, target_code, want_logits=False, on_start=None) -> Future:
+        req = _InferenceRequest(audio, language, target_code, want_logits, on_start)
+        with self._cond:
+            self._queue.append(req)
+            self._cond.notify()
+        return req.future
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            # Micro-batch window: give concurrent sessions a moment to join
+            if len(self._queue) < self.max_batch and self.max_wait > 0:
+                self._cond.wait(self.max_wait)
+
+            # FIFO fairness: the oldest request decides the adapter
+            target_code = self._queue[0].target_code
+            batch, rest = [], deque()
+            while self._queue:
+                req = self._queue.popleft()
+                if req.target_code == target_code and len(batch) < self.max_batch:
+                    batch.append(req)
+                else:
+                    rest.append(req)
+            self._queue = rest
+            return target_code, batch
+
+    def _worker(self):
+        # Fixed thread budget for the inference worker (no oversubscription)
+        torch.set_num_threads(self.num_threads)
+        while True:
+            target_code, batch = self._next_batch()
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            for req in batch:
+                if req.on_start is not None:
+                    req.on_start()
+            try:
+                start = time.perf_counter()
+                results = self.service._run_batch(target_code, batch)
+                # Per-request share of the batch (wasted-work accounting if the caller went away)
+                share = (time.perf_counter() - start) / len(batch)
+                for req, result in zip(batch, results):
+                    req.future.compute_seconds = share
+                    req.future.set_result(result)
+            except Exception as e:
+                for req in batch:
+                    req.future.set_exception(e)
+
+
+class StreamingTranscription:
+    """
+    Per-session incremental CTC decoding (previews + near-free commit).
+
+    MMS emits one logit frame per 320 samples (20 ms). Frames further than
+    `right_context` from the end of the audio are treated as STABLE: their
+    logits are cached and never recomputed. Each update only encodes
+    [stable_end - left_context, end], so preview cost per call stays roughly
+    constant no matter how long the speaker has been talking.
+    finalize() encodes the last unstable tail and reuses the cache for the rest.
+    """
+    FRAME = 320
+    MIN_SAMPLES = 400  # receptive field of the conv feature encoder
+
+    def __init__(self, service, left_context: float = None, right_context: float = None):
+        self.service = service
+        left = left_context if left_context is not None else float(os.getenv("STREAM_LEFT_CONTEXT_S", "1.0"))
+        right = right_context if right_context is not None else float(os.getenv("STREAM_RIGHT_CONTEXT_S", "0.5"))
+        self.left = int(left * 16000) // self.FRAME * self.FRAME
+        self.right = int(right * 16000) // self.FRAME * self.FRAME
+        self.reset()
+
+    def reset(self):
+        self.inflight = None
+        self._target_code = None
+        self._stable_logits = []  # list of [frames, vocab] arrays
+        self._stable_ids = []     # argmax of the above (greedy CTC)
+        self._stable_frames = 0
+        self._last_text = ""
+
+    @property
+    def stable_seconds(self) -> float:
+        return self._stable_frames * self.FRAME / 16000
+
+    async def _step(self, audio, language, final):
+        if not self.service.ready:
+            return ""
+
+        target_code = self.service._target_code(language)
+        if target_code != self._target_code:
+            # Different adapter -> cached logits are meaningless
+            self.reset()
+            self._target_code = target_code
+
+        seg_start = max(0, self._stable_frames * self.FRAME - self.left)
+        segment = audio[seg_start:]
+        if len(segment) < self.MIN_SAMPLES:
+            return self._last_text
+
+        # Exposed while queued / running so the session can preempt a queued preview
+        self.inflight = self.service.submit(segment, language, want_logits=True)
+        try:
+            logits = await await_inference(self.inflight)
+        finally:
+            self.inflight = None
+
+        # Row j of `logits` is global frame (seg_start / FRAME + j)
+        first_new = self._stable_frames - seg_start // self.FRAME
+        if final:
+            stable_upto = self._stable_frames + (len(logits) - first_new)
+        else:
+            stable_upto = max(self._stable_frames, (len(audio) - self.right) // self.FRAME)
+        n_stable = max(0, min(stable_upto - self._stable_frames, len(logits) - first_new))
+
+        if n_stable:
+            new_logits = logits[first_new:first_new + n_stable]
+            self._stable_logits.append(new_logits)
+            self._stable_ids.append(np.argmax(new_logits, axis=-1))
+            self._stable_frames += n_stable
+
+        tail_ids = np.argmax(logits[first_new + n_stable:], axis=-1)
+        ids = np.concatenate(self._stable_ids + [tail_ids]) if self._stable_ids else tail_ids
+        self._last_text = self.service.decode_ids(ids, target_code)
+        return self._last_text
+
+    async def update(self, audio, language=None):
+        """Preview: re-decodes only the unstable tail. Returns (text, language)."""
+        text = await self._step(audio, language, final=False)
+        return text, language or "kn"
+
+    async def finalize(self, audio, language=None):
+        """Commit: encodes the remaining tail, reuses cached logits, then resets."""
+        try:
+            text = await self._step(audio, language, final=True)
+            logger.debug("MMS stream (%s): %s", self._target_code, text, extra={"adapter": self._target_code})
+            return text, language or "kn"
+        finally:
+            self.reset()
+
+
+# Map frontend codes (ISO 639-1) to MMS codes (ISO 639-3)
+# Full 22 Official Indian Languages + Major Global
+LANG_MAP = {
+    # --- INDIAN LANGUAGES (22 Official) ---
+    "as": "asm", # Assamese
+    "bn": "ben", # Bengali
+    "brx": "brx", # Bodo (Verify if MMS supports brx, defaulting to asm if not? No, MMS supports it)
+    "doi": "doi", # Dogri
+    "gu": "guj", # Gujarati
+    "hi": "hin", # Hindi
+    "kn": "kan", # Kannada
+    "ks": "kas", # Kashmiri
+    "kok": "kok", # Konkani
+    "mai": "mai", # Maithili 
+    "ml": "mal", # Malayalam
+    "mni": "mni", # Manipuri (Meitei)
+    "mr": "mar", # Marathi
+    "ne": "nep", # Nepali
+    "or": "ori", # Odia
+    "pa": "pan", # Punjabi
+    "sa": "san", # Sanskrit
+    "sat": "sat", # Santali
+    "sd": "snd", # Sindhi
+    "ta": "tam", # Tamil
+    "te": "tel", # Telugu
+   
+    
+    # --- GLOBAL MAJOR ---
+    "en": "eng", # English
+    "fr": "fra", # French
+    "es": "spa", # Spanish
+    "de": "deu", # German
+    "it": "ita", # Italian
+    "pt": "por", # Portuguese
+    "ru": "rus", # Russian
+    "zh": "cmn", # Chinese (Mandarin)
+    "ja": "jpn", # Japanese
+    "ko": "kor", # Korean
+    "ar": "ara", # Arabic
+    "nl": "nld", # Dutch
+    "pl": "pol", # Polish
+    "id": "ind", # Indonesian
+    "vi": "vie", # Vietnamese
+    "th": "tha", # Thai
+    "ur": "urd-script_arabic", # Urdu
+}
+
+MODEL_ID = "facebook/mms-1b-all"
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+class _TranscriberAPI:
+    """
+    Public transcription API shared by the in-process service and the process pool.
+    Subclasses provide: ready, processor, submit(), stats().
+    """
+    lang_map = LANG_MAP
+
+    def _prepare(self, audio_data):
+        """Normalizes input to a Float32 Numpy Array."""
+        if isinstance(audio_data, bytes):
+            return np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+        return audio_data
+
+    def _target_code(self, language):
+        # Default to Kannada if not specified or unknown
+        return self.lang_map.get(language, "kan")
+
+    def decode_ids(self, ids, target_code) -> str:
+        """
+        Greedy CTC decode (collapse repeats, drop blanks) for a given language,
+        WITHOUT touching the shared tokenizer's target language (thread-safe).
+        """
+        decoder = self._decoders.get(target_code)
+        if decoder is None:
+            vocab = self.processor.tokenizer.vocab[target_code]
+            decoder = self._decoders[target_code] = (
+                {v: k for k, v in vocab.items()},
+                vocab.get(self.processor.tokenizer.pad_token),
+            )
+        id_to_token, pad_id = decoder
+
+        ids = np.asarray(ids).reshape(-1)
+        if len(ids) == 0:
+            return ""
+        keep = np.ones(len(ids), dtype=bool)
+        keep[1:] = ids[1:] != ids[:-1]
+        tokens = [id_to_token.get(int(i), "") for i in ids[keep] if i != pad_id]
+
+        specials = set(self.processor.tokenizer.all_special_tokens)
+        delimiter = self.processor.tokenizer.word_delimiter_token
+        text = "".join(t for t in tokens if t not in specials).replace(delimiter, " ")
+        return " ".join(text.split())
+
+    def new_stream(self) -> StreamingTranscription:
+        """Per-session streaming decoder (previews + commit)."""
+        return StreamingTranscription(self)
+
+    def transcribe_audio(self, audio_data, language=None):
+        """
+        Transcribes audio using Meta MMS (blocking).
+        """
+        if not self.ready:
+            return "Error: Model not loaded.", "en"
+
+        # 1. Handle Empty Input
+        if audio_data is None or len(audio_data) == 0:
+            return "", "en"
+
+        try:
+            return self.submit(audio_data, language).result()
+        except Exception as e:
+            logger.error("Transcription Error (MMS): %s", e)
+            return "", "en"
+
+    async def transcribe_async(self, audio_data, language=None):
+        """
+        Async version for the event loop: waits on the scheduler without
+        occupying a thread from the default executor.
+        """
+        if not self.ready:
+            return "Error: Model not loaded.", "en"
+
+        if audio_data is None or len(audio_data) == 0:
+            return "", "en"
+
+        try:
+            return await await_inference(self.submit(audio_data, language))
+        except Exception as e:
+            logger.error("Transcription Error (MMS): %s", e)
+            return "", "en"
+
+
+class TranscriberService(_TranscriberAPI):
+    def __init__(self, precision: str = None):
+        logger.info("Loading Meta MMS-1B (Massively Multilingual Speech) Model...")
+        self.model_id = MODEL_ID
+        self.precision = (precision or os.getenv("TRANSCRIBER_PRECISION", "fp32")).lower()
+        if self.precision not in PRECISIONS:
+            logger.warning("Unknown TRANSCRIBER_PRECISION '%s', using fp32.", self.precision)
+            self.precision = "fp32"
+        self.dtype = torch.float32
+        self.scheduler = None
+        self.adapters = None
+        self._decoders = {}  # target_code -> (id_to_token, pad_id)
         
         try:
             self.processor = AutoProcessor.from_pretrained(self.model_id)
             self.model = Wav2Vec2ForCTC.from_pretrained(self.model_id)
             
             # --- SPEED OPTIMIZATION ---
-            # 1. Use all CPU cores (Safe)
-            torch.set_num_threads(os.cpu_count()) 
+            # 1. CPU threads: fixed budget, set once inside the dedicated
+            #    inference worker (see InferenceScheduler / TRANSCRIBER_THREADS).
             
-            # 2. QUANTIZATION (Dynamic) - REMOVED due to Adapter Incompatibility
-            # The 'load_adapter' function fails because quantization changes layer names/types.
-            # We will stick to torch.inference_mode() for speed.
+            # 2. REDUCED PRECISION (TRANSCRIBER_PRECISION=fp32|bf16|int8)
+            # Quantizing the WHOLE model broke 'load_adapter' (layer names/types change).
+            # We only quantize the base encoder and leave the adapter layers + lm_head
+            # as regular fp32 modules, so adapters stay swappable.
+            self._apply_precision()
             
-            # Map frontend codes (ISO 639-1) to MMS codes (ISO 639-3)
-            # Full 22 Official Indian Languages + Major Global
-            self.lang_map = {
-                # --- INDIAN LANGUAGES (22 Official) ---
-                "as": "asm", # Assamese
-                "bn": "ben", # Bengali
-                "brx": "brx", # Bodo (Verify if MMS supports brx, defaulting to asm if not? No, MMS supports it)
-                "doi": "doi", # Dogri
-                "gu": "guj", # Gujarati
-                "hi": "hin", # Hindi
-                "kn": "kan", # Kannada
-                "ks": "kas", # Kashmiri
-                "kok": "kok", # Konkani
-                "mai": "mai", # Maithili 
-                "ml": "mal", # Malayalam
-                "mni": "mni", # Manipuri (Meitei)
-                "mr": "mar", # Marathi
-                "ne": "nep", # Nepali
-                "or": "ori", # Odia
-                "pa": "pan", # Punjabi
-                "sa": "san", # Sanskrit
-                "sat": "sat", # Santali
-                "sd": "snd", # Sindhi
-                "ta": "tam", # Tamil
-                "te": "tel", # Telugu
-               
-                
-                # --- GLOBAL MAJOR ---
-                "en": "eng", # English
-                "fr": "fra", # French
-                "es": "spa", # Spanish
-                "de": "deu", # German
-                "it": "ita", # Italian
-                "pt": "por", # Portuguese
-                "ru": "rus", # Russian
-                "zh": "cmn", # Chinese (Mandarin)
-                "ja": "jpn", # Japanese
-                "ko": "kor", # Korean
-                "ar": "ara", # Arabic
-                "nl": "nld", # Dutch
-                "pl": "pol", # Polish
-                "id": "ind", # Indonesian
-                "vi": "vie", # Vietnamese
-                "th": "tha", # Thai
-                "ur": "urd-script_arabic", # Urdu
-            }
-            
-            print("[OK] Meta MMS-1B Loaded Successfully.")
+            logger.info("Meta MMS-1B Loaded Successfully.")
+
+            # 3. Hot adapter cache (LRU, MMS_ADAPTER_CACHE_SIZE languages in memory)
+            self.adapters = AdapterManager(self.model, self.processor.tokenizer)
+
+            # 4. One inference worker, cross-session micro-batching
+            self.scheduler = InferenceScheduler(self)
             
         except Exception as e:
-            print(f"[ERROR] Failed to load MMS model: {e}")
+            logger.error("Failed to load MMS model: %s", e)
             self.model = None
             self.processor = None
 
-    def transcribe_audio(self, audio_data, language=None):
+    def _apply_precision(self):
+        if self.precision == "bf16":
+            self.model = self.model.to(torch.bfloat16)
+            self.dtype = torch.bfloat16
+        elif self.precision == "int8":
+            encoder = self.model.wav2vec2.encoder
+            base_linears = {
+                name for name, module in encoder.named_modules()
+                if isinstance(module, torch.nn.Linear) and "adapter_layer" not in name
+            }
+            torch.quantization.quantize_dynamic(encoder, qconfig_spec=base_linears, dtype=torch.qint8, inplace=True)
+        logger.info("Transcriber precision: %s", self.precision)
+
+    def _run_batch(self, target_code, requests):
         """
-        Transcribes audio using Meta MMS.
+        Runs ONE padded forward pass for requests that share an adapter.
+        Called only from the inference worker thread.
         """
+        # Switch Adapter (in-memory after first use; see AdapterManager)
+        self.adapters.activate(target_code)
+
+        # Padded batch + attention mask (MMS feature extractor supports it)
+        inputs = self.processor(
+            [r.audio for r in requests],
+            sampling_rate=16000,
+            return_tensors="pt",
+            padding=True,
+            return_attention_mask=True,
+        )
+        if self.dtype != torch.float32:
+            inputs["input_values"] = inputs["input_values"].to(self.dtype)
+
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+
+        # Trim each row back to its real (unpadded) length
+        lengths = self.model._get_feat_extract_output_lengths(inputs["attention_mask"].sum(-1)).tolist()
+
+        results = []
+        for i, req in enumerate(requests):
+            row = logits[i, :lengths[i]]
+            if req.want_logits:
+                results.append(row.float().numpy())
+                continue
+            transcription = self.processor.decode(torch.argmax(row, dim=-1))
+            logger.debug("MMS (%s): %s", target_code, transcription, extra={"adapter": target_code})
+            results.append((transcription, req.language or "kn"))
+        return results
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def stats(self) -> dict:
         if self.model is None:
-            return "Error: Model not loaded.", "en"
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "precision": self.precision,
+            "queue_depth": self.scheduler.queue_depth,
+            "adapters": self.adapters.stats(),
+        }
 
-        # 1. Handle Empty Input
-        if audio_data is None or len(audio_data) == 0:
-            return "", "en"
+    def submit(self, audio_data, language=None, want_logits=False, on_start=None) -> Future:
+        """Queues audio on the inference scheduler. Returns a concurrent Future."""
+        return self.scheduler.submit(self._prepare(audio_data), language, self._target_code(language), want_logits, on_start)
 
-        # 2. Normalize Input to Float32 Numpy Array
-        if isinstance(audio_data, bytes):
-            audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-        else:
-            audio_array = audio_data
+def _pool_worker_main(index, task_queue, result_queue):
+    """
+    Entry point of one transcription worker process.
+    The model is loaded ONCE here (module global); audio arrives via shared memory.
+    """
+    service = transcriber_service  # TRANSCRIBER_WORKER=1 -> plain TranscriberService
+    result_queue.put(("ready", index, service.ready, 0.0))
+    pending = {}  # job_id -> Future on this worker's scheduler
 
-        # 3. Determine Language Adapter
-        # Default to Kannada if not specified or unknown
-        target_code = self.lang_map.get(language, "kan") 
-        
+    def reply(job_id, fut):
+        pending.pop(job_id, None)
+        if fut.cancelled():
+            result_queue.put((job_id, False, "cancelled", 0.0))
+            return
         try:
-            # Load Adapter (This is fast, just switches weights)
-            self.processor.tokenizer.set_target_lang(target_code)
-            self.model.load_adapter(target_code)
-            
-            # 4. Prepare Types
-            # processor expects raw audio array
-            inputs = self.processor(audio_array, sampling_rate=16000, return_tensors="pt")
-
-            # 5. Inference
-            # 5. Inference
-            with torch.inference_mode():
-                outputs = self.model(**inputs)
-
-            # 6. Decode
-            ids = torch.argmax(outputs.logits, dim=-1)[0]
-            transcription = self.processor.decode(ids)
-            
-            # Cleanup text (MMS might output raw tokens sometimes?)
-            # Usually clean.
-            
-            print(f"MMS ({target_code}): {transcription}")
-            return transcription, language or "kn"
+            result_queue.put((job_id, True, fut.result(), getattr(fut, "compute_seconds", 0.0)))
+        except Exception as e:
+            result_queue.put((job_id, False, repr(e), 0.0))
 
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        if task[0] == "cancel":
+            # Parent gave up on this job: drop it if it hasn't reached the model
+            fut = pending.get(task[1])
+            if fut is not None:
+                fut.cancel()
+            continue
+        job_id, shm_name, n_samples, language, want_logits = task
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                audio = np.ndarray((n_samples,), dtype=np.float32, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+            if not service.ready:
+                raise RuntimeError("Model not loaded in worker")
+            # Ack once it reaches the model: the parent marks its Future running
+            fut = service.submit(audio, language, want_logits,
+                                 on_start=lambda job_id=job_id: result_queue.put(("running", job_id, None, 0.0)))
+            pending[job_id] = fut
+            fut.add_done_callback(lambda f, job_id=job_id: reply(job_id, f))
         except Exception as e:
-            print(f"Transcription Error (MMS): {e}")
-            return "", "en"
+            result_queue.put((job_id, False, repr(e), 0.0))
+
+
+class TranscriberPool(_TranscriberAPI):
+    """
+    Runs TranscriberService in dedicated worker processes so tokenization,
+    feature extraction and decode never hold the event loop's GIL.
+
+    - TRANSCRIBER_WORKERS processes, TRANSCRIBER_WORKER_THREADS torch threads each.
+    - Audio is handed over through shared memory (no pickled arrays).
+    - Results come back over a queue and resolve concurrent Futures. A job's
+      Future is marked running when its worker starts it, as with the
+      in-process scheduler, so queued and computing jobs can be told apart.
+    - Requests prefer the worker that already has their language adapter hot.
+    - A watchdog on the result thread fails the jobs of a worker that died and
+      respawns it; dead or still-loading respawned workers get no new jobs.
+    `processor` / `worker_main` default to the MMS tokenizer and
+    _pool_worker_main (tests pass stand-ins that load no model).
+    """
+    def __init__(self, workers: int = None, threads_per_worker: int = None, processor=None, worker_main=None):
+        self.workers = workers or int(os.getenv("TRANSCRIBER_WORKERS", "1"))
+        default_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self.threads_per_worker = threads_per_worker or int(os.getenv("TRANSCRIBER_WORKER_THREADS", str(default_threads)))
+        logger.info("Starting %d transcription worker(s) x %d threads...", self.workers, self.threads_per_worker)
+
+        # Parent only needs the tokenizer (for decode_ids in streaming mode)
+        self.processor = processor if processor is not None else AutoProcessor.from_pretrained(MODEL_ID)
+        self._decoders = {}
+        self._worker_main = worker_main or _pool_worker_main
+        self._closed = False
+
+        self._ctx = mp.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._task_queues = [None] * self.workers
+        self._procs = [None] * self.workers
+        self._inflight = [0] * self.workers
+        self._alive = [True] * self.workers     # eligible for new jobs
+        self._worker_ready = [False] * self.workers
+        self._restarts = [0] * self.workers
+        self._reaped = [None] * self.workers    # dead process already handled
+        self._max_restarts = int(os.getenv("TRANSCRIBER_MAX_RESTARTS", "3"))
+        self._watchdog_interval = float(os.getenv("TRANSCRIBER_WATCHDOG_S", "1.0"))
+        self._jobs = {}  # job_id -> (future, shm, worker index)
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self.worker_deaths = 0
+        self.failed_jobs = 0
+
+        for i in range(self.workers):
+            self._spawn(i)
+
+        self._reader = threading.Thread(target=self._read_results, name="mms-pool-results", daemon=True)
+        self._reader.start()
+
+    def _spawn(self, index):
+        # Fresh task queue: whatever was queued for a dead worker has already been failed
+        self._task_queues[index] = self._ctx.Queue()
+        # Children import this module; the env flag makes them build a plain service
+        saved = {k: os.environ.get(k) for k in ("TRANSCRIBER_WORKER", "TRANSCRIBER_THREADS")}
+        os.environ["TRANSCRIBER_WORKER"] = "1"
+        os.environ["TRANSCRIBER_THREADS"] = str(self.threads_per_worker)
+        try:
+            proc = self._ctx.Process(target=self._worker_main, args=(index, self._task_queues[index], self._result_queue),
+                                     daemon=True, name=f"mms-worker-{index}")
+            proc.start()
+            self._procs[index] = proc
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+    @property
+    def ready(self) -> bool:
+        return any(alive and proc.is_alive() for alive, proc in zip(self._alive, self._procs))
+
+    def close(self, timeout: float = 5.0):
+        """Stops the workers (no respawn) and fails whatever they had not answered."""
+        self._closed = True
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        with self._lock:
+            lost = list(self._jobs.values())
+            self._jobs.clear()
+            self._inflight = [0] * self.workers
+        self._fail_jobs(lost, "Transcriber pool closed")
+
+    def _pick_worker(self, target_code):
+        # Adapter affinity, unless that worker is clearly busier than the least-loaded one
+        live = [i for i in range(self.workers) if self._alive[i]]
+        if not live:
+            return None
+        least = min(live, key=self._inflight.__getitem__)
+        preferred = zlib.crc32(target_code.encode()) % self.workers
+        if self._alive[preferred] and self._inflight[preferred] <= self._inflight[least] + 1:
+            return preferred
+        return least
+
+    def submit(self, audio_data, language=None, want_logits=False) -> Future:
+        audio = np.ascontiguousarray(self._prepare(audio_data), dtype=np.float32)
+        target_code = self._target_code(language)
+        fut = Future()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+
+        with self._lock:
+            job_id = next(self._job_ids)
+            worker = self._pick_worker(target_code)
+            if worker is not None:
+                self._inflight[worker] += 1
+                self._jobs[job_id] = (fut, shm, worker)
+        if worker is None:
+            shm.close()
+            shm.unlink()
+            fut.set_exception(RuntimeError("No transcription worker available"))
+            return fut
+        self._task_queues[worker].put((job_id, shm.name, len(audio), language, want_logits))
+        fut.add_done_callback(lambda f, job_id=job_id, worker=worker: self._on_done(f, job_id, worker))
+        return fut
+
+    def _on_done(self, fut, job_id, worker):
+        # Cancelled by the session: tell the worker (its shared memory is freed when it answers)
+        if fut.cancelled():
+            self._task_queues[worker].put(("cancel", job_id))
+
+    def _read_results(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                message = self._result_queue.get(timeout=self._watchdog_interval)
+            except queue.Empty:
+                message = None
+            if time.monotonic() - last_check >= self._watchdog_interval:
+                self._check_workers()
+                last_check = time.monotonic()
+            if message is None:
+                continue
+
+            job_id, ok, payload, compute_seconds = message
+            if job_id == "running":
+                self._mark_running(ok)
+                continue
+            if job_id == "ready":
+                self._worker_ready[ok] = True
+                self._alive[ok] = True  # a respawned worker takes jobs again once loaded
+                logger.info("Transcription worker %s ready (model loaded: %s)", ok, payload)
+                continue
+
+            with self._lock:
+                job = self._jobs.pop(job_id, None)
+                if job is not None:
+                    self._inflight[job[2]] -= 1
+            if job is None:
+                continue  # Already failed by the watchdog (its worker died)
+            fut, shm, worker = job
+            shm.close()
+            shm.unlink()
+
+            if fut.cancelled():
+                if ok:
+                    # Cancelled after the worker had already run it
+                    metrics.observe("inference_wasted", compute_seconds)
+                continue
+            fut.compute_seconds = compute_seconds
+            try:
+                if ok:
+                    fut.set_result(payload)
+                else:
+                    fut.set_exception(RuntimeError(payload))
+            except InvalidStateError:
+                pass  # Cancelled in the meantime
+
+    def _mark_running(self, job_id):
+        # Until now the Future was only queued (cancellable for free); from here
+        # on it is on the model, so fut.running() is what SessionTasks sees
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return
+        try:
+            job[0].set_running_or_notify_cancel()  # False if the session already cancelled it
+        except RuntimeError:
+            pass  # Already resolved (failed by the watchdog)
+
+    # --- WATCHDOG ---
+    def _check_workers(self):
+        """
+        Runs on the reader thread. A worker that died (OOM kill, segfault in a
+        native op) never answers its jobs: fail them so the sessions waiting on
+        them get their lock back, free their shared memory, stop routing to it
+        and respawn it (up to TRANSCRIBER_MAX_RESTARTS times).
+        """
+        if self._closed:
+            return
+        for index, proc in enumerate(self._procs):
+            if proc.is_alive() or proc is self._reaped[index]:
+                continue
+            self._reaped[index] = proc
+            with self._lock:
+                self._alive[index] = False
+                self._worker_ready[index] = False
+                lost = [(job_id, job) for job_id, job in self._jobs.items() if job[2] == index]
+                for job_id, _ in lost:
+                    del self._jobs[job_id]
+                self._inflight[index] = 0
+            self.worker_deaths += 1
+            self.failed_jobs += len(lost)
+            metrics.inc("transcriber_worker_died")
+            logger.error("Transcription worker %s died (exit code %s), failing %d job(s)",
+                         index, proc.exitcode, len(lost))
+            self._fail_jobs([job for _, job in lost], f"Transcription worker {index} died")
+
+            if self._restarts[index] < self._max_restarts:
+                self._restarts[index] += 1
+                logger.warning("Respawning transcription worker %s (restart %d/%d)",
+                               index, self._restarts[index], self._max_restarts)
+                self._spawn(index)
+
+    @staticmethod
+    def _fail_jobs(jobs, reason):
+        for fut, shm, _ in jobs:
+            shm.close()
+            shm.unlink()
+            try:
+                fut.set_exception(RuntimeError(reason))
+            except InvalidStateError:
+                pass  # Cancelled by the session already
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.ready,
+            "backend": "process",
+            "workers": self.workers,
+            "ready_workers": sum(self._worker_ready),
+            "live_workers": sum(self._alive),
+            "worker_deaths": self.worker_deaths,
+            "restarts": list(self._restarts),
+            "failed_jobs": self.failed_jobs,
+            "threads_per_worker": self.threads_per_worker,
+            "inflight": list(self._inflight),
+        }
+
+
+def create_transcriber():
+    """
+    TRANSCRIBER_BACKEND=thread  (default) -> model in this process, one inference thread
+    TRANSCRIBER_BACKEND=process           -> TranscriberPool of worker processes
+    """
+    backend = os.getenv("TRANSCRIBER_BACKEND", "thread").lower()
+    if backend == "process" and os.getenv("TRANSCRIBER_WORKER") != "1":
+        return TranscriberPool()
+    return TranscriberService()
 
-transcriber_service = TranscriberService()
\ No newline at end of file
+# MODEL_PRELOAD=0 imports this module without loading MMS (tests build their own services)
+transcriber_service = create_transcriber() if os.getenv("MODEL_PRELOAD", "1") == "1" else None
@@ -1,10 +1,114 @@
 #It handles the text-to-text translation using Google Translate.
+import os
+import re
+import html
+import logging
+import asyncio
+import inspect
+import unicodedata
+import httpx
 from deep_translator import GoogleTranslator
 
+from app.services.cache import TTLCache, SQLiteTier
+
+logger = logging.getLogger(__name__)
+
+
+class GoogleTranslateBackend:
+    """Default backend: Google Translate via deep_translator (blocking network call)."""
+    name = "google"
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        translator = GoogleTranslator(source=source_lang, target=target_lang)
+        return translator.translate(text)
+
+
+class AsyncGoogleTranslateClient:
+    """
+    asyncio-native client for the same Google Translate endpoint deep_translator uses.
+    - One persistent httpx.AsyncClient (keep-alive connection pool, no TLS handshake per call)
+    - Per-backend concurrency limit (semaphore)
+    - TRANSLATOR_BASE_URL can point at a local stand-in server for tests/benchmarks
+    """
+    name = "google"
+    _RESULT_RE = re.compile(r'<div[^>]*class="(?:t0|result-container)"[^>]*>(.*?)</div>', re.S)
+
+    def __init__(self, base_url: str = None, max_connections: int = None, max_concurrency: int = None, timeout: float = 10.0):
+        self.base_url = base_url or os.getenv("TRANSLATOR_BASE_URL", "https://translate.google.com/m")
+        self.max_connections = max_connections or int(os.getenv("TRANSLATOR_MAX_CONNECTIONS", "20"))
+        self.max_concurrency = max_concurrency or int(os.getenv("TRANSLATOR_MAX_CONCURRENCY", "16"))
+        self.timeout = timeout
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={"User-Agent": "Mozilla/5.0"},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        self._ensure_client()
+        async with self._semaphore:
+            resp = await self._client.get(self.base_url, params={"sl": source_lang, "tl": target_lang, "q": text})
+        resp.raise_for_status()
+        match = self._RESULT_RE.search(resp.text)
+        if not match:
+            raise ValueError("No translation found in response")
+        return html.unescape(match.group(1)).strip()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def build_translation_cache() -> TTLCache:
+    """
+    TRANSLATION_CACHE_SIZE  entries kept in memory (LRU)
+    TRANSLATION_CACHE_TTL   seconds before an entry is re-translated
+    TRANSLATION_CACHE_DB    optional SQLite file for a persistent tier
+    TRANSLATION_CACHE_DB_ROWS  rows kept in that file (soonest-expiring dropped first)
+    """
+    db_path = os.getenv("TRANSLATION_CACHE_DB")
+    max_rows = int(os.getenv("TRANSLATION_CACHE_DB_ROWS", "100000"))
+    return TTLCache(
+        max_entries=int(os.getenv("TRANSLATION_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("TRANSLATION_CACHE_TTL", "86400")),
+        disk=SQLiteTier(db_path, table="translations", max_rows=max_rows) if db_path else None,
+    )
+
+
 class TranslatorService:
-    def __init__(self):
-        # We don't need to load a heavy model here since it uses an API
-        pass
+    def __init__(self, backend=None, cache: TTLCache = None, async_backend=None):
+        # Pluggable backend: anything with a blocking translate(text, source_lang, target_lang)
+        if backend is not None and inspect.iscoroutinefunction(getattr(backend, "translate", None)):
+            # translate_text() would cache the coroutine object instead of a string
+            raise TypeError(f"{type(backend).__name__} is async: pass it as async_backend=")
+        self.backend = backend or GoogleTranslateBackend()
+        # Async backend (awaitable translate). Without one, translate_async()
+        # falls back to running the sync backend in the default executor.
+        if async_backend is None and backend is None:
+            async_backend = AsyncGoogleTranslateClient()
+        self.async_backend = async_backend
+        # Agents repeat stock phrases ("Please wait", "Thank you") all day
+        self.cache = cache if cache is not None else build_translation_cache()
+
+        # Request coalescing: cache key -> in-flight upstream task
+        self._inflight = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Cache-key normalization: Unicode NFC + collapsed whitespace."""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def cache_key(self, text: str, source_lang: str, target_lang: str) -> str:
+        return f"{source_lang}\x1f{target_lang}\x1f{self.normalize(text)}"
 
     def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
         """
@@ -22,12 +126,82 @@ class TranslatorService:
             if source_lang == target_lang:
                 return text
 
-            translator = GoogleTranslator(source=source_lang, target=target_lang)
-            return translator.translate(text)
+            key = self.cache_key(text, source_lang, target_lang)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+            result = self.backend.translate(text, source_lang, target_lang)
+            if result:
+                self.cache.set(key, result)
+            return result
         
         except Exception as e:
-            print(f"Translation Error: {e}")
+            logger.error("Translation Error: %s", e)
             return text  # Fallback: return original text if translation fails
 
+    async def translate_async(self, text: str, source_lang: str, target_lang: str) -> str:
+        """
+        Event-loop version of translate_text().
+        Memory cache first; identical in-flight requests share ONE lookup of
+        the disk tier and ONE upstream call. Disk reads and write-through run
+        in the default executor, never on the loop.
+        """
+        if not text:
+            return ""
+        if source_lang == target_lang:
+            return text
+
+        key = self.cache_key(text, source_lang, target_lang)
+        cached = self.cache.get_memory(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fetch(key, text, source_lang, target_lang))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, key=key: self._inflight.pop(key, None))
+        # shield: one waiter going away must not cancel the shared upstream call
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, text, source_lang, target_lang) -> str:
+        loop = asyncio.get_running_loop()
+        if self.cache.disk is not None:
+            cached = await loop.run_in_executor(None, self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        self.upstream_calls += 1
+        try:
+            if self.async_backend is not None:
+                result = await self.async_backend.translate(text, source_lang, target_lang)
+            else:
+                result = await loop.run_in_executor(None, self.backend.translate, text, source_lang, target_lang)
+            if result:
+                if self.cache.disk is not None:
+                    await loop.run_in_executor(None, self.cache.set, key, result)
+                else:
+                    self.cache.set(key, result)
+            return result
+        except Exception as e:
+            logger.error("Translation Error: %s", e)
+            return text  # Fallback: return original text if translation fails
+
+    async def aclose(self):
+        if self.async_backend is not None and hasattr(self.async_backend, "aclose"):
+            await self.async_backend.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": getattr(self.backend, "name", type(self.backend).__name__),
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "cache": self.cache.stats(),
+        }
+
 # Global instance
-translator_service = TranslatorService()
\ No newline at end of file
+translator_service = TranslatorService()
@@ -0,0 +1,162 @@
+#Text-to-speech with a content-addressed cache (memory LRU + disk) and startup warm-up.
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import deque
+from gtts import gTTS
+
+from app.services.cache import TTLCache, SQLiteTier
+
+logger = logging.getLogger(__name__)
+
+
+class GTTSBackend:
+    """Default engine: Google TTS (network round-trip, returns MP3 bytes)."""
+    name = "gtts"
+    codec = "mp3"
+
+    def synthesize(self, text: str, lang: str, slow: bool = False) -> bytes:
+        tts = gTTS(text=text, lang=lang, slow=slow)
+        mp3_fp = io.BytesIO()
+        tts.write_to_fp(mp3_fp)
+        return mp3_fp.getvalue()
+
+
+# Sentence ends: Latin + Devanagari danda/double danda + CJK full-width marks
+_SENTENCE_END = re.compile(r"(?<=[.!?\u0964\u0965\u3002\uff01\uff1f])\s+")
+
+
+def split_sentences(text: str) -> list:
+    """Splits text into sentences so the first one can be spoken while the rest synthesize."""
+    parts = [p.strip() for p in _SENTENCE_END.split(text or "")]
+    return [p for p in parts if p]
+
+
+def build_tts_cache() -> TTLCache:
+    """
+    TTS_CACHE_SIZE  clips kept in memory (LRU)
+    TTS_CACHE_TTL   seconds a clip stays valid (default 30 days)
+    TTS_CACHE_DB    SQLite file for the disk tier ("" disables it)
+    TTS_CACHE_DB_ROWS  clips kept in that file (soonest-expiring dropped first)
+    """
+    db_path = os.getenv("TTS_CACHE_DB", "tts_cache.db")
+    max_rows = int(os.getenv("TTS_CACHE_DB_ROWS", "10000"))
+    return TTLCache(
+        max_entries=int(os.getenv("TTS_CACHE_SIZE", "512")),
+        ttl=float(os.getenv("TTS_CACHE_TTL", str(30 * 24 * 3600))),
+        disk=SQLiteTier(db_path, table="tts", max_rows=max_rows) if db_path else None,
+    )
+
+
+class TTSService:
+    def __init__(self, backend=None, cache: TTLCache = None, slow: bool = False):
+        # Pluggable backend: anything with synthesize(text, lang, slow) -> bytes
+        self.backend = backend or GTTSBackend()
+        self.cache = cache if cache is not None else build_tts_cache()
+        self.slow = slow
+        self.synth_calls = 0
+
+    def cache_key(self, text: str, lang: str) -> str:
+        """Content address: hash of (engine, language, voice settings, normalized text)."""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        raw = f"{self.backend.name}\x1f{lang}\x1fslow={self.slow}\x1f{normalized}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def synthesize(self, text: str, lang: str):
+        """Returns audio bytes (cached), or None on error/empty text. Blocking on a miss."""
+        try:
+            if not text: return None
+            key = self.cache_key(text, lang)
+            audio = self.cache.get(key)
+            if audio is None:
+                self.synth_calls += 1
+                audio = self.backend.synthesize(text, lang, self.slow)
+                if audio:
+                    self.cache.set(key, audio)
+            return audio
+        except Exception as e:
+            logger.error("TTS Error: %s", e)
+            return None
+
+    async def synthesize_async(self, text: str, lang: str):
+        """
+        Memory hits return immediately on the loop; everything else (disk tier
+        lookup, synthesis) runs in the default executor.
+        """
+        if not text: return None
+        audio = self.cache.get_memory(self.cache_key(text, lang))
+        if audio is not None:
+            return audio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.synthesize, text, lang)
+
+    async def generate_audio_b64(self, text: str, lang: str):
+        """Base64 MP3 for the JSON 'audio' message."""
+        audio = await self.synthesize_async(text, lang)
+        return base64.b64encode(audio).decode("utf-8") if audio else None
+
+    async def stream_audio(self, text: str, lang: str, lookahead: int = 2):
+        """
+        Async generator of audio pieces, one per sentence, in order.
+        Up to `lookahead` sentences synthesize in parallel, so piece N+1 is usually
+        ready by the time piece N has been sent. Time to first audio depends on the
+        first sentence only, not on the message length.
+        """
+        sentences = iter(split_sentences(text))
+        pending = deque()
+        try:
+            for _ in range(lookahead):
+                sentence = next(sentences, None)
+                if sentence is None: break
+                pending.append(asyncio.ensure_future(self.synthesize_async(sentence, lang)))
+
+            while pending:
+                audio = await pending.popleft()
+                sentence = next(sentences, None)
+                if sentence is not None:
+                    pending.append(asyncio.ensure_future(self.synthesize_async(sentence, lang)))
+                if audio:
+                    yield audio
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def warm_up(self, phrases_by_lang: dict, translate=None):
+        """
+        Pre-synthesizes stock phrases so the first real use is a cache hit.
+        phrases_by_lang: {lang: [phrase, ...]}
+        translate: optional async fn(phrase, lang) -> text in that language
+        """
+        count = 0
+        for lang, phrases in phrases_by_lang.items():
+            for phrase in phrases:
+                text = await translate(phrase, lang) if translate else phrase
+                if await self.synthesize_async(text, lang):
+                    count += 1
+        logger.info("TTS warm-up: %d clips ready.", count)
+        return count
+
+    def stats(self) -> dict:
+        return {"backend": self.backend.name, "synth_calls": self.synth_calls, "cache": self.cache.stats()}
+
+
+def load_warmup_config(path: str = None) -> dict:
+    """
+    Reads TTS_WARMUP_FILE (JSON):
+      {"source_lang": "en", "languages": ["hi", "kn"], "phrases": ["Please wait", ...]}
+    Returns {} when no file is configured/found.
+    """
+    path = path or os.getenv("TTS_WARMUP_FILE", "tts_warmup.json")
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# Global instance
+tts_service = TTSService()
@@ -0,0 +1,119 @@
+#Batches VAD windows from ALL live sessions into one Silero forward pass per step.
+import asyncio
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.audio_processor import vad_engine, VADEngine
+
+logger = logging.getLogger(__name__)
+
+
+class _SessionQueue:
+    """Pending windows (in time order) for one session + the futures waiting on them."""
+    __slots__ = ("state", "items")
+
+    def __init__(self, state):
+        self.state = state
+        self.items = deque()  # (window, future)
+
+
+class VADScheduler:
+    """
+    Collects pending 512-sample windows from every session on a short tick
+    and scores them as ONE batched tensor.
+
+    - Recurrent state stays per session (VADState); a batch holds at most one
+      window per session, so each session still advances strictly in time order.
+    - Round-robin: a session that got a slot moves to the back of the line, so
+      when more sessions are pending than max_batch, the ones left out of this
+      step go first in the next.
+    - Inference runs on a single dedicated thread, never on the event loop.
+    - Each probability is routed back to the future of the window it came from.
+    """
+    def __init__(self, engine: VADEngine = None, tick: float = None, max_batch: int = 256):
+        self.engine = engine or vad_engine
+        self.tick = tick if tick is not None else float(os.getenv("VAD_BATCH_TICK_MS", "10")) / 1000.0
+        self.max_batch = max_batch
+        self._queues = {}  # id(state) -> _SessionQueue
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad")
+        self._wakeup = None
+        self._task = None
+
+        # Stats
+        self.batches = 0
+        self.windows_scored = 0
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, state, windows) -> list:
+        """Queues this session's windows and waits for their probabilities (same order)."""
+        self._ensure_running()
+        loop = asyncio.get_running_loop()
+
+        queue = self._queues.get(id(state))
+        if queue is None:
+            queue = self._queues[id(state)] = _SessionQueue(state)
+
+        futures = []
+        for window in windows:
+            fut = loop.create_future()
+            queue.items.append((window, fut))
+            futures.append(fut)
+
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Short tick: let other sessions' frames join this batch
+            await asyncio.sleep(self.tick)
+
+            while self._queues:
+                # One window per session per step (recurrent state!)
+                batch = []
+                for key in list(self._queues):
+                    queue = self._queues.pop(key)
+                    if not queue.items:
+                        continue
+                    window, fut = queue.items.popleft()
+                    batch.append((queue.state, window, fut))
+                    self._queues[key] = queue  # back of the line
+                    if len(batch) >= self.max_batch:
+                        break
+                if not batch:
+                    break
+
+                states = [b[0] for b in batch]
+                windows = [b[1] for b in batch]
+                try:
+                    probs = await loop.run_in_executor(self._executor, self.engine.score_batch, states, windows)
+                except Exception as e:
+                    logger.error("VAD batch error: %s", e)
+                    probs = [0.0] * len(batch)
+
+                self.batches += 1
+                self.windows_scored += len(batch)
+                for (_, _, fut), prob in zip(batch, probs):
+                    if not fut.done():
+                        fut.set_result(prob)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "windows_scored": self.windows_scored,
+            "avg_batch_size": (self.windows_scored / self.batches) if self.batches else 0.0,
+            "pending_sessions": len(self._queues),
+        }
+
+
+# Global instance (shared by all WebSocket sessions)
+vad_scheduler = VADScheduler()
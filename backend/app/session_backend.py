@@ -0,0 +1,350 @@
+#Shared session state + cross-worker messaging for ConnectionManager (in-process or Redis).
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+from app.matchmaking import MatchmakingEngine, WaitEstimator, queue_language, ANY_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process on the broker (one channel per worker)
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+# --- ENVELOPES ---
+# Wire format between workers: JSON header line, then the raw payload.
+# Binary audio frames travel as-is (no base64).
+def pack_envelope(to: str, kind: str, payload) -> bytes:
+    if kind != "bytes":
+        payload = json.dumps(payload).encode("utf-8")
+    return json.dumps({"to": to, "kind": kind}).encode("utf-8") + b"\n" + payload
+
+
+def unpack_envelope(data: bytes):
+    header, _, payload = data.partition(b"\n")
+    header = json.loads(header)
+    if header["kind"] != "bytes":
+        payload = json.loads(payload)
+    return header["to"], header["kind"], payload
+
+
+class InMemorySessionBackend:
+    """
+    Single-process state behind the backend interface: dicts for users and
+    pairs, the MatchmakingEngine for queues. Only one worker exists, so every
+    user is local and publish() is a direct call.
+    """
+    name = "memory"
+
+    def __init__(self, matchmaking: MatchmakingEngine = None):
+        self.users = {}      # user_id -> {"role", "lang", "worker", "languages"}
+        self.pairs = {}      # user_id -> partner_id (both directions)
+        self.matchmaking = matchmaking or MatchmakingEngine()
+        self._handler = None
+
+    async def start(self, worker_id: str, handler):
+        self._handler = handler
+
+    async def close(self):
+        self._handler = None
+
+    # --- USERS ---
+    async def add_user(self, user_id, role, lang, worker, languages=None):
+        self.users[user_id] = {
+            "role": role, "lang": lang, "worker": worker, "languages": ",".join(languages or [lang]),
+        }
+
+    async def remove_user(self, user_id):
+        self.users.pop(user_id, None)
+
+    async def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def set_lang(self, user_id, lang):
+        if user_id in self.users:
+            self.users[user_id]["lang"] = lang
+
+    # --- PAIRS ---
+    async def pair(self, a, b):
+        self.pairs[a] = b
+        self.pairs[b] = a
+
+    async def unpair(self, user_id):
+        partner = self.pairs.pop(user_id, None)
+        if partner is not None and self.pairs.get(partner) == user_id:
+            del self.pairs[partner]
+        return partner
+
+    async def get_partner(self, user_id):
+        return self.pairs.get(user_id)
+
+    # --- QUEUES ---
+    async def add_agent(self, user_id, languages):
+        self.matchmaking.add_agent(user_id, languages)
+
+    async def claim_agent(self, lang):
+        return self.matchmaking.claim_agent(lang)
+
+    async def remove_agent(self, user_id):
+        self.matchmaking.remove_agent(user_id)
+
+    async def enqueue_customer(self, user_id, lang):
+        return self.matchmaking.enqueue_customer(user_id, lang)
+
+    async def claim_customer(self, languages):
+        return self.matchmaking.claim_customer(languages)
+
+    async def remove_customer(self, user_id):
+        self.matchmaking.remove_customer(user_id)
+
+    async def queue_position(self, user_id):
+        return self.matchmaking.position(user_id)
+
+    async def stats(self):
+        return self.matchmaking.stats()
+
+    # --- MESSAGING ---
+    async def publish(self, worker: str, envelope: bytes):
+        if self._handler is not None:
+            await self._handler(envelope)
+
+
+class RedisSessionBackend:
+    """
+    Shared state in Redis so customers and agents on different uvicorn
+    workers (or nodes) can be paired:
+        {prefix}:user:{id}          hash  role / lang / worker / languages
+        {prefix}:pairs              hash  user -> partner (both directions)
+        {prefix}:waiting            zset  all waiting customers, score = arrival seq
+        {prefix}:waiting:{lang}     zset  per-language queue (ZRANK = position)
+        {prefix}:waiting_lang       hash  customer -> queue language
+        {prefix}:agents             zset  idle agents, score = idle-since seq
+        {prefix}:agents:{lang}      zset  idle agents who speak {lang}
+        {prefix}:agent_langs        hash  agent -> languages
+        {prefix}:wait               hash  per-language wait estimator state
+    Same routing rules as MatchmakingEngine. ZREM on the global set is the
+    claim: whoever removes the member owns the match, so two workers can't
+    take the same agent or customer.
+    Each worker subscribes to {prefix}:worker:{worker_id}; messages for a
+    user on another worker are published to that worker's channel.
+    """
+    name = "redis"
+    CLAIM_RETRIES = 8
+
+    def __init__(self, url: str = None, prefix: str = None, client=None, strict_language: bool = None):
+        if client is None:
+            import redis.asyncio as aioredis
+            client = aioredis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        self.client = client
+        self.prefix = prefix or os.getenv("SESSION_KEY_PREFIX", "vc")
+        self.strict = strict_language if strict_language is not None else os.getenv("MATCH_STRICT_LANGUAGE", "0") == "1"
+        self.estimator = WaitEstimator(float(os.getenv("MATCH_WAIT_EWMA_ALPHA", "0.2")))
+        self._pubsub = None
+        self._listener = None
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    def channel(self, worker: str):
+        return self._key("worker", worker)
+
+    async def start(self, worker_id: str, handler):
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.channel(worker_id))
+        self._listener = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler):
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                await handler(message["data"])
+            except Exception as e:
+                logger.error("Session broker error: %s", e)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self.client.aclose()
+
+    # --- USERS ---
+    async def add_user(self, user_id, role, lang, worker, languages=None):
+        await self.client.hset(self._key("user", user_id), mapping={
+            "role": role, "lang": lang, "worker": worker, "languages": ",".join(languages or [lang]),
+        })
+
+    async def remove_user(self, user_id):
+        await self.client.delete(self._key("user", user_id))
+
+    async def get_user(self, user_id):
+        data = await self.client.hgetall(self._key("user", user_id))
+        if not data:
+            return None
+        return {k.decode(): v.decode() for k, v in data.items()}
+
+    async def set_lang(self, user_id, lang):
+        key = self._key("user", user_id)
+        if await self.client.exists(key):
+            await self.client.hset(key, "lang", lang)
+
+    # --- PAIRS ---
+    async def pair(self, a, b):
+        await self.client.hset(self._key("pairs"), mapping={a: b, b: a})
+
+    async def unpair(self, user_id):
+        partner = await self.client.hget(self._key("pairs"), user_id)
+        if partner is None:
+            return None
+        partner = partner.decode()
+        # Don't break a newer pairing the partner may already be in
+        if await self.client.hget(self._key("pairs"), partner) == user_id.encode():
+            await self.client.hdel(self._key("pairs"), user_id, partner)
+        else:
+            await self.client.hdel(self._key("pairs"), user_id)
+        return partner
+
+    async def get_partner(self, user_id):
+        partner = await self.client.hget(self._key("pairs"), user_id)
+        return partner.decode() if partner is not None else None
+
+    # --- QUEUES ---
+    async def _head(self, key):
+        head = await self.client.zrange(key, 0, 0, withscores=True)
+        return (head[0][0].decode(), head[0][1]) if head else None
+
+    async def add_agent(self, user_id, languages):
+        await self.remove_agent(user_id)
+        seq = await self.client.incr(self._key("seq"))
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._key("agents"), {user_id: seq})
+            for lang in languages:
+                pipe.zadd(self._key("agents", lang), {user_id: seq})
+            pipe.hset(self._key("agent_langs"), user_id, ",".join(languages))
+            await pipe.execute()
+
+    async def _drop_agent_pools(self, user_id):
+        languages = await self.client.hget(self._key("agent_langs"), user_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            for lang in (languages.decode().split(",") if languages else ()):
+                pipe.zrem(self._key("agents", lang), user_id)
+            pipe.hdel(self._key("agent_langs"), user_id)
+            await pipe.execute()
+
+    async def claim_agent(self, lang):
+        lang = queue_language(lang)
+        for _ in range(self.CLAIM_RETRIES):
+            head = await self._head(self._key("agents", lang))
+            if head is None:
+                if self.strict and lang != ANY_LANGUAGE:
+                    return None
+                popped = await self.client.zpopmin(self._key("agents"))
+                if not popped:
+                    return None
+                user_id = popped[0][0].decode()
+            else:
+                user_id = head[0]
+                if not await self.client.zrem(self._key("agents"), user_id):
+                    await self.client.zrem(self._key("agents", lang), user_id)  # claimed elsewhere
+                    continue
+            await self._drop_agent_pools(user_id)
+            await self._record_match(lang)
+            return user_id
+        return None
+
+    async def remove_agent(self, user_id):
+        await self.client.zrem(self._key("agents"), user_id)
+        await self._drop_agent_pools(user_id)
+
+    async def enqueue_customer(self, user_id, lang):
+        lang = queue_language(lang)
+        await self.remove_customer(user_id)
+        seq = await self.client.incr(self._key("seq"))
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._key("waiting"), {user_id: seq})
+            pipe.zadd(self._key("waiting", lang), {user_id: seq})
+            pipe.hset(self._key("waiting_lang"), user_id, lang)
+            pipe.zrank(self._key("waiting", lang), user_id)
+            results = await pipe.execute()
+        return results[-1]
+
+    async def _drop_customer(self, user_id):
+        lang = await self.client.hget(self._key("waiting_lang"), user_id)
+        if lang is None:
+            return None
+        lang = lang.decode()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key("waiting", lang), user_id)
+            pipe.hdel(self._key("waiting_lang"), user_id)
+            await pipe.execute()
+        return lang
+
+    async def claim_customer(self, languages):
+        for _ in range(self.CLAIM_RETRIES):
+            best = None
+            for lang in list(languages) + [ANY_LANGUAGE]:
+                head = await self._head(self._key("waiting", lang))
+                if head and (best is None or head[1] < best[1]):
+                    best = head
+            if best is None:
+                if self.strict:
+                    return None
+                popped = await self.client.zpopmin(self._key("waiting"))
+                if not popped:
+                    return None
+                user_id = popped[0][0].decode()
+            else:
+                user_id = best[0]
+                if not await self.client.zrem(self._key("waiting"), user_id):
+                    continue  # claimed by another worker
+            lang = await self._drop_customer(user_id)
+            await self._record_match(lang or ANY_LANGUAGE)
+            return user_id
+        return None
+
+    async def remove_customer(self, user_id):
+        await self.client.zrem(self._key("waiting"), user_id)
+        await self._drop_customer(user_id)
+
+    async def queue_position(self, user_id):
+        lang = await self.client.hget(self._key("waiting_lang"), user_id)
+        if lang is None:
+            return None
+        lang = lang.decode()
+        position = await self.client.zrank(self._key("waiting", lang), user_id)
+        if position is None:
+            return None
+        state = await self.client.hget(self._key("wait"), lang)
+        return position, self.estimator.estimate(json.loads(state) if state else None, position)
+
+    async def _record_match(self, lang):
+        # Read-modify-write without a lock: a lost update only skews the estimate
+        state = await self.client.hget(self._key("wait"), lang)
+        backlog = await self.client.zcard(self._key("waiting", lang)) > 0
+        state = self.estimator.advance(json.loads(state) if state else {}, time.time(), backlog)
+        await self.client.hset(self._key("wait"), lang, json.dumps(state))
+
+    async def stats(self):
+        return {
+            "waiting": await self.client.zcard(self._key("waiting")),
+            "idle_agents": await self.client.zcard(self._key("agents")),
+        }
+
+    # --- MESSAGING ---
+    async def publish(self, worker: str, envelope: bytes):
+        await self.client.publish(self.channel(worker), envelope)
+
+
+def create_session_backend():
+    """SESSION_BACKEND=memory (single worker, default) | redis (REDIS_URL)."""
+    kind = os.getenv("SESSION_BACKEND", "memory")
+    if kind == "redis":
+        return RedisSessionBackend()
+    return InMemorySessionBackend()
@@ -0,0 +1,261 @@
+#Signed session tokens: validated from memory (HMAC + dict lookups), revocations shared through SQLite.
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from app.services.cache import SQLiteTier
+
+TOKEN_VERSION = "v1"
+GUEST_NAME_MAX = 32
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def load_secret(path: str = None) -> bytes:
+    """
+    AUTH_SECRET, else a key file shared by every worker on this host
+    (created once with O_EXCL, so concurrent workers agree on one key).
+    """
+    secret = os.getenv("AUTH_SECRET")
+    if secret:
+        return secret.encode("utf-8")
+    path = path or os.getenv("AUTH_SECRET_FILE", ".auth_secret")
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    except FileExistsError:
+        pass
+    with open(path, "r") as f:
+        return f.read().strip().encode("utf-8")
+
+
+class TokenStore:
+    """
+    Tokens are `v1.<payload>.<signature>` (HMAC-SHA256, payload = sub/role/iat/exp/jti).
+    validate() is signature, expiry, then two dict lookups (revoked token ids,
+    per-user cutoff set by block/logout-everywhere).
+
+    - sessions: TTL index of tokens issued by this process (insertion order ==
+      expiry order, so purging expired entries pops from the head).
+    - Revocations are written through to a SQLite tier (TOKEN_DB, shared by
+      the workers on this host; empty disables it) and loaded at startup.
+      At most once per TOKEN_REFRESH_S, validate() checks PRAGMA data_version
+      (a counter, not a scan) and reloads when another worker has committed a
+      logout or block since, so it applies everywhere within that interval,
+      not after a restart. Between checks validation never touches SQLite.
+    """
+    def __init__(self, secret: bytes = None, ttl: float = None, persist_path: str = None, clock=time.time,
+                 refresh_interval: float = None):
+        self.secret = secret or load_secret()
+        self.ttl = ttl or float(os.getenv("AUTH_TOKEN_TTL", str(12 * 3600)))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.sessions = OrderedDict()  # jti -> (sub, role, exp)
+        self.revoked = {}              # jti -> exp
+        self.user_cutoff = {}          # sub -> issued-before timestamp
+        self._revoked_purge_at = 1024
+
+        persist_path = persist_path if persist_path is not None else os.getenv("TOKEN_DB", "tokens.db")
+        # No row cap: dropping a live revocation would re-admit its token
+        self.disk = SQLiteTier(persist_path, table="revocations", clock=self.clock) if persist_path else None
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv("TOKEN_REFRESH_S", "1.0"))
+        self._data_version = None
+        self._refresh_at = float("-inf")
+        if self.disk is not None:
+            self._load_revocations()
+
+        # Counters
+        self.issued = 0
+        self.rejected = 0
+
+    # --- ISSUE / VALIDATE ---
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, sub: str, role: str) -> dict:
+        now = self.clock()
+        claims = {"sub": sub, "role": role, "iat": now, "exp": now + self.ttl, "jti": secrets.token_hex(8)}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        token = f"{TOKEN_VERSION}.{payload}.{self._sign(payload)}"
+        with self._lock:
+            self._purge(now)
+            self.sessions[claims["jti"]] = (sub, role, claims["exp"])
+            self.issued += 1
+        return {"token": token, "expires_at": claims["exp"]}
+
+    def validate(self, token: str):
+        """Claims dict, or None if the token is malformed, forged, expired or revoked."""
+        claims = self._decode(token)
+        if claims is None:
+            self.rejected += 1
+        return claims
+
+    def _decode(self, token: str):
+        if not token:
+            return None
+        parts = token.split(".")
+        if len(parts) != 3 or parts[0] != TOKEN_VERSION:
+            return None
+        try:
+            # Inside the try: a non-ASCII token (raw from ?token=) fails encode / compare_digest
+            if not hmac.compare_digest(parts[2].encode("ascii"), self._sign(parts[1]).encode("ascii")):
+                return None
+            claims = json.loads(_b64decode(parts[1]))
+            now = self.clock()
+            if claims["exp"] <= now:
+                return None
+            self._refresh(now)
+            if claims["jti"] in self.revoked:
+                return None
+            if claims["iat"] < self.user_cutoff.get(claims["sub"], float("-inf")):
+                return None
+        except (ValueError, KeyError, TypeError):  # UnicodeError is a ValueError
+            return None
+        return claims
+
+    def authorize(self, token: str, role: str, user_id: str):
+        """
+        WebSocket handshake check: the token must belong to `user_id` and allow
+        `role` (admins may also join as employees). Claims or None.
+        """
+        if role not in ("customer", "employee"):
+            self.rejected += 1
+            return None
+        claims = self.validate(token)
+        if claims is None:
+            return None
+        if claims["sub"] != user_id:
+            self.rejected += 1
+            return None
+        if claims["role"] == role or (role == "employee" and claims["role"] == "admin"):
+            return claims
+        self.rejected += 1
+        return None
+
+    # --- REVOCATION ---
+    def revoke(self, token: str) -> bool:
+        """Logout: this token only."""
+        claims = self._decode(token)
+        if claims is None:
+            return False
+        with self._lock:
+            self.revoked[claims["jti"]] = claims["exp"]
+            self.sessions.pop(claims["jti"], None)
+        if self.disk is not None:
+            self.disk.set(f"jti:{claims['jti']}", "", claims["exp"])
+        return True
+
+    def revoke_user(self, sub: str):
+        """Block: every token issued to `sub` until now."""
+        now = self.clock()
+        with self._lock:
+            self.user_cutoff[sub] = now
+            for jti in [jti for jti, session in self.sessions.items() if session[0] == sub]:
+                del self.sessions[jti]
+        if self.disk is not None:
+            # Nothing issued before the cutoff outlives it by more than one TTL
+            self.disk.set(f"user:{sub}", str(now), now + self.ttl)
+
+    def _load_revocations(self):
+        # Read the version first: a commit landing during the read triggers another reload
+        self._data_version = self.disk.data_version()
+        rows = self.disk.items(self.clock())
+        with self._lock:
+            for key, value, expires in rows:
+                kind, _, ident = key.partition(":")
+                if kind == "jti":
+                    self.revoked[ident] = expires
+                elif kind == "user":
+                    self.user_cutoff[ident] = max(float(value), self.user_cutoff.get(ident, float("-inf")))
+
+    def _refresh(self, now: float):
+        if self.disk is None or now < self._refresh_at:
+            return
+        self._refresh_at = now + self.refresh_interval
+        if self.disk.data_version() != self._data_version:
+            self._load_revocations()
+
+    def _purge(self, now: float):
+        while self.sessions:
+            jti, (_, _, exp) = next(iter(self.sessions.items()))
+            if exp > now:
+                break
+            del self.sessions[jti]
+        # Revoked ids only matter until their token would have expired anyway
+        if len(self.revoked) > self._revoked_purge_at:
+            self.revoked = {jti: exp for jti, exp in self.revoked.items() if exp > now}
+            self._revoked_purge_at = max(1024, 2 * len(self.revoked))
+
+    def stats(self) -> dict:
+        return {
+            "active_sessions": len(self.sessions),
+            "revoked": len(self.revoked),
+            "issued": self.issued,
+            "rejected": self.rejected,
+            "guest_rate_limited": guest_limiter.limited,
+        }
+
+
+class GuestRateLimiter:
+    """
+    Token bucket per client address for /auth/guest (anonymous, so the only
+    thing to key on). Bounded: the least recently seen addresses are dropped.
+    """
+    def __init__(self, rate: float = None, burst: int = None, max_clients: int = 10000, clock=time.monotonic):
+        self.rate = rate if rate is not None else float(os.getenv("GUEST_RATE", "0.2"))
+        self.burst = burst if burst is not None else int(os.getenv("GUEST_BURST", "5"))
+        self.max_clients = max_clients
+        self.clock = clock
+        self.limited = 0
+        self._buckets = OrderedDict()  # client -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def allow(self, client: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.pop(client, None) or [float(self.burst), now]
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                self.limited += 1
+                return False
+            bucket[0] -= 1.0
+            return True
+
+
+def clean_guest_name(name: str) -> str:
+    """Display name: letters (with their marks), digits, spaces and -_. only, at most GUEST_NAME_MAX chars."""
+    kept = "".join(ch for ch in name if unicodedata.category(ch)[0] in "LMN" or ch in " -_.")
+    return " ".join(kept.split())[:GUEST_NAME_MAX].strip()
+
+
+def guest_user_id(name: str) -> str:
+    """
+    Server-chosen customer id: an ASCII slug of the display name (it ends up in
+    the WebSocket path, logs and backend keys) plus a random suffix nobody can predict.
+    """
+    slug = re.sub(r"[^A-Za-z0-9_]+", "-", name).strip("-")[:GUEST_NAME_MAX] or "guest"
+    return f"{slug}-{secrets.token_hex(4)}"
+
+
+# Global Instances
+token_store = TokenStore()
+guest_limiter = GuestRateLimiter()
@@ -0,0 +1,172 @@
+#User accounts: in-memory index for reads, write-through to SQLite (WAL). One-time import of users.json.
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# "password" holds a scrypt hash (app.credentials); plaintext values are
+# upgraded on the user's next successful login.
+DEFAULT_USERS = {"admin": {"password": "admin", "role": "admin", "approved": True}}
+
+
+class MemoryUserStore:
+    """
+    Dict-backed store. All reads are O(1) lookups in the index; subclasses
+    persist each write before it becomes visible. Records are copied in and
+    out so callers can't mutate the index by accident.
+    """
+    def __init__(self, users: dict = None):
+        self._lock = threading.RLock()
+        self._users = {}
+        for username, record in (users if users is not None else DEFAULT_USERS).items():
+            self._users[username] = self._normalize(record)
+
+    @staticmethod
+    def _normalize(record: dict) -> dict:
+        return {
+            "password": record["password"],
+            "role": record.get("role", "employee"),
+            "approved": bool(record.get("approved", False)),
+        }
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, username):
+        return username in self._users
+
+    def get(self, username: str):
+        with self._lock:
+            self._refresh()
+            record = self._users.get(username)
+        return dict(record) if record is not None else None
+
+    def items(self):
+        """Snapshot of (username, record) pairs."""
+        with self._lock:
+            self._refresh()
+            return [(username, dict(record)) for username, record in self._users.items()]
+
+    def create(self, username: str, record: dict) -> bool:
+        """False if the user already exists."""
+        record = self._normalize(record)
+        with self._lock:
+            self._refresh()
+            if username in self._users:
+                return False
+            self._persist_create(username, record)
+            self._users[username] = record
+            return True
+
+    def update(self, username: str, **fields) -> bool:
+        """False if the user doesn't exist."""
+        with self._lock:
+            self._refresh()
+            current = self._users.get(username)
+            if current is None:
+                return False
+            record = dict(current, **fields)
+            self._persist_update(username, record)
+            self._users[username] = record
+            return True
+
+    # --- PERSISTENCE HOOKS ---
+    def _refresh(self):
+        pass
+
+    def _persist_create(self, username, record):
+        pass
+
+    def _persist_update(self, username, record):
+        pass
+
+
+class SQLiteUserStore(MemoryUserStore):
+    """
+    The whole table is loaded into the index once at startup (user counts are
+    small); every write is committed to SQLite before the index changes, so a
+    crash never leaves the index ahead of disk. WAL lets readers of the file
+    (admin tools, other workers) proceed during writes.
+    Commits from other processes (another uvicorn worker approving a user)
+    are noticed through PRAGMA data_version, a counter check rather than a
+    scan, and trigger a reload of the index.
+    If the table is empty, users.json is imported once (recorded in `meta`).
+    """
+    def __init__(self, path: str, legacy_json: str = None):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "username TEXT PRIMARY KEY, password TEXT NOT NULL, role TEXT NOT NULL, approved INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        self._migrate(legacy_json)
+        super().__init__(self._load())
+
+    def _load(self) -> dict:
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        rows = self._conn.execute("SELECT username, password, role, approved FROM users").fetchall()
+        return {
+            username: {"password": password, "role": role, "approved": bool(approved)}
+            for username, password, role, approved in rows
+        }
+
+    def _refresh(self):
+        if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._users = self._load()
+
+    def _migrate(self, legacy_json):
+        if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            return
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone():
+            return
+        source = "defaults"
+        users = DEFAULT_USERS
+        if legacy_json and os.path.exists(legacy_json):
+            with open(legacy_json, "r") as f:
+                users = json.load(f)
+            source = os.path.abspath(legacy_json)
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO users (username, password, role, approved) VALUES (?, ?, ?, ?)",
+                [
+                    (username, rec["password"], rec.get("role", "employee"), int(bool(rec.get("approved", False))))
+                    for username, rec in users.items()
+                ],
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)", (source,))
+        logger.info("User store: imported %d users from %s", len(users), source)
+
+    def _persist_create(self, username, record):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO users (username, password, role, approved) VALUES (?, ?, ?, ?)",
+                (username, record["password"], record["role"], int(record["approved"])),
+            )
+
+    def _persist_update(self, username, record):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE users SET password = ?, role = ?, approved = ? WHERE username = ?",
+                (record["password"], record["role"], int(record["approved"]), username),
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+def create_user_store():
+    """USER_STORE=sqlite (USER_DB, default users.db; imports USERS_FILE once) | memory."""
+    kind = os.getenv("USER_STORE", "sqlite")
+    if kind == "memory":
+        return MemoryUserStore()
+    return SQLiteUserStore(os.getenv("USER_DB", "users.db"), legacy_json=os.getenv("USERS_FILE", "users.json"))
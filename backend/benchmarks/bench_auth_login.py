@@ -0,0 +1,117 @@
+"""
+Load test: thousands of concurrent /auth/login requests (shift-start burst).
+
+Drives the real auth router in-process over ASGI (no network), with
+CONCURRENCY logins in flight at once against USERS seeded accounts, and
+compares:
+  - json:   the old behaviour (users.json re-read and parsed on every request)
+  - sqlite: SQLiteUserStore (in-memory index, WAL write-through)
+Also runs a mixed phase where 5% of requests are /register writes.
+
+Run from backend/:
+    python -m benchmarks.bench_auth_login
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("USER_STORE", "memory")  # importing auth must not touch ./users.db
+
+import httpx
+from fastapi import FastAPI
+
+from app import auth
+from app.user_store import MemoryUserStore, SQLiteUserStore
+
+USERS = 2000
+LOGINS = 5000
+CONCURRENCY = 500
+
+
+class LegacyJSONStore(MemoryUserStore):
+    """Old load_users()/save_users(): whole-file read per lookup, whole-file rewrite per write."""
+    def __init__(self, path):
+        super().__init__({})
+        self.path = path
+
+    def _read(self):
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def get(self, username):
+        return self._read().get(username)
+
+    def items(self):
+        return list(self._read().items())
+
+    def create(self, username, record):
+        users = self._read()
+        if username in users:
+            return False
+        users[username] = self._normalize(record)
+        with open(self.path, "w") as f:
+            json.dump(users, f, indent=2)
+        return True
+
+
+def seed(path):
+    users = {"admin": {"password": "admin", "role": "admin", "approved": True}}
+    for i in range(USERS):
+        users[f"agent{i}"] = {"password": f"pw{i}", "role": "employee", "approved": True}
+    with open(path, "w") as f:
+        json.dump(users, f, indent=2)
+
+
+async def storm(app, write_ratio=0.0):
+    transport = httpx.ASGITransport(app=app)
+    sem = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            nonlocal failures
+            async with sem:
+                start = time.perf_counter()
+                if write_ratio and i % int(1 / write_ratio) == 0:
+                    resp = await client.post("/auth/register", json={"username": f"new{i}", "password": "pw"})
+                else:
+                    n = i % USERS
+                    resp = await client.post("/auth/login", json={"username": f"agent{n}", "password": f"pw{n}"})
+                latencies.append(time.perf_counter() - start)
+                failures += resp.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(LOGINS)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], failures
+
+
+def main():
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "users.json")
+        print(f"{LOGINS} logins, {CONCURRENCY} in flight, {USERS} users")
+        for phase, ratio in [("logins", 0.0), ("5% writes", 0.05)]:
+            db_path = os.path.join(tmp, f"users_{ratio}.db")
+            for name, make_store in [
+                ("json", lambda: LegacyJSONStore(legacy_path)),
+                ("sqlite", lambda: SQLiteUserStore(db_path, legacy_json=legacy_path)),
+            ]:
+                seed(legacy_path)
+                auth.user_store = make_store()
+                elapsed, p50, p99, failures = asyncio.run(storm(app, ratio))
+                print(f"{phase:<10} {name:<7} {LOGINS / elapsed:8,.0f} req/s   "
+                      f"p50 {p50 * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms   failures {failures}")
+
+
+if __name__ == "__main__":
+    main()
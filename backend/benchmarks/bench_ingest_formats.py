@@ -0,0 +1,97 @@
+"""
+Benchmark: mic ingest bandwidth and server decode cost per format.
+
+SECONDS of synthetic speech-like audio (tone + noise) is framed the way
+clients send it and pushed through IngestDecoder:
+  - legacy f32:  bare float32 at 16 kHz, 2048-sample frames (old frontend)
+  - s16:         framed int16 at 16 kHz, 2048-sample frames (current frontend)
+  - s16 @48k:    framed int16 at 48 kHz (server-side resampling)
+  - opus 24k:    20 ms raw Opus packets at 24 kbit/s (libopus, if available)
+Reports upstream bytes per second of audio and decode time per second of audio.
+
+Run from backend/:
+    python -m benchmarks.bench_ingest_formats
+"""
+import os
+import sys
+import time
+
+import av
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audio_ingest import IngestDecoder
+from app.services.audio_protocol import pack_ingest_frame, CODEC_PCM_S16, CODEC_OPUS
+
+SECONDS = 30
+FRAME = 2048
+
+
+def signal(rate):
+    rng = np.random.default_rng(0)
+    t = np.arange(SECONDS * rate) / rate
+    audio = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return (audio + 0.02 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def pcm_frames(rate, framed):
+    audio = signal(rate)
+    frames = []
+    for seq, start in enumerate(range(0, len(audio), FRAME)):
+        chunk = audio[start:start + FRAME]
+        if framed:
+            frames.append(pack_ingest_frame(seq, CODEC_PCM_S16, rate, (chunk * 32767).astype("<i2").tobytes()))
+        else:
+            frames.append(chunk.tobytes())
+    return frames
+
+
+def opus_frames():
+    try:
+        encoder = av.CodecContext.create("libopus", "w")
+    except Exception:
+        return None
+    encoder.sample_rate = 48000
+    encoder.layout = "mono"
+    encoder.format = "flt"
+    encoder.bit_rate = 24000
+    encoder.open()
+    audio = signal(48000)
+    packets = []
+    for start in range(0, len(audio), 960):
+        frame = av.AudioFrame.from_ndarray(audio[start:start + 960].reshape(1, -1), format="flt", layout="mono")
+        frame.sample_rate = 48000
+        frame.pts = start
+        packets.extend(bytes(p) for p in encoder.encode(frame))
+    return [pack_ingest_frame(seq, CODEC_OPUS, 48000, p) for seq, p in enumerate(packets)]
+
+
+def run(frames):
+    decoder = IngestDecoder()
+    start = time.perf_counter()
+    samples = sum(len(decoder.decode(f)) for f in frames)
+    elapsed = time.perf_counter() - start
+    return sum(len(f) for f in frames), samples, elapsed
+
+
+def main():
+    print(f"{SECONDS} s of audio per format")
+    cases = [
+        ("legacy f32", pcm_frames(16000, framed=False)),
+        ("s16", pcm_frames(16000, framed=True)),
+        ("s16 @48k", pcm_frames(48000, framed=True)),
+        ("opus 24k", opus_frames()),
+    ]
+    for name, frames in cases:
+        if frames is None:
+            print(f"{name:<11} skipped (no libopus encoder in this av build)")
+            continue
+        total_bytes, samples, elapsed = run(frames)
+        print(f"{name:<11} {total_bytes / SECONDS / 1024:7.1f} KB/s up   {len(frames) / SECONDS:5.1f} frames/s   "
+              f"decode {elapsed / SECONDS * 1000:6.2f} ms per audio second   "
+              f"({elapsed / len(frames) * 1e6:6.1f} us/frame, {samples / 16000:5.1f} s out)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: per-frame overhead of logging in the audio receive loop.
+
+Replays the log calls main.py makes while streaming (one per frame for 50
+concurrent sessions) inside an asyncio loop and reports the time spent per
+frame for:
+  - legacy:      f-string logger.info with FileHandler + StreamHandler on the loop
+  - queue/INFO:  queue logger, hot-path DEBUG disabled (the production default)
+  - queue/DEBUG: queue logger, DEBUG enabled (rate-limited per session)
+  - queue/JSON:  as above, structured JSON records
+
+Output goes to a temp dir, not the terminal.
+
+Run from backend/:
+    python -m benchmarks.bench_logging
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.logging_setup import setup_logging, stop_logging, logging_stats
+
+SESSIONS = 50
+FRAMES = 20000
+
+logger = logging.getLogger("bench")
+
+
+def legacy_setup(path):
+    root = logging.getLogger()
+    root.handlers = [logging.FileHandler(path), logging.StreamHandler(open(path + ".stdout", "w"))]
+    for handler in root.handlers:
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    root.setLevel(logging.INFO)
+
+
+def legacy_teardown():
+    root = logging.getLogger()
+    for handler in root.handlers:
+        handler.close()
+    root.handlers = []
+
+
+async def frame_loop(legacy: bool):
+    """Returns per-frame times (seconds)."""
+    times = []
+    for i in range(FRAMES):
+        session = f"user{i % SESSIONS}"
+        lang = "kn"
+        start = time.perf_counter()
+        if legacy:
+            logger.info(f"Previewing with Lang: {lang} (User Req: {lang})")
+        else:
+            logger.debug("Previewing with Lang: %s (User Req: %s)", lang, lang,
+                         extra={"session": session, "lang": lang})
+        await asyncio.sleep(0)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times):
+    times = sorted(times)
+    mean = sum(times) / len(times) * 1e6
+    p99 = times[int(len(times) * 0.99)] * 1e6
+    print(f"{name:<14} mean {mean:7.2f} us/frame   p99 {p99:7.2f} us")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "app.log")
+
+        legacy_setup(log_path)
+        report("legacy", asyncio.run(frame_loop(legacy=True)))
+        legacy_teardown()
+
+        for name, level, json_format in [
+            ("queue/INFO", "INFO", False),
+            ("queue/DEBUG", "DEBUG", False),
+            ("queue/JSON", "DEBUG", True),
+        ]:
+            setup_logging(level=level, log_file=log_path, json_format=json_format, console=False)
+            report(name, asyncio.run(frame_loop(legacy=False)))
+            stop_logging()
+
+        print(f"Logging stats: {logging_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: event-loop latency during a login storm.
+
+A probe task sleeps PROBE_MS in a loop and records how late it wakes up
+(that lateness is what every WebSocket on the worker would see), while
+LOGINS concurrent logins verify scrypt hashes:
+  - inline:   verify_password() called directly in the coroutine
+  - executor: CredentialService (bounded KDF pool)
+  - cached:   the same logins again (reconnects), served from the verified cache
+
+Run from backend/:
+    python -m benchmarks.bench_login_storm
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.credentials import CredentialService, hash_password, verify_password
+
+USERS = 50
+LOGINS = 200
+PROBE_MS = 5
+
+
+async def probe(lags, stop):
+    interval = PROBE_MS / 1000.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def storm(login):
+    lags = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_MS / 1000.0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(i % USERS) for i in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    assert all(results)
+    lags.sort()
+    return elapsed, lags[len(lags) // 2], lags[int(len(lags) * 0.99)], lags[-1]
+
+
+def main():
+    service = CredentialService(max_pending=LOGINS)
+    hashes = [hash_password(f"pw{i}", n=service.n) for i in range(USERS)]
+
+    async def inline(i):
+        return verify_password(f"pw{i}", hashes[i])
+
+    async def executor(i):
+        return (await service.verify(f"agent{i}", f"pw{i}", hashes[i]))[0]
+
+    print(f"{LOGINS} logins over {USERS} users, scrypt n={service.n}, {service.workers} KDF workers")
+    for name, login in [("inline", inline), ("executor", executor), ("cached", executor)]:
+        if name == "executor":
+            service.clear_cache()
+        elapsed, p50, p99, worst = asyncio.run(storm(login))
+        print(f"{name:<9} {LOGINS / elapsed:8,.0f} logins/s   loop lag p50 {p50 * 1000:7.2f} ms   "
+              f"p99 {p99 * 1000:7.2f} ms   max {worst * 1000:7.2f} ms")
+    print(service.stats())
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
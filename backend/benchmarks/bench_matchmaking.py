@@ -0,0 +1,96 @@
+"""
+Benchmark: matchmaking under a queue spike.
+
+10k customers queue up (5 languages), then a churn phase mixes random
+customer disconnects, new arrivals, and agents freeing up and taking the
+next customer. Compares the old list-based ConnectionManager logic
+(pop(0), list.remove, rebuilding waiting_queue on every disconnect) with
+MatchmakingEngine. Also samples queue-position lookups.
+
+Run from backend/:
+    python -m benchmarks.bench_matchmaking
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.matchmaking import MatchmakingEngine
+
+QUEUED = 10_000
+CHURN_OPS = 20_000
+LANGS = ["kn", "hi", "ta", "te", "en"]
+
+
+class LegacyLists:
+    """What ConnectionManager used to do, minus the sockets."""
+    def __init__(self):
+        self.waiting_queue = []
+        self.available_employees = []
+
+    def enqueue_customer(self, cid, lang):
+        self.waiting_queue.append((cid, None, lang))
+
+    def remove_customer(self, cid):
+        if cid in self.available_employees:
+            self.available_employees.remove(cid)
+        self.waiting_queue = [x for x in self.waiting_queue if x[0] != cid]
+
+    def claim_customer(self, languages):
+        return self.waiting_queue.pop(0)[0] if self.waiting_queue else None
+
+    def position(self, cid):
+        for i, entry in enumerate(self.waiting_queue):
+            if entry[0] == cid:
+                return i
+        return None
+
+
+def workload(seed=1):
+    rng = random.Random(seed)
+    ops = [("enqueue", f"c{i}", rng.choice(LANGS)) for i in range(QUEUED)]
+    live = [op[1] for op in ops]
+    next_id = QUEUED
+    for _ in range(CHURN_OPS):
+        roll = rng.random()
+        if roll < 0.35 and live:
+            ops.append(("disconnect", live.pop(rng.randrange(len(live))), None))
+        elif roll < 0.7:
+            cid = f"c{next_id}"
+            next_id += 1
+            live.append(cid)
+            ops.append(("enqueue", cid, rng.choice(LANGS)))
+        elif roll < 0.9:
+            ops.append(("agent_free", None, rng.sample(LANGS, 2)))
+        elif live:
+            ops.append(("position", rng.choice(live), None))
+    return ops
+
+
+def run(impl, ops):
+    start = time.perf_counter()
+    matched = 0
+    for op, cid, arg in ops:
+        if op == "enqueue":
+            impl.enqueue_customer(cid, arg)
+        elif op == "disconnect":
+            impl.remove_customer(cid)
+        elif op == "agent_free":
+            matched += impl.claim_customer(arg) is not None
+        else:
+            impl.position(cid)
+    return time.perf_counter() - start, matched
+
+
+def main():
+    ops = workload()
+    print(f"{QUEUED} queued customers + {CHURN_OPS} churn ops ({len(ops)} total)")
+    for name, impl in [("legacy lists", LegacyLists()), ("engine", MatchmakingEngine(strict_language=False))]:
+        elapsed, matched = run(impl, ops)
+        print(f"{name:<14} {elapsed * 1000:9.1f} ms   {len(ops) / elapsed:12,.0f} ops/s   matched {matched}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: accuracy vs. speed for TRANSCRIBER_PRECISION = fp32 | bf16 | int8.
+
+Uses a fixed local audio set: every <name>.wav in BENCH_AUDIO_DIR
+(default benchmarks/audio) with a reference transcript in <name>.txt.
+The default set (Kannada customer-support phrases) ships as transcripts;
+`python -m benchmarks.fetch_precision_set` builds and pins its audio
+(SHA256SUMS), which is verified here before anything is measured.
+Reports WER and real-time factor (processing time / audio duration) per mode.
+Each mode runs in its own subprocess: the inference scheduler thread keeps a
+model alive, so in one process the next mode would be measured with both
+models resident.
+
+Run from backend/:
+    BENCH_LANG=kn python -m benchmarks.bench_precision [fp32 bf16 int8]
+"""
+import glob
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHILD_FLAG = "--child"
+MODES = [m for m in sys.argv[1:] if m != CHILD_FLAG] or ["fp32", "bf16", "int8"]
+AUDIO_DIR = os.getenv("BENCH_AUDIO_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio"))
+LANGUAGE = os.getenv("BENCH_LANG", "kn")
+
+import librosa
+
+from benchmarks.fetch_precision_set import read_sums, verify
+
+
+def word_errors(reference: str, hypothesis: str):
+    """(edit distance in words, reference word count)"""
+    ref, hyp = reference.split(), hypothesis.split()
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1], len(ref)
+
+
+def load_dataset():
+    items = []
+    for wav in sorted(glob.glob(os.path.join(AUDIO_DIR, "*.wav"))):
+        txt = os.path.splitext(wav)[0] + ".txt"
+        if not os.path.exists(txt):
+            continue
+        audio, _ = librosa.load(wav, sr=16000, mono=True)
+        with open(txt, encoding="utf-8") as f:
+            items.append((os.path.basename(wav), audio, f.read().strip()))
+    return items
+
+
+def run_mode(service, dataset):
+    service.transcribe_audio(dataset[0][1], language=LANGUAGE)  # warm-up (adapter load)
+
+    errors = words = 0
+    audio_seconds = compute_seconds = 0.0
+    for _, audio, reference in dataset:
+        t0 = time.perf_counter()
+        text, _ = service.transcribe_audio(audio, language=LANGUAGE)
+        compute_seconds += time.perf_counter() - t0
+        audio_seconds += len(audio) / 16000
+        e, n = word_errors(reference, text)
+        errors += e
+        words += n
+
+    wer = errors / words if words else 0.0
+    rtf = compute_seconds / audio_seconds if audio_seconds else 0.0
+    print(f"{service.precision:>5} | WER {wer * 100:6.2f}% | RTF {rtf:6.3f} | {audio_seconds:6.1f}s audio")
+
+
+def run_child(mode):
+    """One precision, one process: the module-level service is built with it."""
+    os.environ["TRANSCRIBER_PRECISION"] = mode
+    os.environ["TRANSCRIBER_BACKEND"] = "thread"
+    from app.services import transcriber
+    run_mode(transcriber.transcriber_service, load_dataset())
+
+
+if __name__ == "__main__":
+    if CHILD_FLAG in sys.argv:
+        run_child(MODES[0])
+        sys.exit(0)
+
+    changed = verify(AUDIO_DIR)
+    if changed:
+        print(f"Reference audio differs from SHA256SUMS: {', '.join(changed)}")
+        sys.exit(1)
+    dataset = load_dataset()
+    if not dataset:
+        print(f"No <name>.wav + <name>.txt pairs found in {AUDIO_DIR}")
+        print("Build the reference set first: python -m benchmarks.fetch_precision_set")
+        sys.exit(1)
+    if not read_sums(AUDIO_DIR):
+        print("Warning: reference audio is not pinned (no SHA256SUMS); runs may not be comparable.")
+    print(f"{len(dataset)} utterances, language={LANGUAGE}")
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for mode in MODES:
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_precision", CHILD_FLAG, mode], cwd=backend_dir, check=False)
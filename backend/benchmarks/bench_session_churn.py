@@ -0,0 +1,133 @@
+"""
+Benchmark: inference spent on audio nobody sees, under session churn.
+
+SESSIONS clients stream previews (one every PREVIEW_INTERVAL) at a shared
+single-worker model that needs MODEL_COST per request, so the queue is
+overloaded, and each client disconnects after a random lifetime. Compares:
+  - untracked: asyncio.create_task(run_preview(...)), nothing cancelled (old main.py)
+  - tracked:   SessionTasks (queued previews preempted by newer ones,
+               everything cancelled on disconnect)
+The model is a sleep on a worker thread with the same skip-if-cancelled
+contract as InferenceScheduler, so no weights are needed.
+
+Run from backend/:
+    python -m benchmarks.bench_session_churn
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.session_tasks import SessionTasks, await_inference
+
+SESSIONS = 40
+LIFETIME = (0.3, 1.5)   # seconds each client stays connected
+PREVIEW_INTERVAL = 0.05
+MODEL_COST = 0.02
+
+
+class SleepScheduler:
+    """One worker thread, FIFO, skips cancelled futures (like InferenceScheduler)."""
+    def __init__(self):
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self.busy_seconds = 0.0
+        self.skipped = 0
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self) -> Future:
+        fut = Future()
+        with self._cond:
+            self._queue.append(fut)
+            self._cond.notify()
+        return fut
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                fut = self._queue.popleft()
+            if not fut.set_running_or_notify_cancel():
+                self.skipped += 1
+                continue
+            time.sleep(MODEL_COST)
+            self.busy_seconds += MODEL_COST
+            fut.compute_seconds = MODEL_COST
+            fut.set_result("text")
+
+    def idle(self) -> bool:
+        with self._cond:
+            return not self._queue
+
+
+class Session:
+    def __init__(self, scheduler, tracked):
+        self.scheduler = scheduler
+        self.tracked = tracked
+        self.lock = asyncio.Lock()
+        self.inflight = None
+        self.connected = True
+        self.delivered = 0
+
+    async def preview(self):
+        async with self.lock:
+            self.inflight = self.scheduler.submit()
+            try:
+                if self.tracked:
+                    await await_inference(self.inflight)
+                else:
+                    await asyncio.wrap_future(self.inflight)
+            finally:
+                self.inflight = None
+            if self.connected:
+                self.delivered += 1
+
+
+async def client(scheduler, tracked, lifetime):
+    session = Session(scheduler, tracked)
+    tasks = SessionTasks("bench", session)
+    end = time.perf_counter() + lifetime
+    while time.perf_counter() < end:
+        if tracked:
+            tasks.start_preview(session.preview())
+        elif not session.lock.locked():
+            asyncio.create_task(session.preview())
+        await asyncio.sleep(PREVIEW_INTERVAL)
+    session.connected = False
+    if tracked:
+        await tasks.close()
+    return session.delivered
+
+
+async def run(tracked):
+    scheduler = SleepScheduler()
+    rng = random.Random(7)
+    start = time.perf_counter()
+    delivered = sum(await asyncio.gather(*(client(scheduler, tracked, rng.uniform(*LIFETIME)) for _ in range(SESSIONS))))
+    last_disconnect = time.perf_counter()
+    while not scheduler.idle():
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(MODEL_COST * 2)
+    drain = time.perf_counter() - last_disconnect
+    useful = delivered * MODEL_COST
+    return scheduler.busy_seconds, useful, scheduler.skipped, drain, time.perf_counter() - start
+
+
+def main():
+    print(f"{SESSIONS} sessions, preview every {PREVIEW_INTERVAL * 1000:.0f} ms, model {MODEL_COST * 1000:.0f} ms/request")
+    for name, tracked in [("untracked", False), ("tracked", True)]:
+        busy, useful, skipped, drain, total = asyncio.run(run(tracked))
+        print(f"{name:<10} model busy {busy:6.2f} s   useful {useful:6.2f} s   wasted {busy - useful:6.2f} s "
+              f"({(busy - useful) / busy * 100 if busy else 0:4.1f}%)   skipped in queue {skipped:4d}   "
+              f"busy after last disconnect {drain:5.2f} s")
+
+
+if __name__ == "__main__":
+    main()
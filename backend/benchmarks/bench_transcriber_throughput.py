@@ -0,0 +1,76 @@
+"""
+Benchmark: MMS transcription throughput under concurrent callers.
+
+Reports utterances/sec and p50/p99 latency at 1, 8 and 32 concurrent
+callers, all going through transcribe_async(): the shared InferenceScheduler,
+or the TranscriberPool workers with TRANSCRIBER_BACKEND=process.
+
+Run from backend/:
+    python -m benchmarks.bench_transcriber_throughput [path/to/audio.wav]
+(without a file, 3 s of synthetic audio is used)
+"""
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.transcriber import transcriber_service, TranscriberPool
+
+CONCURRENCY = [1, 8, 32]
+UTTERANCES_PER_CALLER = 4
+LANGUAGE = os.getenv("BENCH_LANG", "kn")
+
+
+def load_audio():
+    if len(sys.argv) > 1:
+        import librosa
+        audio, _ = librosa.load(sys.argv[1], sr=16000, mono=True)
+        return audio.astype(np.float32)
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(16000 * 3) * 0.05).astype(np.float32)
+
+
+async def caller(audio, latencies):
+    for _ in range(UTTERANCES_PER_CALLER):
+        t0 = time.perf_counter()
+        await transcriber_service.transcribe_async(audio, language=LANGUAGE)
+        latencies.append(time.perf_counter() - t0)
+
+
+def describe_backend():
+    if isinstance(transcriber_service, TranscriberPool):
+        return (f"process pool: {transcriber_service.workers} worker(s) "
+                f"x {transcriber_service.threads_per_worker} threads")
+    scheduler = transcriber_service.scheduler
+    return f"threads: {scheduler.num_threads} | max batch: {scheduler.max_batch}"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def main():
+    audio = load_audio()
+    if not transcriber_service.ready:
+        print("Transcriber not loaded.")
+        return
+    print(f"Audio: {len(audio) / 16000:.1f}s | {describe_backend()}")
+
+    # Warm-up (adapter load, allocator)
+    await transcriber_service.transcribe_async(audio, language=LANGUAGE)
+
+    for n in CONCURRENCY:
+        latencies = []
+        t0 = time.perf_counter()
+        await asyncio.gather(*(caller(audio, latencies) for _ in range(n)))
+        elapsed = time.perf_counter() - t0
+        print(f"{n:>3} callers | {len(latencies) / elapsed:6.2f} utt/s | "
+              f"p50 {percentile(latencies, 0.50) * 1000:8.1f} ms | p99 {percentile(latencies, 0.99) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
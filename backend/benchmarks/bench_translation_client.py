@@ -0,0 +1,81 @@
+"""
+Benchmark: translations/sec of the async pooled client at increasing concurrency.
+
+Runs against a local HTTP stand-in for Google Translate (fixed 20 ms latency),
+so numbers reflect client overhead, pooling and coalescing, not Google.
+
+Run from backend/:
+    python -m benchmarks.bench_translation_client
+"""
+import asyncio
+import html
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache import TTLCache
+from app.services.translator import TranslatorService, AsyncGoogleTranslateClient
+
+CONCURRENCY = [1, 8, 32, 128]
+REQUESTS_PER_LEVEL = 512
+UPSTREAM_LATENCY = 0.02
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        q = parse_qs(urlparse(self.path).query)
+        time.sleep(UPSTREAM_LATENCY)
+        body = f'<html><div class="result-container">[{q["tl"][0]}] {html.escape(q["q"][0])}</div></html>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/m"
+
+
+async def run_level(base_url, concurrency, same_text):
+    client = AsyncGoogleTranslateClient(base_url=base_url, max_connections=64, max_concurrency=64)
+    service = TranslatorService(async_backend=client, cache=TTLCache(max_entries=0))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            text = "Please wait" if same_text else f"Message number {i}"
+            await service.translate_async(text, "en", "kn")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(REQUESTS_PER_LEVEL)))
+    elapsed = time.perf_counter() - t0
+    await service.aclose()
+    label = "same text " if same_text else "unique    "
+    print(f"{label} | concurrency {concurrency:>4} | {REQUESTS_PER_LEVEL / elapsed:8.1f} translations/s | "
+          f"upstream calls {service.upstream_calls:>4} | coalesced {service.coalesced:>4}")
+
+
+async def main():
+    server, base_url = start_server()
+    try:
+        for same_text in (False, True):
+            for c in CONCURRENCY:
+                await run_level(base_url, c, same_text)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
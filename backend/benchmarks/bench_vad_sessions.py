@@ -0,0 +1,61 @@
+"""
+Benchmark: connect latency + memory vs. number of simultaneous sessions.
+
+Every WebSocket connection creates one AudioProcessor. With the shared
+VADEngine this should be ~constant time and ~zero extra RSS per session.
+
+Run from backend/:
+    python -m benchmarks.bench_vad_sessions
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audio_processor import AudioProcessor, vad_engine
+
+SESSION_COUNTS = [1, 50, 200]
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, fallback to ru_maxrss)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(n_sessions):
+    base_rss = rss_mb()
+    window = (np.random.randn(512) * 0.1).astype(np.float32)
+
+    connect_times = []
+    sessions = []
+    for _ in range(n_sessions):
+        t0 = time.perf_counter()
+        proc = AudioProcessor()
+        # First VAD call is part of "connect" (state allocation)
+        vad_engine.score(proc.vad_state, window)
+        connect_times.append(time.perf_counter() - t0)
+        sessions.append(proc)
+
+    connect_times.sort()
+    p50 = connect_times[len(connect_times) // 2] * 1000
+    p99 = connect_times[min(len(connect_times) - 1, int(len(connect_times) * 0.99))] * 1000
+    delta = rss_mb() - base_rss
+    print(f"{n_sessions:>5} sessions | connect p50 {p50:7.2f} ms | p99 {p99:7.2f} ms | "
+          f"RSS +{delta:7.2f} MB ({delta / n_sessions * 1024:6.1f} KB/session)")
+    return sessions
+
+
+if __name__ == "__main__":
+    print(f"Engine loaded. Baseline RSS: {rss_mb():.1f} MB")
+    for n in SESSION_COUNTS:
+        run(n)
@@ -0,0 +1,108 @@
+"""
+Builds the reference audio for bench_precision from the transcripts shipped
+in benchmarks/audio (<name>.txt, Kannada), and pins it with SHA256SUMS.
+
+- Missing <name>.wav files are synthesized from their transcript with the
+  app's TTS engine (gTTS, needs network) and stored as 16 kHz mono PCM.
+- The first run writes SHA256SUMS; commit the .wav files together with it.
+  Later runs (and bench_precision) verify against it, so every precision is
+  always measured on the same bytes.
+
+Run from backend/:
+    python -m benchmarks.fetch_precision_set
+"""
+import glob
+import hashlib
+import io
+import os
+import sys
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import av
+
+AUDIO_DIR = os.getenv("BENCH_AUDIO_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio"))
+SUMS_FILE = "SHA256SUMS"
+LANGUAGE = os.getenv("BENCH_LANG", "kn")
+
+
+def sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_sums(audio_dir: str = AUDIO_DIR) -> dict:
+    """{file name: sha256} from SHA256SUMS (empty if the set isn't pinned yet)."""
+    path = os.path.join(audio_dir, SUMS_FILE)
+    if not os.path.exists(path):
+        return {}
+    sums = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                digest, name = line.split(maxsplit=1)
+                sums[name.strip()] = digest
+    return sums
+
+
+def verify(audio_dir: str = AUDIO_DIR) -> list:
+    """Names of pinned files that are missing or changed."""
+    return [
+        name for name, digest in read_sums(audio_dir).items()
+        if not os.path.exists(os.path.join(audio_dir, name)) or sha256(os.path.join(audio_dir, name)) != digest
+    ]
+
+
+def mp3_to_pcm16(data: bytes) -> bytes:
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+    pcm = bytearray()
+    with av.open(io.BytesIO(data)) as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                pcm.extend(out.to_ndarray().tobytes())
+    for out in resampler.resample(None):
+        pcm.extend(out.to_ndarray().tobytes())
+    return bytes(pcm)
+
+
+def synthesize_missing() -> int:
+    from app.services.tts import GTTSBackend
+
+    engine = GTTSBackend()
+    created = 0
+    for txt in sorted(glob.glob(os.path.join(AUDIO_DIR, "*.txt"))):
+        wav_path = os.path.splitext(txt)[0] + ".wav"
+        if os.path.exists(wav_path):
+            continue
+        with open(txt, encoding="utf-8") as f:
+            text = f.read().strip()
+        pcm = mp3_to_pcm16(engine.synthesize(text, LANGUAGE))
+        with wave.open(wav_path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(16000)
+            out.writeframes(pcm)
+        print(f"  {os.path.basename(wav_path)}: {len(pcm) / 32000:.1f}s")
+        created += 1
+    return created
+
+
+if __name__ == "__main__":
+    pinned = read_sums()
+    if pinned:
+        bad = verify()
+        if bad:
+            print(f"Reference audio differs from {SUMS_FILE}: {', '.join(bad)}")
+            print("Restore those files from git; delete SHA256SUMS only to deliberately re-pin the set.")
+            sys.exit(1)
+        print(f"{len(pinned)} reference clips verified.")
+        sys.exit(0)
+
+    print(f"Synthesizing reference audio in {AUDIO_DIR} ...")
+    synthesize_missing()
+    wavs = sorted(os.path.basename(p) for p in glob.glob(os.path.join(AUDIO_DIR, "*.wav")))
+    with open(os.path.join(AUDIO_DIR, SUMS_FILE), "w", encoding="utf-8") as f:
+        for name in wavs:
+            f.write(f"{sha256(os.path.join(AUDIO_DIR, name))}  {name}\n")
+    print(f"Pinned {len(wavs)} clips in {SUMS_FILE}; commit them with the .wav files.")
@@ -1,9 +1,19 @@
 @echo off
 echo Starting Voice Chatbot Backend in PRODUCTION mode...
 :: Load environment variables from .env is handled by python-dotenv in main.py
-:: We run uvicorn directly. In a real Linux prod, we'd use gunicorn -w 1 -k uvicorn.workers.UvicornWorker
-:: On Windows, we stick to uvicorn. Workers=1 is crucial for connection_manager state.
+:: We run uvicorn directly. In a real Linux prod, we'd use gunicorn -w N -k uvicorn.workers.UvicornWorker
+::
+:: Workers: sockets live on the worker that accepted them; pairing, queues and
+:: languages live in the session backend.
+::   1 worker (default)  -> SESSION_BACKEND=memory is enough
+::   N workers / nodes   -> share session state through Redis:
+::       set SESSION_BACKEND=redis
+::       set REDIS_URL=redis://localhost:6379/0
+::       set WEB_WORKERS=4
+:: Token revocations (TOKEN_DB) are a SQLite file shared by the workers on this host.
+if "%WEB_WORKERS%"=="" set WEB_WORKERS=1
+if %WEB_WORKERS% GTR 1 if /I not "%SESSION_BACKEND%"=="redis" echo WARNING: WEB_WORKERS=%WEB_WORKERS% without SESSION_BACKEND=redis - users on different workers will not be paired.
 
 call venv\Scripts\activate
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 1 --log-level info
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers %WEB_WORKERS% --log-level info
 pause
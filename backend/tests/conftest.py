@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+# Make "app" importable when running pytest from backend/ or the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing the transcriber / VAD modules must not load MMS or Silero
+os.environ.setdefault("MODEL_PRELOAD", "0")
+
+
+class FakeClock:
+    """Manual clock for anything that takes `clock=`: advance it with `clock.now += seconds`."""
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class FakeWebSocket:
+    """
+    Records what a connection was sent: `json` (text frames decoded), `bytes`,
+    and `sent` (both, in order). With stall=True every send blocks until
+    `release` is set, like a client that stopped reading.
+    """
+    def __init__(self, stall=False):
+        self.json = []
+        self.bytes = []
+        self.sent = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+        if not stall:
+            self.release.set()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data))
+
+    async def send_text(self, data):
+        await self.release.wait()
+        self.json.append(json.loads(data))
+        self.sent.append(self.json[-1])
+
+    async def send_bytes(self, data):
+        await self.release.wait()
+        self.bytes.append(data)
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _drain():
+    """Let the per-connection writer tasks flush."""
+    await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+def fake_websocket():
+    return FakeWebSocket
+
+
+@pytest.fixture
+def drain():
+    return _drain
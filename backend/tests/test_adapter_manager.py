@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.transcriber import AdapterManager
+
+VOCAB = {"kan": 5, "hin": 7, "tel": 6}  # lm_head rows differ per language
+
+
+class FakeMMS:
+    """Just the adapter surface of Wav2Vec2ForCTC: load_adapter() is the slow disk path."""
+    def __init__(self):
+        self.loads = []
+        self.config = SimpleNamespace(vocab_size=0)
+        self.lm_head = SimpleNamespace(out_features=0)
+        self.adapter = torch.nn.Parameter(torch.zeros(4))
+        self.head = torch.nn.Parameter(torch.zeros(1, 4))
+
+    def load_adapter(self, code):
+        self.loads.append(code)
+        value = float(list(VOCAB).index(code) + 1)
+        self.adapter.data = torch.full((4,), value)
+        self.head.data = torch.full((VOCAB[code], 4), value)
+        self.config.vocab_size = self.lm_head.out_features = VOCAB[code]
+
+    def _get_adapters(self):
+        return {"encoder.layers.0.adapter_layer.weight": self.adapter, "lm_head.weight": self.head}
+
+
+class FakeTokenizer:
+    def __init__(self):
+        self.target_lang = None
+
+    def set_target_lang(self, code):
+        self.target_lang = code
+
+
+def test_lru_hits_misses_and_eviction():
+    model, tokenizer = FakeMMS(), FakeTokenizer()
+    adapters = AdapterManager(model, tokenizer, capacity=2)
+    for code in ["kan", "hin", "kan", "kan", "tel", "hin"]:
+        adapters.activate(code)
+
+    stats = adapters.stats()
+    # "kan" again is a hit; activating the live adapter is free; "tel" evicts
+    # the least recently used ("hin"), which then has to be loaded again
+    assert model.loads == ["kan", "hin", "tel", "hin"]
+    assert (stats["cache_hits"], stats["cache_misses"], stats["swaps"]) == (1, 4, 5)
+    assert stats["cached"] == ["tel", "hin"]
+
+    # A hit restores that language's weights and vocab size without load_adapter()
+    adapters.activate("tel")
+    assert model.loads == ["kan", "hin", "tel", "hin"]
+    assert tokenizer.target_lang == "tel" and adapters.active == "tel"
+    assert model.adapter.tolist() == [3.0] * 4
+    assert tuple(model.head.shape) == (VOCAB["tel"], 4)
+    assert model.config.vocab_size == model.lm_head.out_features == VOCAB["tel"]
+    assert adapters.stats()["cache_hits"] == 2
@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.services.audio_buffer import AudioAccumulator
+
+
+def test_append_applies_gain_to_new_samples_only():
+    acc = AudioAccumulator(gain=4.0, initial_seconds=0.01)
+    first = np.full(100, 0.1, dtype=np.float32)
+    acc.append_bytes(first.tobytes())
+    acc.append_bytes(np.full(100, 0.2, dtype=np.float32).tobytes())
+
+    audio = acc.view()
+    assert len(audio) == 200
+    assert np.allclose(audio[:100], 0.4)
+    assert np.allclose(audio[100:], 0.8)
+
+
+def test_growth_keeps_data_and_old_views():
+    acc = AudioAccumulator(initial_seconds=0.001)  # 16 samples
+    acc.append(np.arange(10, dtype=np.float32))
+    old_view = acc.view()
+    acc.append(np.arange(10, 50, dtype=np.float32))
+
+    assert np.array_equal(acc.view(), np.arange(50, dtype=np.float32))
+    assert np.array_equal(old_view, np.arange(10, dtype=np.float32))
+
+
+def test_tail_is_zero_copy_view():
+    acc = AudioAccumulator()
+    acc.append(np.arange(1000, dtype=np.float32))
+    tail = acc.tail(100)
+    assert np.array_equal(tail, np.arange(900, 1000, dtype=np.float32))
+    assert np.shares_memory(tail, acc.view())
+    assert len(acc.tail(5000)) == 1000
+
+
+def test_detach_hands_off_without_being_overwritten():
+    acc = AudioAccumulator()
+    acc.append(np.ones(500, dtype=np.float32))
+    committed = acc.detach()
+    assert len(acc) == 0
+
+    acc.append(np.zeros(500, dtype=np.float32))
+    assert np.all(committed == 1.0)
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.credentials import CredentialService, CredentialsBusy, hash_password, verify_password, is_hashed
+
+N = 2 ** 10  # cheap parameters for tests
+
+
+def make_service(**kwargs):
+    kwargs.setdefault("n", N)
+    return CredentialService(workers=2, **kwargs)
+
+
+def test_hash_roundtrip():
+    stored = hash_password("s3cret", n=N)
+    assert is_hashed(stored)
+    assert verify_password("s3cret", stored)
+    assert not verify_password("wrong", stored)
+    assert hash_password("s3cret", n=N) != stored  # salted
+    assert not verify_password("s3cret", "scrypt$broken")
+
+
+def test_plaintext_is_upgraded_then_verified_from_cache():
+    service = make_service()
+
+    async def scenario():
+        ok, new_hash = await service.verify("alice", "pw", "pw")
+        assert ok and is_hashed(new_hash)
+        runs = service.kdf_runs
+        # Reconnect with the upgraded hash: no KDF
+        ok, again = await service.verify("alice", "pw", new_hash)
+        assert ok and again is None
+        assert service.kdf_runs == runs
+        assert service.cache_hits == 1
+        assert await service.verify("alice", "nope", new_hash) == (False, None)
+
+    asyncio.run(scenario())
+    service.close()
+
+
+def test_unknown_user_costs_a_kdf_run_like_a_wrong_password():
+    service = make_service()
+    stored = hash_password("pw", n=N)
+
+    async def scenario():
+        await service.verify_unknown("warm-up")  # first call also builds the dummy hash
+        before = service.kdf_runs
+        assert not (await service.verify("alice", "wrong", stored))[0]
+        wrong_password = service.kdf_runs - before
+        before = service.kdf_runs
+        assert await service.verify_unknown("pw") is False
+        return wrong_password, service.kdf_runs - before
+
+    wrong_password, unknown_user = asyncio.run(scenario())
+    assert wrong_password == unknown_user == 1
+
+
+def test_outdated_parameters_are_rehashed():
+    service = make_service()
+    old = hash_password("pw", n=N // 2)
+
+    async def scenario():
+        ok, new_hash = await service.verify("bob", "pw", old)
+        assert ok and new_hash.split("$")[1] == str(N)
+
+    asyncio.run(scenario())
+    assert service.rehashed == 1
+    service.close()
+
+
+def test_cache_expires():
+    now = [0.0]
+    service = make_service(cache_ttl=10, clock=lambda: now[0])
+    stored = hash_password("pw", n=N)
+
+    async def scenario():
+        await service.verify("carol", "pw", stored)
+        now[0] += 11
+        await service.verify("carol", "pw", stored)
+
+    asyncio.run(scenario())
+    assert service.cache_hits == 0
+    assert service.kdf_runs == 2
+    service.close()
+
+
+def test_backlog_is_bounded():
+    service = make_service(max_pending=1)
+
+    async def scenario():
+        results = await asyncio.gather(*(service.hash("pw") for _ in range(3)), return_exceptions=True)
+        assert sum(isinstance(r, CredentialsBusy) for r in results) == 2
+
+    asyncio.run(scenario())
+    assert service.rejected_busy == 2
+    service.close()
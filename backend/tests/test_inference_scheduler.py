@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.transcriber import InferenceScheduler
+
+
+class RecordingService:
+    """Stands in for TranscriberService: records each batch; the first one waits for `gate`."""
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def _run_batch(self, target_code, requests):
+        self.started.set()
+        self.gate.wait(5)
+        self.batches.append((target_code, [r.audio for r in requests]))
+        return [f"{target_code}:{r.audio}" for r in requests]
+
+
+def test_batches_group_by_adapter_split_at_max_batch_and_stay_fifo():
+    service = RecordingService()
+    scheduler = InferenceScheduler(service, max_batch=2, max_wait=0, num_threads=1)
+    first = scheduler.submit(0, "kn", "kan")
+    assert service.started.wait(5)  # the worker is busy with request 0
+
+    queued = [scheduler.submit(i, lang, code) for i, (lang, code) in enumerate(
+        [("kn", "kan"), ("hi", "hin"), ("kn", "kan"), ("kn", "kan"), ("hi", "hin")], start=1)]
+    dropped = scheduler.submit(6, "hi", "hin")
+    assert dropped.cancel()  # still queued: skipped for free
+    assert scheduler.queue_depth == 6
+    service.gate.set()
+
+    assert first.result(5) == "kan:0"
+    assert [f.result(5) for f in queued] == ["kan:1", "hin:2", "kan:3", "kan:4", "hin:5"]
+    # Oldest request picks the adapter; same-adapter requests join it up to
+    # max_batch; the rest keep their order for the next step
+    assert service.batches == [
+        ("kan", [0]),
+        ("kan", [1, 3]),
+        ("hin", [2, 5]),
+        ("kan", [4]),
+    ]
@@ -0,0 +1,58 @@
+import json
+import logging
+
+import pytest
+
+from app.logging_setup import JSONFormatter, SessionRateLimitFilter, setup_logging, stop_logging
+
+
+@pytest.fixture
+def root_logger():
+    """setup_logging() rewires the real root logger: put it back for later tests."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    root.handlers = handlers
+    root.setLevel(level)
+
+
+def make_record(level=logging.DEBUG, session="u1"):
+    record = logging.LogRecord("test", level, __file__, 1, "hello %s", ("world",), None)
+    if session is not None:
+        record.session = session
+    return record
+
+
+def test_rate_limit_is_per_session_and_refills(clock):
+    limiter = SessionRateLimitFilter(rate=1.0, burst=2, clock=clock)
+    assert limiter.filter(make_record())
+    assert limiter.filter(make_record())
+    assert not limiter.filter(make_record())          # bucket empty
+    assert limiter.filter(make_record(session="u2"))  # other session unaffected
+    assert limiter.filter(make_record(level=logging.INFO))
+    clock.now += 1.0
+    assert limiter.filter(make_record())
+    assert limiter.suppressed == 1
+
+
+def test_json_formatter_includes_context():
+    record = make_record()
+    record.lang = "kn"
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["session"] == "u1"
+    assert entry["lang"] == "kn"
+    assert "adapter" not in entry
+
+
+def test_queue_listener_writes_file(tmp_path, root_logger):
+    path = tmp_path / "app.log"
+    setup_logging(level="INFO", log_file=str(path), json_format=True, console=False)
+    try:
+        logging.getLogger("test").debug("gated out")
+        logging.getLogger("test").info("committed %d", 3, extra={"session": "u9"})
+    finally:
+        stop_logging()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["msg"] == "committed 3"
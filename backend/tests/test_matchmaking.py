@@ -0,0 +1,98 @@
+import asyncio
+import random
+
+import pytest
+
+from app.matchmaking import MatchmakingEngine, LanguageQueue, ANY_LANGUAGE
+
+
+def test_customer_gets_agent_speaking_their_language():
+    engine = MatchmakingEngine(strict_language=False)
+    engine.add_agent("e_en", ["en"])
+    engine.add_agent("e_kn", ["kn", "en"])
+    assert engine.claim_agent("kn") == "e_kn"
+    # Nobody left for Hindi: falls back to any idle agent
+    assert engine.claim_agent("hi") == "e_en"
+    assert engine.claim_agent("hi") is None
+
+
+def test_strict_mode_waits_for_a_matching_agent():
+    engine = MatchmakingEngine(strict_language=True)
+    engine.add_agent("e_en", ["en"])
+    assert engine.claim_agent("kn") is None
+    engine.enqueue_customer("c_kn", "kn")
+    assert engine.claim_customer(["en"]) is None
+    # Auto-detect customers can be served by anyone
+    engine.enqueue_customer("c_auto", "auto")
+    assert engine.claim_customer(["en"]) == "c_auto"
+
+
+def test_freed_agent_takes_longest_waiting_customer_they_can_serve():
+    engine = MatchmakingEngine(strict_language=True)
+    engine.enqueue_customer("c1", "hi")
+    engine.enqueue_customer("c2", "kn")
+    engine.enqueue_customer("c3", "hi")
+    assert engine.claim_customer(["kn", "hi"]) == "c1"
+    assert engine.claim_customer(["kn"]) == "c2"
+    assert engine.claim_customer(["kn"]) is None
+    assert engine.stats()["waiting_by_lang"] == {"hi": 1}
+
+
+def test_position_tracks_cancellations():
+    engine = MatchmakingEngine()
+    for i in range(5):
+        assert engine.enqueue_customer(f"c{i}", "kn") == i
+    engine.remove_customer("c1")
+    engine.remove_customer("c3")
+    assert engine.position("c4")[0] == 2
+    assert engine.position("c0")[0] == 0
+    assert engine.position("c1") is None
+
+
+def test_language_queue_positions_survive_reindexing():
+    queue = LanguageQueue(size=4)
+    live = []
+    rng = random.Random(7)
+    for i in range(500):
+        queue.push(i, i, 0.0)
+        live.append(i)
+        if rng.random() < 0.6:
+            victim = live.pop(rng.randrange(len(live)))
+            queue.remove(victim)
+    for expected, customer_id in enumerate(live):
+        assert queue.position(customer_id) == expected
+
+
+def test_eta_uses_match_interval_during_backlog(clock):
+    engine = MatchmakingEngine(alpha=1.0, clock=clock)
+    for i in range(4):
+        engine.enqueue_customer(f"c{i}", "kn")
+    assert engine.position("c3")[1] is None  # nothing measured yet
+    engine.claim_customer(["kn"])
+    clock.now += 30.0
+    engine.claim_customer(["kn"])
+    # c3 is now second in line; matches happen every 30 s
+    assert engine.position("c3") == (1, 60.0)
+
+
+def test_redis_backend_routes_by_language():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.session_backend import RedisSessionBackend
+
+    async def scenario():
+        backend = RedisSessionBackend(client=fakeredis.aioredis.FakeRedis(), strict_language=True)
+        await backend.add_agent("e_en", ["en"])
+        await backend.add_agent("e_kn", ["kn", "hi"])
+        assert await backend.claim_agent("hi") == "e_kn"
+        assert await backend.claim_agent("kn") is None  # e_kn left every pool
+
+        for cust, lang in [("c1", "kn"), ("c2", "en"), ("c3", "kn")]:
+            await backend.enqueue_customer(cust, lang)
+        assert (await backend.queue_position("c3"))[0] == 1
+        await backend.remove_customer("c1")
+        assert (await backend.queue_position("c3"))[0] == 0
+        assert await backend.claim_customer(["kn"]) == "c3"
+        assert await backend.claim_customer([ANY_LANGUAGE]) is None
+        assert await backend.claim_customer(["en"]) == "c2"
+
+    asyncio.run(scenario())
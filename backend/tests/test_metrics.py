@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+from app.metrics import MetricsRegistry
+
+
+def test_span_feeds_histogram_buckets(clock):
+    registry = MetricsRegistry(buckets=(0.1, 1.0), trace=False, clock=clock)
+    with registry.span("vad", session="u1", lang="kn", adapter="kan"):
+        clock.now += 0.05
+    registry.observe("vad", 0.5, lang="kn", adapter="kan")
+    registry.observe("vad", 3.0, lang="kn", adapter="kan")
+
+    text = registry.render()
+    assert 'voice_stage_seconds_bucket{stage="vad",lang="kn",adapter="kan",le="0.1"} 1' in text
+    assert 'voice_stage_seconds_bucket{stage="vad",lang="kn",adapter="kan",le="1.0"} 2' in text
+    assert 'voice_stage_seconds_bucket{stage="vad",lang="kn",adapter="kan",le="+Inf"} 3' in text
+    assert 'voice_stage_seconds_count{stage="vad",lang="kn",adapter="kan"} 3' in text
+    # Sessions never become label values
+    assert "u1" not in text
+
+
+def test_counters_and_escaping():
+    registry = MetricsRegistry(trace=False)
+    registry.inc("preview_skipped_busy", lang='x"y')
+    registry.inc("preview_skipped_busy", lang='x"y')
+    assert 'voice_events_total{event="preview_skipped_busy",lang="x\\"y"} 2' in registry.render()
+
+
+def test_trace_is_per_session_and_bounded(tmp_path):
+    registry = MetricsRegistry(trace=True, trace_size=2, trace_dir=str(tmp_path))
+    for i in range(3):
+        registry.observe("preview", 0.1 * i, session="u1", lang="hi", adapter="hin")
+    registry.observe("preview", 0.2, session="u2")
+
+    events = registry.trace("u1")
+    assert [e["ms"] for e in events] == [100.0, 200.0]
+    assert events[0]["adapter"] == "hin"
+
+    registry.end_session("u1")
+    assert registry.trace("u1") == []
+    dumped = list(tmp_path.glob("trace_u1_*.jsonl"))
+    assert len(dumped) == 1
+    lines = dumped[0].read_text().splitlines()
+    assert json.loads(lines[-1])["stage"] == "preview"
+
+
+def test_unknown_langs_share_one_series_and_bad_gauges_are_skipped():
+    registry = MetricsRegistry(trace=False)
+    registry.restrict_langs(["kn", "hi"])
+    registry.inc("commit", lang="kn")
+    for junk in ("zz", "x" * 40, "../etc"):
+        registry.inc("commit", lang=junk)
+    registry.gauge("broken", lambda: 1 / 0)
+    registry.gauge("queued", lambda: 7)
+
+    text = registry.render()
+    assert 'voice_events_total{event="commit",lang="kn"} 1' in text
+    assert 'voice_events_total{event="commit",lang="other"} 3' in text
+    assert "voice_broken" not in text
+    assert "voice_queued 7" in text
+
+
+def test_end_session_writes_trace_off_the_loop(tmp_path):
+    registry = MetricsRegistry(trace=True, trace_dir=str(tmp_path))
+    registry.observe("preview", 0.1, session="u1")
+
+    async def scenario():
+        pending = registry.end_session("u1")
+        assert pending is not None  # handed to the executor
+        await pending
+
+    asyncio.run(scenario())
+    assert registry.trace("u1") == []
+    assert len(list(tmp_path.glob("trace_u1_*.jsonl"))) == 1
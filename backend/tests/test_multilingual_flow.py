@@ -6,6 +6,7 @@ import io
 from gtts import gTTS
 import av
 import time
+import urllib.request
 
 async def test_transcription():
     # 1. Generate Hindi Audio
@@ -36,7 +37,14 @@ async def test_transcription():
     print(f"Audio Ready. Bytes: {len(pcm_bytes)}")
     
     # 3. Connect to Websocket
-    uri = "ws://localhost:8000/ws/customer/test_user_hi?lang=hi"
+    # The handshake needs a session token (customers get a guest one)
+    with urllib.request.urlopen(urllib.request.Request(
+        "http://localhost:8000/auth/guest",
+        data=json.dumps({"name": "test_user_hi"}).encode(),
+        headers={"Content-Type": "application/json"},
+    )) as resp:
+        guest = json.loads(resp.read())
+    uri = f"ws://localhost:8000/ws/customer/{guest['user_id']}?lang=hi&token={guest['token']}"
     print(f"Connecting to {uri}...")
     
     async with websockets.connect(uri) as websocket:
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("gtts")
+pytest.importorskip("deep_translator")
+
+from app import outbound_pipeline
+from app.connection_manager import ConnectionManager
+from app.outbound_pipeline import OutboundPipeline
+from app.session_backend import InMemorySessionBackend
+from app.services.audio_protocol import FLAG_LAST, unpack_audio_frame
+from app.services.cache import TTLCache
+from app.services.translator import TranslatorService
+from app.services.tts import TTSService
+
+
+class TaggingTranslator:
+    async def translate(self, text, source_lang, target_lang):
+        await asyncio.sleep(0.01)
+        return f"[{target_lang}] {text}"
+
+
+class EchoTTSEngine:
+    name = "echo"
+    codec = "mp3"
+
+    def synthesize(self, text, lang, slow=False):
+        return text.encode("utf-8")
+
+
+def test_voice_turn_reaches_partner_in_order_with_timing(fake_websocket, drain, monkeypatch):
+    mgr = ConnectionManager(backend=InMemorySessionBackend(), worker_id="w1")
+    monkeypatch.setattr(outbound_pipeline, "manager", mgr)
+    monkeypatch.setattr(outbound_pipeline, "translator_service", TranslatorService(async_backend=TaggingTranslator(), cache=TTLCache()))
+    monkeypatch.setattr(outbound_pipeline, "tts_service", TTSService(backend=EchoTTSEngine(), cache=TTLCache()))
+
+    async def scenario():
+        await mgr.start()
+        cust, emp = fake_websocket(), fake_websocket()
+        await mgr.connect_user("customer", "c1", cust, "hi")
+        await mgr.connect_user("employee", "e1", emp, "kn")
+        pipeline = OutboundPipeline("c1", mgr.writer("c1")).start()
+        speech_end = time.time()
+        timing = {"speech_end": speech_end, "commit": speech_end, "asr_done": speech_end}
+        assert pipeline.submit("Hello there. How are you?", "hi", "kn", timing=timing)
+        for _ in range(50):
+            await drain()
+            if any(m.get("type") == "timing" for m in cust.json):
+                break
+        await pipeline.close()
+        return cust, emp
+
+    cust, emp = asyncio.run(scenario())
+
+    # Partner: the translated text first, then the clip's frames in sequence, closed by FLAG_LAST
+    turn = [item for item in emp.sent if isinstance(item, bytes) or "translated" in item]
+    text, frames = turn[0], [unpack_audio_frame(frame) for frame in turn[1:]]
+    assert text["translated"] == "[kn] Hello there. How are you?"
+    assert [seq for _, seq, _, _, _ in frames] == list(range(len(frames)))
+    assert {message_id for message_id, _, _, _, _ in frames} == {text["audio_id"]}
+    assert b"".join(payload for *_, payload in frames) == b"[kn] Hello there.How are you?"
+    assert frames[-1][3] & FLAG_LAST and not frames[-1][4]
+
+    # Sender: its own echo, then the per-stage timing report for this turn
+    echo = next(m for m in cust.json if "translated" in m)
+    report = cust.json[-1]
+    assert cust.json.index(echo) < cust.json.index(report)
+    assert report["type"] == "timing" and report["audio_id"] == text["audio_id"]
+    stages = report["since_speech_end_ms"]
+    assert list(stages) == ["commit", "asr_done", "mt_done", "text_delivered",
+                            "tts_first_audio", "tts_done", "audio_delivered"]
+    assert list(stages.values()) == sorted(stages.values())
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.outbound_writer import OutboundWriter, PRIORITY_PREVIEW, CLOSE_SLOW_CONSUMER
+
+
+def test_priority_order_and_preview_coalescing(fake_websocket, drain):
+    async def scenario():
+        ws = fake_websocket(stall=True)
+        writer = OutboundWriter("u1", ws).start()
+        writer.send_json({"type": "preview", "text": "hel"}, PRIORITY_PREVIEW)
+        writer.send_bytes(b"audio-1")
+        writer.send_json({"type": "preview", "text": "hello"}, PRIORITY_PREVIEW)
+        writer.send_json({"text": "chat"})
+        writer.send_bytes(b"audio-2")
+        assert writer.depth() == 4  # 3 queued + the (coalesced) preview slot
+        ws.release.set()
+        await drain()
+        await writer.close()
+        return ws.sent, writer.coalesced
+
+    sent, coalesced = asyncio.run(scenario())
+    assert sent == [{"text": "chat"}, b"audio-1", b"audio-2", {"type": "preview", "text": "hello"}]
+    assert coalesced == 1
+
+
+def test_commit_drops_pending_preview(fake_websocket, drain):
+    async def scenario():
+        ws = fake_websocket(stall=True)
+        writer = OutboundWriter("u1", ws).start()
+        writer.send_json({"type": "status"})
+        await drain()  # writer is now blocked on the first send
+        writer.send_json({"type": "preview", "text": "a"}, PRIORITY_PREVIEW)
+        writer.send_json({"type": "preview", "text": "ab"}, PRIORITY_PREVIEW)
+        writer.send_json({"type": "commit", "text": "abc"}, drop_preview=True)
+        ws.release.set()
+        await drain()
+        await writer.close()
+        return ws.sent, writer.coalesced
+
+    sent, coalesced = asyncio.run(scenario())
+    assert sent == [{"type": "status"}, {"type": "commit", "text": "abc"}]
+    assert coalesced == 1
+
+
+def test_stalled_client_is_evicted_when_queue_fills(fake_websocket, drain):
+    evicted = []
+
+    async def on_evict(writer):
+        evicted.append(writer.user_id)
+
+    async def scenario():
+        ws = fake_websocket(stall=True)
+        writer = OutboundWriter("slow", ws, on_evict=on_evict, max_items=4, max_bytes=1000).start()
+        results = [writer.send_bytes(b"x" * 100) for _ in range(6)]
+        await drain()
+        return results, writer, ws
+
+    results, writer, ws = asyncio.run(scenario())
+    assert results == [True] * 4 + [False] * 2
+    assert writer.evicted == "queue full"
+    assert writer.depth() == 0 and writer.queued_bytes() == 0
+    assert ws.closed_with == CLOSE_SLOW_CONSUMER
+    assert evicted == ["slow"]
+    assert not writer.send_json({"late": True})
+
+
+def test_send_timeout_evicts(fake_websocket):
+    async def scenario():
+        ws = fake_websocket(stall=True)
+        writer = OutboundWriter("slow", ws, send_timeout=0.01).start()
+        writer.send_json({"text": "hi"})
+        await asyncio.sleep(0.05)
+        return writer, ws
+
+    writer, ws = asyncio.run(scenario())
+    assert writer.evicted == "send timeout"
+    assert ws.closed_with == CLOSE_SLOW_CONSUMER
+
+
+def test_queued_bytes_count_utf8_not_characters(fake_websocket):
+    async def scenario():
+        writer = OutboundWriter("u1", fake_websocket(stall=True), max_bytes=64).start()
+        text = "ನಮಸ್ಕಾರ"  # 7 characters, 21 bytes in UTF-8
+        assert writer.send_json({"text": text})
+        queued = writer.queued_bytes()
+        assert not writer.send_json({"text": text * 2})  # would pass if counted in characters
+        await writer.close()
+        return queued
+
+    assert asyncio.run(scenario()) == len('{"text":""}') + 21
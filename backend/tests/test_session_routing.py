@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.connection_manager import ConnectionManager
+from app.session_backend import InMemorySessionBackend, RedisSessionBackend, pack_envelope, unpack_envelope
+
+
+def test_envelope_roundtrip_keeps_binary_payload():
+    frame = b"BA\x01\n\x00\xff"
+    assert unpack_envelope(pack_envelope("u1", "bytes", frame)) == ("u1", "bytes", frame)
+    assert unpack_envelope(pack_envelope("u1", "json", {"a": 1})) == ("u1", "json", {"a": 1})
+
+
+def test_in_memory_pairing_and_requeue(fake_websocket, drain):
+    async def scenario():
+        mgr = ConnectionManager(backend=InMemorySessionBackend(), worker_id="w1")
+        await mgr.start()
+        cust, emp = fake_websocket(), fake_websocket()
+        await mgr.connect_user("customer", "c1", cust, "hi")
+        await mgr.connect_user("employee", "e1", emp, "en")
+        await mgr.send_to_partner("c1", {"text": "hello"})
+        assert await mgr.send_bytes_to_partner("e1", b"audio")
+        assert await mgr.get_user_lang("c1") == "hi"
+        await drain()
+        await mgr.disconnect("c1")
+        await drain()
+        return mgr, cust, emp
+
+    mgr, cust, emp = asyncio.run(scenario())
+    assert {"text": "hello"} in emp.json
+    assert cust.bytes == [b"audio"]
+    assert emp.json[-1] == {"system": "Partner disconnected."}
+    assert "e1" not in mgr.active_pairs
+    assert list(mgr.backend.matchmaking.agents) == ["e1"]
+
+
+def test_kick_closes_socket_and_frees_partner(fake_websocket, drain):
+    async def scenario():
+        mgr = ConnectionManager(backend=InMemorySessionBackend(), worker_id="w1")
+        await mgr.start()
+        cust, emp = fake_websocket(), fake_websocket()
+        await mgr.connect_user("customer", "c1", cust, "hi")
+        await mgr.connect_user("employee", "e1", emp, "en")
+        assert await mgr.kick("e1")
+        await drain()
+        return mgr, cust, emp, await mgr.kick("e1")
+
+    mgr, cust, emp, kicked_again = asyncio.run(scenario())
+    assert emp.closed_with == 1008
+    assert "e1" not in mgr.active_connections and "c1" not in mgr.active_pairs
+    assert cust.json[-1] == {"system": "Partner disconnected."}
+    assert kicked_again is False
+
+
+def test_redis_cross_worker_delivery(fake_websocket):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def wait_for(predicate):
+        for _ in range(100):
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("timed out")
+
+    async def scenario():
+        server = fakeredis.FakeServer()
+        worker_a = ConnectionManager(RedisSessionBackend(client=fakeredis.aioredis.FakeRedis(server=server)), "a")
+        worker_b = ConnectionManager(RedisSessionBackend(client=fakeredis.aioredis.FakeRedis(server=server)), "b")
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            cust, emp = fake_websocket(), fake_websocket()
+            await worker_a.connect_user("customer", "c1", cust, "kn")
+            await worker_b.connect_user("employee", "e1", emp, "en")
+
+            # Customer's worker learns about the pairing via the broker
+            await wait_for(lambda: worker_a.active_pairs.get("c1") == "e1")
+            assert worker_b.active_pairs["e1"] == "c1"
+            assert await worker_b.get_user_lang("c1") == "kn"
+
+            await worker_a.send_to_partner("c1", {"text": "namaskara"})
+            assert await worker_b.send_bytes_to_partner("e1", b"\x00mp3\n")
+            await wait_for(lambda: {"text": "namaskara"} in emp.json and cust.bytes)
+            assert cust.bytes == [b"\x00mp3\n"]
+
+            await worker_b.update_user_lang("e1", "hi")
+            await wait_for(lambda: worker_a.remote_users.get("e1", {}).get("lang") == "hi")
+
+            await worker_a.disconnect("c1")
+            await wait_for(lambda: "e1" not in worker_b.active_pairs)
+            assert await worker_b.backend.claim_agent("en") == "e1"
+        finally:
+            await worker_a.close()
+            await worker_b.close()
+
+    asyncio.run(scenario())
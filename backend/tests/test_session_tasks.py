@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import Future
+
+from app.metrics import metrics
+from app.services.session_tasks import SessionTasks, await_inference
+
+
+class FakeStream:
+    """Stands in for StreamingTranscription: one scheduler Future at a time."""
+    def __init__(self):
+        self.inflight = None
+        self.submitted = []
+
+    async def update(self):
+        self.inflight = Future()
+        self.submitted.append(self.inflight)
+        try:
+            return await await_inference(self.inflight)
+        finally:
+            self.inflight = None
+
+
+def stage_count(stage):
+    return metrics.snapshot().get(stage, {}).get("count", 0)
+
+
+def test_newer_preview_preempts_one_still_queued():
+    async def scenario():
+        stream = FakeStream()
+        tasks = SessionTasks("s1", stream)
+        assert tasks.start_preview(stream.update())
+        await asyncio.sleep(0)
+        first = stream.submitted[0]
+        assert tasks.start_preview(stream.update())
+        await asyncio.sleep(0)
+        assert first.cancelled()  # the scheduler will skip it
+        assert tasks.preempted == 1
+
+        # Once on the model, a preview is left to finish
+        stream.submitted[1].set_running_or_notify_cancel()
+        assert not tasks.start_preview(stream.update())
+        await tasks.close()
+
+    asyncio.run(scenario())
+
+
+def test_commit_supersedes_running_preview_and_counts_waste():
+    wasted_before = stage_count("inference_wasted")
+
+    async def scenario():
+        stream = FakeStream()
+        tasks = SessionTasks("s1", stream)
+        tasks.start_preview(stream.update())
+        await asyncio.sleep(0)
+        running = stream.submitted[0]
+        running.set_running_or_notify_cancel()
+
+        release = asyncio.Event()
+        commit = tasks.start_commit(release.wait())
+        assert tasks.superseded == 1
+        assert not tasks.start_preview(stream.update())  # commit pending
+        await asyncio.sleep(0)
+
+        # The model finishes the preview nobody is waiting for any more
+        running.compute_seconds = 0.25
+        running.set_result("stale")
+        release.set()
+        await commit
+
+    asyncio.run(scenario())
+    assert stage_count("inference_wasted") == wasted_before + 1
+
+
+def test_close_cancels_pending_work():
+    async def scenario():
+        stream = FakeStream()
+        tasks = SessionTasks("s1", stream)
+        tasks.start_preview(stream.update())
+        await asyncio.sleep(0)
+        await tasks.close()
+        commit = tasks.start_commit(asyncio.sleep(10))
+        await tasks.close()
+        assert commit.cancelled()
+        return stream, tasks
+
+    stream, tasks = asyncio.run(scenario())
+    assert tasks.cancelled_on_close == 2
+    assert stream.submitted[0].cancelled()
+
+
+def test_pool_future_acknowledged_by_worker_is_not_preempted():
+    """TranscriberPool hands out a bare Future and marks it running on the worker's ack."""
+    async def scenario():
+        stream = FakeStream()
+        tasks = SessionTasks("s1", stream)
+        tasks.start_preview(stream.update())
+        await asyncio.sleep(0)
+        job = stream.submitted[0]
+
+        # The worker picked it up: later previews wait instead of cancelling it
+        job.set_running_or_notify_cancel()
+        for _ in range(3):
+            assert not tasks.start_preview(stream.update())
+        assert not job.cancelled()
+        assert tasks.preempted == 0
+
+        job.set_result(("namaskara", "kn"))
+        await asyncio.sleep(0.01)
+        assert stream.inflight is None  # delivered; the next preview can start
+        assert tasks.start_preview(stream.update())
+        await tasks.close()
+
+    asyncio.run(scenario())
+
+
+def test_one_speculative_translation_at_a_time_and_cancelled_on_close():
+    async def scenario():
+        tasks = SessionTasks("s1")
+        upstream = asyncio.Event()
+        assert tasks.start_speculation(upstream.wait())
+        assert not tasks.start_speculation(upstream.wait())  # still translating
+        assert tasks.speculation_skipped == 1
+        await tasks.close()
+        assert tasks.cancelled_on_close == 1
+
+        assert tasks.start_speculation(asyncio.sleep(0))
+        await asyncio.sleep(0.01)
+        assert tasks.start_speculation(asyncio.sleep(0))  # previous one finished
+        await tasks.close()
+
+    asyncio.run(scenario())
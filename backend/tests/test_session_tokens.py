@@ -0,0 +1,108 @@
+from app.session_tokens import TokenStore, GuestRateLimiter, GUEST_NAME_MAX, guest_user_id, clean_guest_name
+
+
+def make_store(clock, persist_path=""):
+    return TokenStore(secret=b"test-secret", ttl=60, persist_path=persist_path, clock=clock)
+
+
+def test_issued_token_validates_and_tampering_is_rejected(clock):
+    store = make_store(clock)
+    token = store.issue("alice", "employee")["token"]
+    assert store.validate(token)["sub"] == "alice"
+
+    version, payload, signature = token.split(".")
+    forged = make_store(clock).issue("mallory", "admin")["token"].split(".")[1]
+    assert store.validate(f"{version}.{forged}.{signature}") is None
+    assert store.validate(token[:-2]) is None
+    assert store.validate("garbage") is None
+    # Non-ASCII straight from the query string: rejected, not raised
+    assert store.validate("v1.\u00e9.x") is None
+    assert store.validate("v1.abc.\u00e9") is None
+    assert store.revoke("v1.abc.\u00e9") is False
+    # Same payload signed with another secret
+    other = TokenStore(secret=b"other", persist_path="", clock=store.clock)
+    assert other.validate(token) is None
+
+
+def test_token_expires(clock):
+    store = make_store(clock)
+    token = store.issue("alice", "customer")["token"]
+    clock.now += 59
+    assert store.validate(token) is not None
+    clock.now += 2
+    assert store.validate(token) is None
+
+
+def test_authorize_checks_user_and_role(clock):
+    store = make_store(clock)
+    customer = store.issue("c1", "customer")["token"]
+    admin = store.issue("boss", "admin")["token"]
+    assert store.authorize(customer, "customer", "c1")
+    assert store.authorize(customer, "customer", "c2") is None
+    assert store.authorize(customer, "employee", "c1") is None
+    assert store.authorize(admin, "employee", "boss")
+    assert store.authorize(admin, "admin", "boss") is None
+    assert store.stats()["rejected"] == 3
+
+
+def test_revocation_per_token_and_per_user(clock):
+    store = make_store(clock)
+    first = store.issue("alice", "employee")["token"]
+    second = store.issue("alice", "employee")["token"]
+    assert store.revoke(first)
+    assert store.validate(first) is None
+    assert store.validate(second) is not None
+
+    clock.now += 1
+    store.revoke_user("alice")
+    assert store.validate(second) is None
+    clock.now += 1
+    assert store.validate(store.issue("alice", "employee")["token"]) is not None
+
+
+def test_revocations_survive_restart(tmp_path, clock):
+    path = str(tmp_path / "tokens.db")
+    store = make_store(clock, path)
+    logged_out = store.issue("alice", "employee")["token"]
+    blocked = store.issue("bob", "employee")["token"]
+    store.revoke(logged_out)
+    clock.now += 1
+    store.revoke_user("bob")
+
+    restarted = make_store(clock, path)
+    assert restarted.validate(logged_out) is None
+    assert restarted.validate(blocked) is None
+
+
+def test_revocations_reach_other_workers(tmp_path, clock):
+    path = str(tmp_path / "tokens.db")
+    worker_a, worker_b = make_store(clock, path), make_store(clock, path)
+    logged_out = worker_a.issue("alice", "employee")["token"]
+    blocked = worker_a.issue("bob", "employee")["token"]
+    assert worker_b.validate(logged_out) and worker_b.validate(blocked)
+
+    worker_a.revoke(logged_out)
+    clock.now += 0.5
+    worker_a.revoke_user("bob")
+    # Within the refresh interval worker B answers from memory, without SQLite
+    assert worker_b.validate(logged_out)
+    clock.now += 1
+    assert worker_b.validate(logged_out) is None
+    assert worker_b.validate(blocked) is None
+
+
+def test_guest_ids_are_server_chosen_and_rate_limited(clock):
+    assert guest_user_id("ravi") != guest_user_id("ravi")
+    assert guest_user_id("ravi").startswith("ravi-")
+    assert guest_user_id("../ravi kumar?x=1").startswith("ravi-kumar-x-1-")
+    assert guest_user_id("ರವಿ").startswith("guest-")
+    assert clean_guest_name("  ರವಿ <b>Kumar</b>  ") == "ರವಿ bKumarb"
+    assert len(clean_guest_name("x" * 500)) == GUEST_NAME_MAX
+
+    limiter = GuestRateLimiter(rate=1.0, burst=2, max_clients=2, clock=clock)
+    assert limiter.allow("1.2.3.4") and limiter.allow("1.2.3.4")
+    assert not limiter.allow("1.2.3.4")
+    assert limiter.allow("5.6.7.8")  # per client
+    clock.now += 1
+    assert limiter.allow("1.2.3.4")
+    assert limiter.limited == 1
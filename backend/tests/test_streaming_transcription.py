@@ -0,0 +1,108 @@
+import asyncio
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.transcriber import StreamingTranscription, _TranscriberAPI
+
+FRAME = StreamingTranscription.FRAME
+VOCAB = 8  # 0 = pad (CTC blank), 1 = word delimiter, 2.. = letters
+SHIFT = {"kan": 0, "hin": 3}  # each adapter reads the same audio differently
+
+
+class FakeTokenizer:
+    pad_token = "<pad>"
+    word_delimiter_token = "|"
+    all_special_tokens = ["<pad>"]
+
+    def __init__(self):
+        letters = {"kan": "abcdef", "hin": "ABCDEF"}
+        self.vocab = {
+            code: {"<pad>": 0, "|": 1, **{ch: i + 2 for i, ch in enumerate(chars)}}
+            for code, chars in letters.items()
+        }
+
+
+class FakeProcessor:
+    tokenizer = FakeTokenizer()
+
+
+class FakeService(_TranscriberAPI):
+    """
+    Stands in for TranscriberService: logit frame j of a segment depends only
+    on the audio under that frame and on the adapter, like a CTC head would
+    see it, and comes back through an already-resolved scheduler Future.
+    """
+    ready = True
+
+    def __init__(self):
+        self.processor = FakeProcessor()
+        self._decoders = {}
+        self.segments = []  # (segment length, target code) per submit
+
+    def logits(self, audio, target_code):
+        frames = (len(audio) - StreamingTranscription.MIN_SAMPLES) // FRAME + 1
+        ids = (np.rint(audio[:frames * FRAME:FRAME] * VOCAB).astype(int) + SHIFT[target_code]) % VOCAB
+        return np.eye(VOCAB, dtype=np.float32)[ids]
+
+    def submit(self, audio_data, language=None, want_logits=False, on_start=None):
+        target_code = self._target_code(language)
+        self.segments.append((len(audio_data), target_code))
+        fut = Future()
+        fut.set_result(self.logits(np.asarray(audio_data), target_code))
+        return fut
+
+    def one_shot(self, audio, language):
+        target_code = self._target_code(language)
+        return self.decode_ids(np.argmax(self.logits(audio, target_code), axis=-1), target_code)
+
+
+def speech(seconds=3.0, seed=0):
+    """One token id per 20 ms frame, held for the whole frame."""
+    ids = np.random.default_rng(seed).integers(0, VOCAB, int(seconds * 16000) // FRAME)
+    return np.repeat(ids / VOCAB, FRAME).astype(np.float32)
+
+
+def test_updates_then_finalize_match_one_shot_decode():
+    service = FakeService()
+    audio = speech()
+    expected = service.one_shot(audio, "kn")
+    assert expected
+
+    async def scenario():
+        stream = StreamingTranscription(service, left_context=0.2, right_context=0.1)
+        for end in range(4800, len(audio), 4800):
+            await stream.update(audio[:end], language="kn")
+        stable_before_commit = stream.stable_seconds
+        text, lang = await stream.finalize(audio, language="kn")
+        return stable_before_commit, text, lang, stream
+
+    stable_before_commit, text, lang, stream = asyncio.run(scenario())
+    assert (text, lang) == (expected, "kn")
+    assert stable_before_commit > 2.0
+    # The commit only re-encoded the unstable tail plus left context
+    assert service.segments[-1][0] < len(audio) // 4
+    assert stream.stable_seconds == 0  # reset for the next utterance
+
+
+def test_language_change_drops_cached_logits():
+    service = FakeService()
+    audio = speech(seed=1)
+
+    async def scenario():
+        stream = StreamingTranscription(service, left_context=0.2, right_context=0.1)
+        await stream.update(audio[:16000], language="kn")
+        await stream.update(audio[:32000], language="kn")
+        assert stream.stable_seconds > 1.0
+        switched, _ = await stream.update(audio[:32000], language="hi")
+        return stream, switched
+
+    stream, switched = asyncio.run(scenario())
+    # Re-encoded from the start with the new adapter, nothing reused from "kan"
+    assert service.segments[-1] == (32000, "hin")
+    assert switched == service.one_shot(audio[:32000], "hi")
+    assert switched.isupper()
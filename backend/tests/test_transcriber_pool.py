@@ -0,0 +1,87 @@
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.transcriber import TranscriberPool
+
+
+def scripted_worker(index, task_queue, result_queue):
+    """
+    Stands in for _pool_worker_main (runs in the spawned child, loads no model).
+    The job's language says what to do: "queued" never reaches the model,
+    "crash" kills the process, "slow" holds the model for a moment.
+    """
+    result_queue.put(("ready", index, True, 0.0))
+    queued = set()
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        if task[0] == "cancel":
+            if task[1] in queued:
+                queued.discard(task[1])
+                result_queue.put((task[1], False, "cancelled", 0.0))
+            continue
+        job_id, _, n_samples, language, _ = task
+        if language == "crash":
+            os._exit(1)
+        if language == "queued":
+            queued.add(job_id)
+            continue
+        result_queue.put(("running", job_id, None, 0.0))
+        if language == "slow":
+            time.sleep(0.3)
+        result_queue.put((job_id, True, (f"{n_samples} samples", language), 0.01))
+
+
+def wait_until(predicate, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("TRANSCRIBER_WATCHDOG_S", "0.05")
+    pool = TranscriberPool(workers=1, threads_per_worker=1, processor=object(), worker_main=scripted_worker)
+    yield pool
+    pool.close()
+
+
+def test_worker_ack_marks_job_running(pool):
+    fut = pool.submit(np.zeros(1600, dtype=np.float32), "slow")
+    wait_until(fut.running)
+    assert not fut.cancel()  # on the model: the session can no longer take it back
+    assert fut.result(10) == ("1600 samples", "slow")
+    assert fut.compute_seconds == 0.01
+    assert pool.stats()["inflight"] == [0]
+
+
+def test_cancelled_job_is_dropped_by_worker_and_freed(pool):
+    fut = pool.submit(np.zeros(1600, dtype=np.float32), "queued")
+    (shm_name,) = [job[1].name for job in pool._jobs.values()]
+    assert fut.cancel()
+    wait_until(lambda: not pool._jobs)
+    assert pool.stats()["inflight"] == [0]
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=shm_name)
+
+
+def test_watchdog_fails_jobs_of_dead_worker_and_respawns_it(pool):
+    doomed = pool.submit(np.zeros(1600, dtype=np.float32), "crash")
+    with pytest.raises(RuntimeError, match="worker 0 died"):
+        doomed.result(20)
+    stats = pool.stats()
+    assert (stats["worker_deaths"], stats["failed_jobs"], stats["restarts"]) == (1, 1, [1])
+
+    # Back in rotation once the respawned worker reports ready
+    wait_until(lambda: pool.stats()["live_workers"] == 1)
+    assert pool.submit(np.zeros(800, dtype=np.float32), "kn").result(10) == ("800 samples", "kn")
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.cache import TTLCache, SQLiteTier
+
+
+class StubTranslator:
+    """Offline backend: counts upstream calls."""
+    name = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text, source_lang, target_lang):
+        self.calls += 1
+        return f"[{target_lang}] {text}"
+
+
+class AsyncStubTranslator(StubTranslator):
+    async def translate(self, text, source_lang, target_lang):
+        return StubTranslator.translate(self, text, source_lang, target_lang)
+
+
+class RecordingTier(SQLiteTier):
+    """Disk tier that remembers which threads touched it."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread())
+        return super().get(key)
+
+    def set(self, key, value, expires):
+        self.threads.append(threading.current_thread())
+        return super().set(key, value, expires)
+
+
+def test_lru_evicts_oldest():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # "a" is now most recent
+    cache.set("c", 3)       # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry_counts_as_miss(clock):
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    clock.now += 11
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db = str(tmp_path / "cache.db")
+    TTLCache(disk=SQLiteTier(db)).set("hello", "namaste")
+
+    fresh = TTLCache(disk=SQLiteTier(db))
+    assert fresh.get("hello") == "namaste"
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_purges_expired_and_caps_rows(tmp_path, clock):
+    disk = SQLiteTier(str(tmp_path / "cache.db"), max_rows=3, purge_every=4, clock=clock)
+    disk.set("stale", "x", clock.now - 1)
+    for i in range(3):
+        disk.set(f"k{i}", "v", clock.now + 10 + i)
+    # Fourth write triggers the purge: the expired row goes, 3 rows fit the cap
+    assert len(disk) == 3 and disk.get("stale") is None
+
+    for i in range(3, 7):
+        disk.set(f"k{i}", "v", clock.now + 10 + i)
+    assert len(disk) == 3
+    assert disk.get("k0") is None and disk.get("k6") is not None  # soonest-expiring dropped
+    assert disk.purged == 5
+
+
+def test_translator_hits_backend_once_per_phrase():
+    pytest.importorskip("deep_translator")
+    from app.services.translator import TranslatorService
+
+    backend = StubTranslator()
+    service = TranslatorService(backend=backend, cache=TTLCache())
+    first = service.translate_text("Please  wait", "en", "kn")
+    second = service.translate_text("Please wait ", "en", "kn")
+
+    assert first == second == "[kn] Please  wait"
+    assert backend.calls == 1
+    assert service.stats()["cache"]["hits"] == 1
+    # Same language never hits the backend or the cache
+    assert service.translate_text("Thank you", "en", "en") == "Thank you"
+    assert backend.calls == 1
+
+
+def test_translate_async_keeps_disk_io_off_the_loop(tmp_path):
+    pytest.importorskip("deep_translator")
+    from app.services.translator import TranslatorService
+
+    disk = RecordingTier(str(tmp_path / "cache.db"))
+    backend = AsyncStubTranslator()
+    service = TranslatorService(async_backend=backend, cache=TTLCache(disk=disk))
+
+    assert asyncio.run(service.translate_async("Thank you", "en", "kn")) == "[kn] Thank you"
+    assert asyncio.run(service.translate_async("Thank you", "en", "kn")) == "[kn] Thank you"
+    assert backend.calls == 1
+    assert len(disk.threads) == 2  # one lookup + one write-through; the repeat is a memory hit
+    assert threading.main_thread() not in disk.threads
+
+    restarted = TranslatorService(async_backend=backend, cache=TTLCache(disk=disk))
+    assert asyncio.run(restarted.translate_async("Thank you", "en", "kn")) == "[kn] Thank you"
+    assert backend.calls == 1 and restarted.upstream_calls == 0
+    assert threading.main_thread() not in disk.threads
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("deep_translator")
+
+from app.services.cache import TTLCache
+from app.services.translator import TranslatorService, AsyncGoogleTranslateClient
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        StandInHandler.hits += 1
+        q = parse_qs(urlparse(self.path).query)
+        time.sleep(0.05)  # keep requests in flight long enough to overlap
+        body = f'<div class="result-container">[{q["tl"][0]}] {q["q"][0]}</div>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_url():
+    StandInHandler.hits = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/m"
+    server.shutdown()
+
+
+def test_identical_inflight_requests_are_coalesced(stand_in_url):
+    async def scenario():
+        client = AsyncGoogleTranslateClient(base_url=stand_in_url)
+        service = TranslatorService(async_backend=client, cache=TTLCache())
+        results = await asyncio.gather(*(service.translate_async("Thank you", "en", "hi") for _ in range(20)))
+        await service.aclose()
+        return service, results
+
+    service, results = asyncio.run(scenario())
+    assert results == ["[hi] Thank you"] * 20
+    assert StandInHandler.hits == 1
+    assert service.upstream_calls == 1
+    assert service.coalesced == 19
+
+
+def test_upstream_failure_falls_back_to_original():
+    async def scenario():
+        client = AsyncGoogleTranslateClient(base_url="http://127.0.0.1:1/m")  # nothing listens here
+        service = TranslatorService(async_backend=client, cache=TTLCache())
+        result = await service.translate_async("Hello", "en", "kn")
+        await service.aclose()
+        return service, result
+
+    service, result = asyncio.run(scenario())
+    assert result == "Hello"
+    assert service.cache.stats()["size"] == 0
+
+
+def test_async_client_is_rejected_as_sync_backend():
+    with pytest.raises(TypeError):
+        TranslatorService(backend=AsyncGoogleTranslateClient(), cache=TTLCache())
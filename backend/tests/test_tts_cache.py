@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("gtts")
+
+from app.services.cache import TTLCache, SQLiteTier
+from app.services.tts import TTSService
+
+
+class FakeTTSEngine:
+    """Local engine: deterministic bytes, counts synth calls, simulates network latency."""
+    name = "fake"
+    codec = "mp3"
+
+    def __init__(self, latency=0.05):
+        self.calls = 0
+        self.latency = latency
+
+    def synthesize(self, text, lang, slow=False):
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"{lang}:{text}".encode("utf-8")
+
+
+class RecordingTier(SQLiteTier):
+    """Disk tier that remembers which threads looked things up."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookup_threads = []
+
+    def get(self, key):
+        self.lookup_threads.append(threading.current_thread())
+        return super().get(key)
+
+
+def test_repeated_phrase_is_served_from_memory():
+    engine = FakeTTSEngine()
+    service = TTSService(backend=engine, cache=TTLCache())
+
+    assert asyncio.run(service.synthesize_async("Please wait", "hi")) == b"hi:Please wait"
+
+    audio = asyncio.run(service.synthesize_async("Please  wait", "hi"))
+    assert audio == b"hi:Please wait"
+    assert service.synth_calls == engine.calls == 1
+    assert service.synthesize("Please wait", "hi") == b"hi:Please wait"
+    stats = service.cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (2, 0, 1)
+    assert engine.calls == 1
+
+
+def test_key_depends_on_language_and_voice():
+    service = TTSService(backend=FakeTTSEngine(latency=0), cache=TTLCache())
+    slow = TTSService(backend=FakeTTSEngine(latency=0), cache=TTLCache(), slow=True)
+    assert service.cache_key("Thank you", "hi") != service.cache_key("Thank you", "kn")
+    assert service.cache_key("Thank you", "hi") != slow.cache_key("Thank you", "hi")
+
+
+def test_disk_tier_and_warm_up(tmp_path):
+    db = str(tmp_path / "tts.db")
+    engine = FakeTTSEngine(latency=0)
+    service = TTSService(backend=engine, cache=TTLCache(disk=SQLiteTier(db, table="tts")))
+    count = asyncio.run(service.warm_up({"hi": ["Thank you", "Please wait"], "kn": ["Thank you"]}))
+    assert count == 3 and engine.calls == 3
+
+    # "Restart": new memory tier, same disk tier -> no synthesis needed
+    restarted_engine = FakeTTSEngine(latency=0)
+    restarted = TTSService(backend=restarted_engine, cache=TTLCache(disk=SQLiteTier(db, table="tts")))
+    assert restarted.synthesize("Thank you", "kn") == b"kn:Thank you"
+    assert restarted_engine.calls == 0
+
+
+def test_async_disk_lookup_stays_off_the_event_loop(tmp_path):
+    db = str(tmp_path / "tts.db")
+    TTSService(backend=FakeTTSEngine(latency=0), cache=TTLCache(disk=SQLiteTier(db, table="tts"))).synthesize("Thank you", "kn")
+
+    disk = RecordingTier(db, table="tts")
+    engine = FakeTTSEngine(latency=0)
+    service = TTSService(backend=engine, cache=TTLCache(disk=disk))
+    assert asyncio.run(service.synthesize_async("Thank you", "kn")) == b"kn:Thank you"
+    assert engine.calls == 0
+    assert disk.lookup_threads and threading.main_thread() not in disk.lookup_threads
@@ -0,0 +1,46 @@
+import json
+
+from app.user_store import MemoryUserStore, SQLiteUserStore
+
+
+def test_memory_store_copies_records():
+    store = MemoryUserStore()
+    record = store.get("admin")
+    record["approved"] = False
+    assert store.get("admin")["approved"] is True
+    assert store.create("emp1", {"password": "pw"})
+    assert not store.create("emp1", {"password": "other"})
+    assert store.get("emp1") == {"password": "pw", "role": "employee", "approved": False}
+
+
+def test_sqlite_imports_json_once_and_writes_through(tmp_path):
+    legacy = tmp_path / "users.json"
+    legacy.write_text(json.dumps({
+        "admin": {"password": "admin", "role": "admin", "approved": True},
+        "emp1": {"password": "pw", "role": "employee", "approved": False},
+    }))
+    db = str(tmp_path / "users.db")
+
+    store = SQLiteUserStore(db, legacy_json=str(legacy))
+    assert len(store) == 2
+    assert store.update("emp1", approved=True)
+    assert store.create("emp2", {"password": "pw2"})
+    store.close()
+
+    # Edits to the JSON file after migration are ignored; SQLite is the source of truth
+    legacy.write_text(json.dumps({"someone": {"password": "x"}}))
+    reopened = SQLiteUserStore(db, legacy_json=str(legacy))
+    assert reopened.get("emp1")["approved"] is True
+    assert reopened.get("emp2")["password"] == "pw2"
+    assert reopened.get("someone") is None
+
+
+def test_sqlite_sees_writes_from_other_connections(tmp_path):
+    db = str(tmp_path / "users.db")
+    worker_a = SQLiteUserStore(db)
+    worker_b = SQLiteUserStore(db)
+    assert worker_a.create("emp1", {"password": "pw"})
+    assert worker_b.get("emp1") is not None
+    assert worker_b.update("emp1", approved=True)
+    assert worker_a.get("emp1")["approved"] is True
+    assert not worker_b.create("emp1", {"password": "again"})
@@ -0,0 +1,48 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("av")
+
+from app.services.audio_processor import VADState
+from app.services.vad_scheduler import VADScheduler
+
+
+class EchoVAD:
+    """
+    Stands in for VADEngine: the "probability" of a window is its tag, and a
+    session's recurrent state is the list of windows it has been advanced by.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def score_batch(self, states, windows):
+        tags = [float(w[0]) for w in windows]
+        self.batches.append(tags)
+        for state, tag in zip(states, tags):
+            state.rnn = (state.rnn or []) + [tag]
+        return tags
+
+
+def windows_for(session, count):
+    return [np.full(512, session * 10 + i, dtype=np.float32) for i in range(count)]
+
+
+def test_results_and_state_route_back_round_robin():
+    engine = EchoVAD()
+    scheduler = VADScheduler(engine=engine, tick=0.02, max_batch=2)
+    states = [VADState() for _ in range(3)]
+
+    async def scenario():
+        return await asyncio.gather(*(scheduler.submit(state, windows_for(k + 1, 2)) for k, state in enumerate(states)))
+
+    results = asyncio.run(scenario())
+
+    # Each caller gets its own windows' scores, in order, and only its own state advanced
+    assert results == [[10.0, 11.0], [20.0, 21.0], [30.0, 31.0]]
+    assert [state.rnn for state in states] == results
+    # One window per session per step; whoever was left out goes first next time
+    assert engine.batches == [[10.0, 20.0], [30.0, 11.0], [21.0, 31.0]]
+    assert scheduler.stats()["pending_sessions"] == 0
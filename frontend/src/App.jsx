@@ -7,6 +7,7 @@ import LandingPage from './components/LandingPage';
 import EmployeeAuth from './components/EmployeeAuth';
 import AdminDashboard from './components/AdminDashboard';
 import AdminLogin from './components/AdminLogin';
+import { getApiUrl } from './config';
 
 function App() {
   // Session State (Persisted)
@@ -20,12 +21,46 @@ function App() {
   const [adminSession, setAdminSession] = useState(null);
 
   // Helper to handle login from any flow
-  const handleChatStart = (role, userId, lang) => {
-    const newSession = { role, userId, lang };
+  // The WebSocket needs a signed token: employees got one from /auth/login,
+  // customers get a guest token and a server-chosen id for their display name.
+  const handleChatStart = async (role, name, lang) => {
+    let token = localStorage.getItem("auth_token");
+    let userId = name;
+    if (role !== 'employee') {
+      try {
+        const res = await fetch(`${getApiUrl()}/auth/guest`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ name })
+        });
+        if (res.status === 429) throw new Error('Too many sessions, please try again shortly');
+        if (!res.ok) throw new Error('Could not start session');
+        const guest = await res.json();
+        token = guest.token;
+        userId = guest.user_id;
+      } catch (err) {
+        alert(err.message);
+        return;
+      }
+    }
+    const newSession = { role, userId, name, lang, token };
     localStorage.setItem("chat_session", JSON.stringify(newSession));
     setSession(newSession);
   };
 
+  const endSession = () => {
+    if (session?.token) {
+      fetch(`${getApiUrl()}/auth/logout`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ token: session.token })
+      }).catch(() => { });
+    }
+    localStorage.removeItem("chat_session");
+    localStorage.removeItem("auth_token");
+    setSession(null);
+  };
+
   // Protected Chat Route Wrapper
   const ProtectedChat = () => {
     if (!session) return <Navigate to="/" />;
@@ -33,19 +68,17 @@ function App() {
     // Auto-Logout after 5 minutes of inactivity
     useIdleTimeout(300000, () => {
       alert("Session timed out due to inactivity.");
-      localStorage.removeItem("chat_session");
-      setSession(null);
+      endSession();
     });
 
     return (
       <ChatInterface
         role={session.role}
         userId={session.userId}
+        name={session.name}
         lang={session.lang}
-        onLogout={() => {
-          localStorage.removeItem("chat_session");
-          setSession(null);
-        }}
+        token={session.token}
+        onLogout={endSession}
       />
     );
   };
@@ -70,6 +103,7 @@ function App() {
         <Route path="/employee" element={
           <EmployeeAuth
             onLogin={(userData) => {
+              localStorage.setItem("auth_token", userData.token);
               // After auth success, we need Language selection.
               // For MVP, we pass them to LoginScreen but with ID pre-filled and Role locked.
               // We can pass state via Navigation, but simple way is to use a specific Route.
@@ -2,16 +2,21 @@ import React, { useEffect, useRef, useState } from 'react';
 import { PhoneOff, User, Send, Mic, Volume2, Square } from 'lucide-react';
 import AudioRecorder from './AudioRecorder';
 import { useWebSocket } from '../hooks/useWebSocket';
+import { convertFloat32ToInt16, packIngestFrame, INGEST_CODEC } from '../utils/audioConverter';
 
-const ChatInterface = ({ role, userId, lang, onLogout }) => {
+// Mic capture runs at 16 kHz; int16 halves the upload vs raw float32
+const MIC_SAMPLE_RATE = 16000;
+
+const ChatInterface = ({ role, userId, name, lang, token, onLogout }) => {
   const baseUrl = import.meta.env.VITE_WS_URL || 'ws://localhost:8000';
-  const wsUrl = `${baseUrl}/ws/${role}/${userId}?lang=${lang}`;
+  const wsUrl = `${baseUrl}/ws/${role}/${userId}?lang=${lang}&token=${encodeURIComponent(token || '')}`;
   const { isConnected, messages, connect, disconnect, sendBytes, sendJson } = useWebSocket(wsUrl);
 
   const [inputText, setInputText] = useState("");
   const [previewText, setPreviewText] = useState("");
   const messagesEndRef = useRef(null);
   const lastProcessedRef = useRef(null); // Prevents duplicate processing
+  const micSeqRef = useRef(0); // Ingest frame sequence (server detects loss / reordering)
   const [isProcessing, setIsProcessing] = useState(false);
   const [completionStatus, setCompletionStatus] = useState(false);
 
@@ -46,7 +51,11 @@ const ChatInterface = ({ role, userId, lang, onLogout }) => {
       }
 
       // 2. SMART FLUSH COMMIT
-      if (data.type === 'commit') {
+      if (data.type === 'commit' && data.auto_sent) {
+        // Server already translated + delivered this voice turn
+        setPreviewText("");
+      }
+      else if (data.type === 'commit') {
         console.log("Committing Text:", data.text);
         setInputText(prev => {
           const separator = prev.trim() ? " " : "";
@@ -125,9 +134,15 @@ const ChatInterface = ({ role, userId, lang, onLogout }) => {
     setPreviewText("");
   };
 
+  const handleAudioData = (float32Samples) => {
+    const pcm = convertFloat32ToInt16(float32Samples);
+    sendBytes(packIngestFrame(micSeqRef.current++, INGEST_CODEC.s16, MIC_SAMPLE_RATE, pcm));
+  };
+
   const handleStopRecording = () => {
     // Use safe wrapper
     sendJson({ type: "stop_recording" });
+    micSeqRef.current = 0; // Server restarts sequencing on stop
 
     // Commit preview to main text
     if (previewText) {
@@ -180,7 +195,7 @@ const ChatInterface = ({ role, userId, lang, onLogout }) => {
             <User size={20} />
           </div>
           <div>
-            <h2 style={{ margin: 0, fontSize: '15px', fontWeight: '600', color: '#1f2937' }}>{userId} ({lang})</h2>
+            <h2 style={{ margin: 0, fontSize: '15px', fontWeight: '600', color: '#1f2937' }}>{name || userId} ({lang})</h2>
             <div style={{ fontSize: '12px', color: isProcessing ? '#d97706' : '#10b981', fontWeight: '500' }}>
               {isProcessing ? '⏳ Transcribing...' : (completionStatus ? '✅ Complete' : (isConnected ? '🟢 Online' : '🔴 Disconnected'))}
             </div>
@@ -205,6 +220,8 @@ const ChatInterface = ({ role, userId, lang, onLogout }) => {
             // Hide "preview" and "audio" messages from chat history
             if (raw.type === 'preview') return null;
             if (raw.type === 'audio') return null;
+            if (raw.type === 'timing') return null;
+            if (raw.type === 'audio_config') return null;
 
             if (raw.system) { isSystem = true; content = raw; }
             else {
@@ -342,7 +359,7 @@ const ChatInterface = ({ role, userId, lang, onLogout }) => {
 
         <div style={{ display: 'flex', alignItems: 'center', gap: '8px', paddingBottom: '4px' }}>
           <AudioRecorder
-            onAudioData={sendBytes}
+            onAudioData={handleAudioData}
             onStop={handleStopRecording}
             disabled={!isConnected}
           />
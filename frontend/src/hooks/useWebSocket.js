@@ -1,11 +1,13 @@
 //This hook purely manages the connection. It doesn't know about audio; it just sends and receives data.
 // src/hooks/useWebSocket.js
 import { useState, useRef, useCallback } from 'react';
+import { StreamingAudioPlayer } from '../utils/audioStream';
 
 export const useWebSocket = (url) => {
   const [isConnected, setIsConnected] = useState(false);
   const [messages, setMessages] = useState([]);
   const socketRef = useRef(null);
+  const audioPlayerRef = useRef(null);
 
   const connect = useCallback(() => {
     // Prevent double connections
@@ -15,6 +17,9 @@ export const useWebSocket = (url) => {
     socketRef.current = new WebSocket(url);
     socketRef.current.binaryType = "arraybuffer"; // Fix: Explicitly handle binary
 
+    // Streaming TTS: plays binary audio frames as they arrive
+    audioPlayerRef.current = new StreamingAudioPlayer();
+
     socketRef.current.onopen = () => {
       setIsConnected(true);
       console.log("WebSocket Open");
@@ -22,6 +27,13 @@ export const useWebSocket = (url) => {
 
     socketRef.current.onmessage = (event) => {
       let data = event.data;
+
+      // Binary frame = streamed TTS audio
+      if (data instanceof ArrayBuffer) {
+        audioPlayerRef.current?.push(data);
+        return;
+      }
+
       try {
         if (typeof data === 'string' && (data.startsWith('{') || data.startsWith('['))) {
           data = JSON.parse(data);
@@ -65,6 +77,7 @@ export const useWebSocket = (url) => {
 
     socketRef.current.onclose = () => {
       setIsConnected(false);
+      audioPlayerRef.current?.stop();
       console.log("WebSocket Closed");
     };
   }, [url]);
@@ -9,11 +9,33 @@ export function convertFloat32ToInt16(buffer) {
     let buf = new Int16Array(l);
     while (l--) {
       // Scale float (-1.0 to 1.0) to int16 (-32768 to 32767)
-      buf[l] = Math.min(1, buffer[l]) * 0x7FFF;
+      buf[l] = Math.max(-1, Math.min(1, buffer[l])) * 0x7FFF;
     }
     return buf.buffer;
 }
 
+/**
+ * Mic ingest framing (client -> server), see backend audio_protocol.py:
+ *   magic "AU" (2) | version u8 | codec u8 | sampleRate u32 | seq u32   (12 bytes, big-endian)
+ * followed by the payload (little-endian PCM, or one raw Opus packet).
+ */
+export const INGEST_HEADER_SIZE = 12;
+export const INGEST_CODEC = { f32: 2, s16: 3, opus: 4 };
+
+export function packIngestFrame(seq, codec, sampleRate, payload) {
+    const body = new Uint8Array(payload);
+    const frame = new Uint8Array(INGEST_HEADER_SIZE + body.length);
+    const view = new DataView(frame.buffer);
+    view.setUint8(0, 0x41); // "A"
+    view.setUint8(1, 0x55); // "U"
+    view.setUint8(2, 1);
+    view.setUint8(3, codec);
+    view.setUint32(4, sampleRate);
+    view.setUint32(8, seq >>> 0);
+    frame.set(body, INGEST_HEADER_SIZE);
+    return frame.buffer;
+}
+
 export function downsampleBuffer(buffer, sampleRate, outSampleRate) {
     if (outSampleRate === sampleRate) {
       return buffer;
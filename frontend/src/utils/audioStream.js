@@ -0,0 +1,79 @@
+// src/utils/audioStream.js
+
+/**
+ * Streaming TTS playback.
+ * The backend pushes binary frames as soon as each sentence is synthesized:
+ *   magic "BA" (2) | version u8 | codec u8 | messageId u32 | seq u16 | flags u8   (11 bytes, big-endian)
+ * followed by the raw audio bytes. An empty frame with FLAG_LAST closes the clip.
+ */
+export const AUDIO_HEADER_SIZE = 11;
+export const FLAG_LAST = 0x01;
+const CODEC_MIME = { 1: 'audio/mpeg' };
+
+export function parseAudioFrame(buffer) {
+    if (buffer.byteLength < AUDIO_HEADER_SIZE) return null;
+    const view = new DataView(buffer);
+    // "BA"
+    if (view.getUint8(0) !== 0x42 || view.getUint8(1) !== 0x41) return null;
+    return {
+        version: view.getUint8(2),
+        codec: view.getUint8(3),
+        messageId: view.getUint32(4),
+        seq: view.getUint16(8),
+        last: (view.getUint8(10) & FLAG_LAST) !== 0,
+        payload: new Uint8Array(buffer, AUDIO_HEADER_SIZE),
+    };
+}
+
+export class StreamingAudioPlayer {
+    /**
+     * Plays each chunk as it arrives. Every blob URL is revoked once played
+     * (or on stop), so a long session doesn't accumulate audio in memory.
+     */
+    constructor() {
+        this.queue = [];          // blob URLs waiting to play, in arrival order
+        this.current = null;
+    }
+
+    push(buffer) {
+        const frame = parseAudioFrame(buffer);
+        if (!frame) return false;
+
+        const mime = CODEC_MIME[frame.codec] || 'audio/mpeg';
+        if (frame.payload.byteLength > 0) {
+            // Copy: the payload is a view on the socket's ArrayBuffer
+            const chunk = frame.payload.slice();
+            // Start playback on the FIRST chunk, don't wait for the whole clip
+            this.queue.push(URL.createObjectURL(new Blob([chunk], { type: mime })));
+            if (!this.current) this.playNext();
+        }
+        return true;
+    }
+
+    playNext() {
+        const url = this.queue.shift();
+        if (!url) {
+            this.current = null;
+            return;
+        }
+        const audio = new Audio(url);
+        this.current = audio;
+        const next = () => {
+            URL.revokeObjectURL(url);
+            this.playNext();
+        };
+        audio.onended = next;
+        audio.onerror = next;
+        audio.play().catch(() => {
+            console.log("Auto-play blocked");
+            next();
+        });
+    }
+
+    stop() {
+        if (this.current) this.current.pause();
+        this.queue.forEach(url => URL.revokeObjectURL(url));
+        this.queue = [];
+        this.current = null;
+    }
+}